@@ -0,0 +1,353 @@
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import date
+from itertools import chain
+import numpy as np
+from DB.progress_codec import decode_day_masks, progress_positions
+from ai.planner import parse_plan
+from logs import log
+
+# Cross-plan analytics.
+#
+# All study_plan rows are flattened into one row per (plan, day) held in
+# NumPy columns (plan index, day number, task count, completed tasks, topic
+# id), and every statistic is a bincount / ufunc over those columns:
+#
+#   completion_by_day   share of tasks done on day N, over all plans
+#   cohorts             per start month: share of plans that finished day N
+#   drop_off            day on which plans stop being worked on
+#   topics              completion, stall count and feedback difficulty per
+#                       day title (the plan's topic for that day)
+#
+# The report is cached in memory and in ANALYTICS_CACHE_PATH, so the endpoint
+# and the batch job share it:
+#
+#   python -m DB.analytics              recompute and save
+#   GET /api/analytics[?refresh=1]      cached report, recomputed when stale
+#
+# Requests never compute the report themselves: a stale report (or
+# ?refresh=1 on one older than ANALYTICS_MIN_REFRESH_SECONDS) starts one
+# background rebuild per process and the current report is served until it
+# is done.
+
+PAGE_SIZE = 1000
+MAX_REPORT_DAY = 365
+DROP_OFF_GRACE_DAYS = 3   # idle days before an unfinished plan counts as dropped
+MIN_TOPIC_PLANS = 5       # topics seen in fewer plans are left out of the ranking
+TOP_TOPICS = 50
+HARD_LABELS = frozenset({'hard', 'difficult', 'too hard', 'confusing', 'stuck', 'skipped', 'too fast'})
+EASY_LABELS = frozenset({'easy', 'too easy', 'too slow'})
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+PLAN_COLUMNS = "id, days, start_date, created_at, progress, progress_bits, feedback, structure"
+
+CACHE_PATH = os.getenv("ANALYTICS_CACHE_PATH", "analytics_report.json")
+CACHE_TTL = float(os.getenv("ANALYTICS_TTL_SECONDS", "3600"))
+MIN_REFRESH_INTERVAL = float(os.getenv("ANALYTICS_MIN_REFRESH_SECONDS", "60"))
+MAX_MASK_TASKS = 63  # tasks per day counted from the progress bitmask (uint64)
+POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def load_plans(repository, page_size=PAGE_SIZE):
+    """All study_plan rows needed for the report, paged by id. Plans saved
+    before structure existed get their text fetched separately to parse.
+    Only an empty page ends the read: a short one may just be PostgREST's
+    max-rows cap."""
+    rows = []
+    last_id = None
+    while True:
+        page = repository.plans_page(PLAN_COLUMNS, last_id, page_size)
+        if not page:
+            break
+        rows.extend(page)
+        last_id = page[-1]['id']
+    missing = [row['id'] for row in rows if not (row.get('structure') or {}).get('days')]
+    texts = repository.plan_texts(missing) if missing else {}
+    for row in rows:
+        if row['id'] in texts:
+            row['structure'] = parse_plan(texts[row['id']])
+    return rows
+
+
+def _start_date(row):
+    for value in (row.get('start_date'), row.get('created_at')):
+        if value:
+            try:
+                return date.fromisoformat(str(value)[:10])
+            except ValueError:
+                continue
+    return None
+
+
+def _normalize_topic(title):
+    return ' '.join(str(title or '').lower().split())[:120]
+
+
+def _day_masks(row):
+    """Per-day bitmasks of completed tasks, from the bitset and/or JSON."""
+    masks = decode_day_masks(row.get('progress_bits'))
+    progress = row.get('progress')
+    if isinstance(progress, dict) and progress:
+        for day_index, task_index in progress_positions(progress):
+            if day_index >= len(masks):
+                masks.extend([0] * (day_index + 1 - len(masks)))
+            masks[day_index] |= 1 << task_index
+    return masks
+
+
+def _popcount(values):
+    """Set bits of every uint64 in values."""
+    return POPCOUNT8[values.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int32)
+
+
+def build_columns(rows):
+    """Flatten plans into per-day NumPy columns. Each column is filled
+    straight from the plans with np.fromiter, sized from the per-plan day
+    counts, and completed tasks are counted on the bitmasks in NumPy."""
+    structures = [(row.get('structure') or {}).get('days') or [] for row in rows]
+    plan_days = np.fromiter((len(days) for days in structures), dtype=np.int32, count=len(rows))
+    n_days = int(plan_days.sum())
+    first_row = np.concatenate(([0], np.cumsum(plan_days, dtype=np.int64)[:-1]))
+    starts = (_start_date(row) for row in rows)
+    plan_start = np.fromiter((start.toordinal() if start else -1 for start in starts), dtype=np.int64,
+                             count=len(rows))
+
+    def each_day(values):
+        return np.fromiter(chain.from_iterable(values), dtype=np.int64, count=n_days)
+
+    day_number = each_day(((day.get('day') or position for position, day in enumerate(days, start=1))
+                           for days in structures)).astype(np.int32)
+    day_total = each_day((len(day.get('tasks') or []) for day in days) for days in structures).astype(np.int32)
+    low_bits = (1 << MAX_MASK_TASKS) - 1
+
+    def plan_masks(row, count):
+        masks = _day_masks(row)[:count]
+        return [mask & low_bits for mask in masks] + [0] * (count - len(masks))
+
+    day_mask = np.fromiter(chain.from_iterable(plan_masks(row, len(days)) for row, days in zip(rows, structures)),
+                           dtype=np.uint64, count=n_days)
+    task_bits = (np.uint64(1) << np.minimum(day_total, MAX_MASK_TASKS).astype(np.uint64)) - np.uint64(1)
+    day_done = _popcount(day_mask & task_bits)
+
+    topic_ids = {}
+    title_ids = {}  # raw title -> topic id, skips re-normalizing repeats
+
+    def topic_id(title):
+        topic = title_ids.get(title)
+        if topic is None:
+            topic = title_ids[title] = topic_ids.setdefault(_normalize_topic(title), len(topic_ids))
+        return topic
+
+    day_topic = each_day((topic_id(day.get('title') or '') for day in days) for days in structures)
+
+    labels = []     # (flat day row, label) for task feedback
+    for p, row in enumerate(rows):
+        feedback = row.get('feedback')
+        if isinstance(feedback, dict):
+            for key, label in feedback.items():
+                for day_index, _ in progress_positions({key: True}):
+                    if day_index < plan_days[p] and isinstance(label, str):
+                        labels.append((int(first_row[p]) + day_index, label.strip().lower()))
+
+    label_rows = np.asarray([r for r, _ in labels], dtype=np.int64)
+    label_kind = np.asarray([1 if l in HARD_LABELS else -1 if l in EASY_LABELS else 0 for _, l in labels], dtype=np.int8)
+    return {
+        'plan_start': plan_start,
+        'plan_days': plan_days,
+        'day_plan': np.repeat(np.arange(len(rows), dtype=np.int64), plan_days),
+        'day_number': day_number,
+        'day_total': day_total,
+        'day_done': day_done,
+        'day_topic': day_topic,
+        'label_rows': label_rows,
+        'label_kind': label_kind,
+        'topics': list(topic_ids),
+    }
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.where(denominator > 0, numerator / np.maximum(denominator, 1), np.nan)
+    return [None if np.isnan(x) else round(float(x), 4) for x in ratio]
+
+
+def compute_report(columns, today=None, max_day=MAX_REPORT_DAY):
+    today = (today or date.today()).toordinal()
+    plan_start, plan_days = columns['plan_start'], columns['plan_days']
+    day_plan, day_number = columns['day_plan'], columns['day_number']
+    total, done = columns['day_total'], np.minimum(columns['day_done'], columns['day_total'])
+    n_plans = len(plan_days)
+    finished = (total > 0) & (done == total)
+    in_range = (day_number >= 1) & (day_number <= max_day)
+    day_bin = np.clip(day_number, 1, max_day) - 1
+
+    # Task completion by day N
+    tasks_by_day = np.bincount(day_bin[in_range], weights=total[in_range], minlength=max_day)
+    done_by_day = np.bincount(day_bin[in_range], weights=done[in_range], minlength=max_day)
+    last_day = int(np.flatnonzero(tasks_by_day).max()) + 1 if tasks_by_day.any() else 0
+
+    # Days that have already happened for each plan (undated plans: all)
+    elapsed = np.where(plan_start >= 0, np.clip(today - plan_start + 1, 0, plan_days), plan_days)
+
+    # Drop-off: last day with any completed task, for plans idle for a while
+    active = done > 0
+    last_active = np.zeros(n_plans, dtype=np.int64)
+    np.maximum.at(last_active, day_plan[active], day_number[active])
+    dropped = (last_active < plan_days) & (elapsed - last_active > DROP_OFF_GRACE_DAYS)
+    drop_day = np.minimum(last_active[dropped] + 1, max_day)
+    drop_hist = np.bincount(drop_day - 1, minlength=max_day) if len(drop_day) else np.zeros(max_day)
+
+    # Cohorts by start month
+    months = (plan_start - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]')
+    months[plan_start < 0] = np.datetime64('NaT')
+    cohort_months, plan_cohort = np.unique(months, return_inverse=True)
+    cohort_names = [str(m) if not np.isnat(m) else 'unknown' for m in cohort_months]
+    n_cohorts = len(cohort_names)
+    cohort_bins = plan_cohort[day_plan[in_range]] * max_day + day_bin[in_range]
+    reached = np.bincount(cohort_bins, minlength=n_cohorts * max_day).reshape(n_cohorts, max_day)
+    completed = np.bincount(cohort_bins, weights=finished[in_range], minlength=n_cohorts * max_day) \
+        .reshape(n_cohorts, max_day)
+    cohort_sizes = np.bincount(plan_cohort, minlength=n_cohorts)
+
+    # Topics: completion on elapsed days, stalls, feedback difficulty
+    topic = columns['day_topic']
+    n_topics = len(columns['topics'])
+    past = day_number <= elapsed[day_plan]
+    topic_total = np.bincount(topic[past], weights=total[past], minlength=n_topics)
+    topic_done = np.bincount(topic[past], weights=done[past], minlength=n_topics)
+    topic_plans = np.bincount(topic, minlength=n_topics)
+    stall_rows = np.zeros(len(day_plan), dtype=bool)
+    if dropped.any():
+        # The day each dropped plan stopped on
+        stall_day = np.full(n_plans, -1, dtype=np.int64)
+        stall_day[dropped] = last_active[dropped] + 1
+        stall_rows = day_number == stall_day[day_plan]
+    stalls = np.bincount(topic[stall_rows], minlength=n_topics)
+    label_topic = topic[columns['label_rows']]
+    kind = columns['label_kind']
+    hard = np.bincount(label_topic[kind == 1], minlength=n_topics)
+    easy = np.bincount(label_topic[kind == -1], minlength=n_topics)
+    rated = np.bincount(label_topic, minlength=n_topics)
+
+    ranked = np.flatnonzero(topic_plans >= MIN_TOPIC_PLANS)
+    difficulty = np.where(rated > 0, (hard - easy) / np.maximum(rated, 1), 0.0)
+    completion = _ratio(topic_done, topic_total)
+    ranked = ranked[np.lexsort((-difficulty[ranked], -stalls[ranked]))][:TOP_TOPICS]
+
+    return {
+        'generated_at': time.time(),
+        'plans': n_plans,
+        'days': len(day_plan),
+        'completion_by_day': _ratio(done_by_day, tasks_by_day)[:last_day],
+        'cohorts': [{
+            'cohort': name,
+            'plans': int(cohort_sizes[c]),
+            'completion_curve': _ratio(completed[c], reached[c])[:last_day],
+        } for c, name in enumerate(cohort_names)],
+        'drop_off': {
+            'dropped_plans': int(dropped.sum()),
+            'finished_plans': int(((last_active >= plan_days) & (plan_days > 0)).sum()),
+            'by_day': [int(x) for x in drop_hist[:last_day]],
+            'median_day': float(np.median(drop_day)) if len(drop_day) else None,
+        },
+        'topics': [{
+            'topic': columns['topics'][t],
+            'plans': int(topic_plans[t]),
+            'completion': completion[t],
+            'stalls': int(stalls[t]),
+            'feedback': int(rated[t]),
+            'hard': int(hard[t]),
+            'difficulty': round(float(difficulty[t]), 4),
+        } for t in ranked],
+    }
+
+
+_lock = threading.Lock()  # guards _report and _refreshing, never held while computing
+_report = None
+_refreshing = False
+
+
+def _read_cache(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(path, report):
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.warning("analytics.save_failed", error=e)
+
+
+def refresh_report(repository, path=CACHE_PATH):
+    """Compute the report now, keep it and save it."""
+    global _report
+    started = time.time()
+    rows = load_plans(repository)
+    loaded = time.time()
+    report = compute_report(build_columns(rows))
+    report['timings'] = {'load_seconds': round(loaded - started, 3), 'compute_seconds': round(time.time() - loaded, 3)}
+    with _lock:
+        _report = report
+    _write_cache(path, report)
+    return report
+
+
+def _refresh_in_background(repository, path):
+    global _refreshing
+    try:
+        refresh_report(repository, path)
+    except Exception as e:
+        log.error("analytics.refresh_failed", error=e)
+    finally:
+        with _lock:
+            _refreshing = False
+
+
+def get_report(repository, max_age=CACHE_TTL, refresh=False, path=CACHE_PATH):
+    """Cached report (memory, then file), or None while the first one is
+    computed. A stale report, or refresh on one older than
+    MIN_REFRESH_INTERVAL, starts a background rebuild; at most one runs per
+    process and the current report is returned meanwhile."""
+    global _report, _refreshing
+    with _lock:
+        report = _report
+    if report is None:
+        report = _read_cache(path)
+    now = time.time()
+    with _lock:
+        if _report is None:
+            _report = report
+        report = _report
+        age = now - report.get('generated_at', 0) if report else None
+        stale = report is None or age > max_age or (refresh and age > MIN_REFRESH_INTERVAL)
+        start = stale and not _refreshing
+        if start:
+            _refreshing = True
+    if start:
+        threading.Thread(target=_refresh_in_background, args=(repository, path), name="analytics-refresh",
+                         daemon=True).start()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute the cross-plan analytics report")
+    parser.add_argument('--output', default=CACHE_PATH, help="where to save the report (shared with the API)")
+    args = parser.parse_args()
+    from DB.repository import repository
+    report = refresh_report(repository, args.output)
+    print(f"{report['plans']} plans, {report['days']} plan days: "
+          f"loaded in {report['timings']['load_seconds']}s, computed in {report['timings']['compute_seconds']}s")
+    print(f"Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
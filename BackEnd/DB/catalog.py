@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from DB import topic_index
+from DB.repository import repository
+from logs import log
+
+# In-process cache of the content tables behind /api/topics,
+# /api/quiz-questions and /api/code-games.
+#
+# Entries are keyed by (table, language, topic, difficulty) and kept in an
+# LRU bounded by CATALOG_MAX_ENTRIES. Code games are cached one row per id
+# (see DB/game_sampler.py) in a second LRU of CATALOG_MAX_GAMES, so warming
+# or sampling thousands of games never evicts the hot topic and question
+# lists. An entry expires after CATALOG_TTL_SECONDS,
+# and the whole catalog is dropped when the content_version row written by
+# the seeding scripts changes. The version row is polled at most once every
+# CATALOG_VERSION_CHECK_SECONDS, by a single request at a time, so almost
+# every read is a dictionary lookup.
+
+class ContentCatalog:
+    def __init__(self, max_entries=4096, ttl=600, version_check_interval=15, max_games=4096):
+        self.max_entries = max_entries
+        self.max_games = max_games
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()
+        self._games = OrderedDict()  # code_games id -> (expires, row)
+        self._lock = threading.Lock()
+        self._version_lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped on every clear() so dependent indexes (DB/game_sampler.py)
+        # know to rebuild.
+        self.generation = 0
+
+    def get(self, key, loader):
+        self._check_version()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = loader()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(self._entries, self.max_entries, key, value)
+
+    def _store(self, entries, max_entries, key, value):
+        # Caller holds self._lock
+        entries[key] = (time.monotonic() + self.ttl, value)
+        entries.move_to_end(key)
+        while len(entries) > max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._games.clear()
+            self.generation += 1
+        topic_index.invalidate()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'games': len(self._games),
+                'max_games': self.max_games,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'version': self._version,
+            }
+
+    def version(self):
+        """The current content_version (checked at most once per interval)."""
+        self._check_version()
+        return self._version
+
+    def _check_version(self):
+        if time.monotonic() - self._version_checked_at < self.version_check_interval:
+            return
+        # Only one request pays for the version round trip; the rest keep
+        # serving from the cache while it is in flight.
+        if not self._version_lock.acquire(blocking=False):
+            return
+        try:
+            version = repository.content_version()
+            if self._version is not None and version != self._version:
+                log.info("catalog.version_changed", old=self._version, new=version)
+                self.clear()
+            self._version = version
+        except Exception as e:
+            log.warning("catalog.version_check_failed", error=e)
+        finally:
+            self._version_checked_at = time.monotonic()
+            self._version_lock.release()
+
+    # --- content lookups -------------------------------------------------
+
+    def topics(self, language):
+        return self.get(('topics', language, None, None), lambda: _load_topics(language))
+
+    def quiz_questions(self, language=None, topic=None):
+        return self.get(('quiz_questions', language, topic, None), lambda: _load_quiz_questions(language, topic))
+
+    def code_games_by_id(self, ids):
+        """Return the code_games rows for ids, in the same order. Rows are
+        cached one entry per id and the missing ones are fetched in one query."""
+        self._check_version()
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for game_id in ids:
+                entry = self._games.get(game_id)
+                if entry is not None and entry[0] > now:
+                    self._games.move_to_end(game_id)
+                    found[game_id] = entry[1]
+            self.hits += len(found)
+            self.misses += len(ids) - len(found)
+        missing = [game_id for game_id in ids if game_id not in found]
+        if missing:
+            rows = repository.code_games(missing)
+            with self._lock:
+                for row in rows:
+                    self._store(self._games, self.max_games, row['id'], row)
+                    found[row['id']] = row
+        return [found[game_id] for game_id in ids if game_id in found]
+
+    def warm(self):
+        """Load the content tables in one query each and fill the entries the
+        frontend asks for: topics per language, questions per (language, topic)
+        and code games per id."""
+        started = time.monotonic()
+        try:
+            self._check_version()
+            topics = repository.all_topics()
+            questions = repository.quiz_questions()
+            games = repository.code_games()
+        except Exception as e:
+            log.warning("catalog.warm_failed", error=e)
+            return
+
+        topics_by_language = {}
+        topic_by_id = {}
+        for row in topics:
+            topics_by_language.setdefault(row['language'], []).append(
+                {'topic': row['topic'], 'topic_order': row['topic_order']})
+            topic_by_id[row['id']] = (row['language'], row['topic'])
+        for language, rows in topics_by_language.items():
+            self.put(('topics', language, None, None), rows)
+
+        questions_by_topic = {}
+        for q in questions:
+            pair = topic_by_id.get(q.get('topic_id'))
+            if pair:
+                questions_by_topic.setdefault(pair, []).append(q)
+        for language, topic in topic_by_id.values():
+            self.put(('quiz_questions', language, topic, None), questions_by_topic.get((language, topic), []))
+
+        # Games go to their own LRU, so a large table cannot push out the
+        # topic and question lists loaded above
+        with self._lock:
+            for g in games[-self.max_games:]:
+                self._store(self._games, self.max_games, g['id'], g)
+
+        log.info("catalog.warmed", entries=len(self._entries), games=len(self._games),
+                 seconds=round(time.monotonic() - started, 2))
+
+
+def _load_topics(language):
+    return repository.topics_for_language(language)
+
+
+def _load_quiz_questions(language, topic):
+    # Resolve (language, topic) to topic ids through the in-process index and
+    # let the database do the filtering (quiz_questions.topic_id is indexed)
+    # instead of pulling the whole table into Python.
+    return repository.quiz_questions(topic_index.topic_ids_matching(language, topic))
+
+
+catalog = ContentCatalog(
+    max_entries=int(os.getenv("CATALOG_MAX_ENTRIES", "4096")),
+    ttl=float(os.getenv("CATALOG_TTL_SECONDS", "600")),
+    version_check_interval=float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", "15")),
+    max_games=int(os.getenv("CATALOG_MAX_GAMES", "4096")),
+)
@@ -0,0 +1,157 @@
+import argparse
+import re
+import zlib
+import numpy as np
+
+# Near-duplicate detection for the question bank.
+#
+# Exact string comparison misses paraphrases ("Which functools function is
+# used to cache results..." vs "...cache the results of a function with a
+# maximum size"). Each question is normalized, cut into word shingles and
+# summarized by a MinHash signature; locality-sensitive hashing over bands of
+# the signature finds candidate pairs without comparing every pair, and
+# candidates whose estimated Jaccard similarity reaches the threshold are
+# merged into clusters. Signatures are computed with NumPy, so 100k+
+# questions take seconds.
+#
+#   python -m DB.dedup seed_data/python_advanced_modules_questions.json --threshold 0.5
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands of 4 rows: pairs around Jaccard 0.5 become candidates
+SHINGLE_SIZE = 2
+DEFAULT_THRESHOLD = 0.5
+MAX_BUCKET = 200  # larger buckets are compared against their first member only
+
+STOPWORDS = frozenset("""
+a an the of in on to for and or is are be can could which what that this these
+those it its with by from as at used use using function class method module
+does do python following
+""".split())
+TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+
+def normalize(text):
+    """Lowercase word tokens without punctuation and filler words."""
+    return [t for t in TOKEN_RE.findall(str(text or '').lower()) if t not in STOPWORDS]
+
+
+def shingles(tokens, size=SHINGLE_SIZE):
+    if len(tokens) < size:
+        return {' '.join(tokens)}
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def question_text(row):
+    return f"{row.get('question', '')} {row.get('answer', '')}"
+
+
+def answer_key(row):
+    # Two questions worded alike but asking for different answers
+    # (takewhile / dropwhile) are not duplicates.
+    return ' '.join(normalize(row.get('answer', ''))).strip()
+
+
+def minhash_signatures(docs, num_perm=NUM_PERM, seed=1):
+    """MinHash signatures (len(docs) x num_perm, uint32) for token lists."""
+    hashes = []
+    offsets = np.empty(len(docs), dtype=np.int64)
+    for i, tokens in enumerate(docs):
+        offsets[i] = len(hashes)
+        hashes.extend(zlib.crc32(s.encode('utf-8')) for s in shingles(tokens))
+    values = np.asarray(hashes, dtype=np.uint64)
+    rng = np.random.default_rng(seed)
+    # Multiply-shift hashing: (a*x + b) mod 2^64, top 32 bits. Odd a.
+    a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    signatures = np.empty((len(docs), num_perm), dtype=np.uint32)
+    with np.errstate(over='ignore'):
+        for p in range(num_perm):
+            permuted = ((values * a[p] + b[p]) >> np.uint64(32)).astype(np.uint32)
+            signatures[:, p] = np.minimum.reduceat(permuted, offsets)
+    return signatures
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def near_duplicate_clusters(rows, threshold=DEFAULT_THRESHOLD, text=question_text, key=answer_key):
+    """Group rows with the same key whose estimated Jaccard similarity is
+    >= threshold. Returns clusters of row indexes (size > 1), largest first."""
+    if len(rows) < 2:
+        return []
+    signatures = minhash_signatures([normalize(text(row)) for row in rows])
+    rows_per_band = signatures.shape[1] // BANDS
+
+    pairs = set()
+    for band in range(BANDS):
+        block = np.ascontiguousarray(signatures[:, band * rows_per_band:(band + 1) * rows_per_band])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows_per_band))).ravel()
+        _, bucket_of = np.unique(keys, return_inverse=True)
+        order = np.argsort(bucket_of, kind='stable')
+        boundaries = np.flatnonzero(np.diff(bucket_of[order])) + 1
+        for members in np.split(order, boundaries):
+            if len(members) < 2:
+                continue
+            if len(members) > MAX_BUCKET:
+                pairs.update((int(members[0]), int(m)) for m in members[1:])
+                continue
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((int(members[x]), int(members[y])))
+    if not pairs:
+        return []
+
+    left, right = np.array(sorted(pairs)).T
+    similarity = (signatures[left] == signatures[right]).mean(axis=1)
+    keys = [key(row) for row in rows] if key else None
+    parent = list(range(len(rows)))
+    for i, j in zip(left[similarity >= threshold], right[similarity >= threshold]):
+        if keys and keys[i] != keys[j]:
+            continue
+        root_i, root_j = _find(parent, int(i)), _find(parent, int(j))
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    clusters = {}
+    for i in range(len(rows)):
+        clusters.setdefault(_find(parent, i), []).append(i)
+    return sorted((c for c in clusters.values() if len(c) > 1), key=len, reverse=True)
+
+
+def drop_near_duplicates(rows, threshold=DEFAULT_THRESHOLD):
+    """Keep the first row of every near-duplicate cluster. Returns
+    (kept rows, clusters)."""
+    clusters = near_duplicate_clusters(rows, threshold)
+    dropped = {i for cluster in clusters for i in cluster[1:]}
+    return [row for i, row in enumerate(rows) if i not in dropped], clusters
+
+
+def print_clusters(rows, clusters, limit=None):
+    for n, cluster in enumerate(clusters[:limit], start=1):
+        print(f"Cluster {n} ({len(cluster)} questions):")
+        for i in cluster:
+            row = rows[i]
+            print(f"  [{i}] {row.get('language')} | {row.get('topic')} | {row.get('question')}")
+    if limit is not None and len(clusters) > limit:
+        print(f"... and {len(clusters) - limit} more clusters")
+
+
+def main():
+    from DB.seeding import load_rows
+    parser = argparse.ArgumentParser(description="Report near-duplicate quiz questions")
+    parser.add_argument('path', help=".json list of questions (see seed_data/)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--limit', type=int, default=None, help="print at most this many clusters")
+    args = parser.parse_args()
+    rows = load_rows(args.path)
+    clusters = near_duplicate_clusters(rows, args.threshold)
+    print_clusters(rows, clusters, args.limit)
+    print(f"{len(clusters)} clusters, {sum(len(c) - 1 for c in clusters)} near-duplicates in {len(rows)} questions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import random
+import threading
+import time
+from DB.repository import repository
+from DB.catalog import catalog
+
+# Random sampling for /api/code-games.
+#
+# Instead of fetching every matching code_games row and shuffling it, we keep a
+# compact index of game ids for every (language, topic, difficulty) filter
+# combination, including the partial ones where a field is left out (None).
+# A request draws k ids from the matching tuple and only those rows are
+# fetched, through the catalog's per-row cache, so the per-request cost
+# depends on k and the exclusion list, not on the size of the table.
+#
+# The index is rebuilt when the catalog is cleared (content version bump) or
+# after the catalog TTL.
+
+
+class GameSampler:
+    def __init__(self):
+        self._index = {}
+        self._built_at = 0.0
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            self._build()
+
+    def _build(self):
+        generation = catalog.generation
+        rows = repository.code_game_index()
+        groups = {}
+        for row in rows:
+            language, topic, difficulty = row.get('language'), row.get('topic'), row.get('difficulty')
+            # Register the id under all 8 filter combinations so partial
+            # filters (e.g. language + difficulty) are a single lookup too.
+            for key in (
+                (language, topic, difficulty), (language, topic, None),
+                (language, None, difficulty), (None, topic, difficulty),
+                (language, None, None), (None, topic, None),
+                (None, None, difficulty), (None, None, None),
+            ):
+                groups.setdefault(key, []).append(row['id'])
+        # Sorted tuples keep the order stable across rebuilds, so a seed keeps
+        # giving the same games while the content does not change.
+        self._index = {key: tuple(sorted(ids, key=str)) for key, ids in groups.items()}
+        self._built_at = time.monotonic()
+        self._generation = generation
+
+    def _ensure_fresh(self):
+        if self._generation == catalog.generation and time.monotonic() - self._built_at < catalog.ttl:
+            return
+        with self._lock:
+            if self._generation != catalog.generation or time.monotonic() - self._built_at >= catalog.ttl:
+                self._build()
+
+    def sample_ids(self, language=None, topic=None, difficulty=None, k=10, seed=None, exclude=()):
+        """Draw up to k distinct game ids uniformly from the games matching the
+        filters, skipping any id in exclude. The same seed gives the same ids."""
+        self._ensure_fresh()
+        pool = self._index.get((language, topic, difficulty), ())
+        if not pool or k <= 0:
+            return []
+        excluded = {str(x) for x in exclude}
+        rng = random.Random(seed) if seed is not None else random
+        # A uniformly random ordering of k + |exclude| positions always holds
+        # at least k non-excluded ids when that many exist, and its first k
+        # non-excluded ids are a uniform sample of the non-excluded pool.
+        positions = rng.sample(range(len(pool)), min(len(pool), k + len(excluded)))
+        picked = []
+        for pos in positions:
+            game_id = pool[pos]
+            if str(game_id) not in excluded:
+                picked.append(game_id)
+                if len(picked) == k:
+                    break
+        return picked
+
+    def sample(self, language=None, topic=None, difficulty=None, k=10, seed=None, exclude=()):
+        ids = self.sample_ids(language, topic, difficulty, k, seed, exclude)
+        return catalog.code_games_by_id(ids)
+
+
+sampler = GameSampler()
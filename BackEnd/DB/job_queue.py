@@ -0,0 +1,342 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from logs import log
+
+# SQLite-backed job queue for slow plan requests.
+#
+# POST /generate-plan or /adapt-plan with "async": true returns a job id
+# right away; worker threads run the job and store its result, which clients
+# poll (GET /jobs/<id>) or subscribe to (GET /jobs/<id>/events). The queue is
+# a SQLite file, so every server process shares it and no outside service is
+# needed:
+#   - jobs are claimed atomically (BEGIN IMMEDIATE), highest priority first,
+#   - a user never has more than MAX_RUNNING_PER_USER jobs running, and among
+#     equal priorities the user served least in the last FAIRNESS_WINDOW
+#     seconds goes first,
+#   - the queue is bounded overall and per user,
+#   - jobs left running by a crashed process are requeued after STALE_SECONDS.
+#
+# Submitting never starts threads: the server starts each process's workers
+# with start() (app.start_background), and a job submitted in a process
+# without workers is claimed by one that has them. Importing opens nothing:
+# job_queue is created on first use and the SQLite file (with its schema) on
+# the first connection.
+
+DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                 "jobs.sqlite3"))
+WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+MAX_RUNNING_PER_USER = int(os.getenv("JOB_MAX_RUNNING_PER_USER", "2"))
+MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "1000"))
+MAX_QUEUED_PER_USER = int(os.getenv("JOB_MAX_QUEUED_PER_USER", "20"))
+STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "600"))
+RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+MAX_ATTEMPTS = 2
+POLL_INTERVAL = 0.5
+MIN_PRIORITY, MAX_PRIORITY, DEFAULT_PRIORITY = 0, 9, 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    status_code INTEGER,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queued_idx ON jobs (status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS jobs_user_idx ON jobs (user_id, status);
+CREATE INDEX IF NOT EXISTS jobs_started_idx ON jobs (started_at);
+"""
+
+# Per user: jobs running now (capped) and jobs started recently (fairness:
+# among equal priorities, whoever was served least lately goes first).
+CLAIM_QUERY = """
+SELECT j.id FROM jobs j
+LEFT JOIN (SELECT user_id,
+                  SUM(status = 'running') AS running,
+                  COUNT(*) AS served
+           FROM jobs WHERE status = 'running' OR started_at > ? GROUP BY user_id) u
+  ON u.user_id = j.user_id
+WHERE j.status = 'queued' AND COALESCE(u.running, 0) < ?
+ORDER BY j.priority DESC, COALESCE(u.served, 0) ASC, j.created_at ASC
+LIMIT 1
+"""
+FAIRNESS_WINDOW = 300
+
+
+class QueueFull(Exception):
+    def __init__(self, message, status_code=503):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class JobQueue:
+    def __init__(self, path=DB_PATH, workers=WORKERS, max_running_per_user=MAX_RUNNING_PER_USER,
+                 max_queued=MAX_QUEUED, max_queued_per_user=MAX_QUEUED_PER_USER):
+        self.path = path
+        self.workers = workers
+        self.max_running_per_user = max_running_per_user
+        self.max_queued = max_queued
+        self.max_queued_per_user = max_queued_per_user
+        self.handlers = {}
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.execute("PRAGMA journal_mode=WAL")  # readers do not block the claiming writer
+                    conn.executescript(SCHEMA)
+                    self._schema_ready = True
+        return conn
+
+    def register(self, kind, handler):
+        """handler(job) runs a job and returns (HTTP status code, JSON body)."""
+        self.handlers[kind] = handler
+
+    # --- producer side -------------------------------------------------------
+
+    def submit(self, kind, payload, user_id, priority=DEFAULT_PRIORITY):
+        if kind not in self.handlers:
+            raise ValueError(f"unknown job kind {kind}")
+        priority = max(MIN_PRIORITY, min(MAX_PRIORITY, int(priority)))
+        job_id = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            queued, per_user = conn.execute(
+                "SELECT COUNT(*), SUM(user_id = ?) FROM jobs WHERE status = 'queued'", (user_id,)).fetchone()
+            if queued >= self.max_queued:
+                conn.execute("ROLLBACK")
+                raise QueueFull("The job queue is full, try again later", 503)
+            if (per_user or 0) >= self.max_queued_per_user:
+                conn.execute("ROLLBACK")
+                raise QueueFull("Too many queued jobs for this user", 429)
+            conn.execute(
+                "INSERT INTO jobs (id, kind, user_id, priority, status, payload, created_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, str(user_id), priority, json.dumps(payload), time.time()))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id, user_id=None):
+        """The job as clients see it, or None if it does not exist or, when
+        user_id is given, belongs to someone else."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or (user_id is not None and row['user_id'] != str(user_id)):
+                return None
+            job = self._public(row)
+            if row['status'] == 'queued':
+                job['position'] = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND "
+                    "(priority > ? OR (priority = ? AND created_at < ?))",
+                    (row['priority'], row['priority'], row['created_at'])).fetchone()[0] + 1
+            return job
+        finally:
+            conn.close()
+
+    def cancel(self, job_id, user_id=None):
+        """Cancel a queued job (of this user, when given). Returns False if it
+        already started or is not theirs."""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued' "
+                "AND (? IS NULL OR user_id = ?)",
+                (time.time(), job_id, user_id, None if user_id is None else str(user_id)))
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _public(row):
+        job = {
+            'id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'priority': row['priority'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+        }
+        if row['status'] == 'done':
+            job['status_code'] = row['status_code']
+            job['result'] = json.loads(row['result']) if row['result'] else None
+        if row['error']:
+            job['error'] = row['error']
+        return job
+
+    # --- worker side ---------------------------------------------------------
+
+    def start(self):
+        """Start the worker threads of this process (once). Called by the
+        server at startup, not on import."""
+        with self._start_lock:
+            if self._threads or self.workers <= 0:
+                return
+            self._stop.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _claim(self):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(CLAIM_QUERY, (time.time() - FAIRNESS_WINDOW, self.max_running_per_user)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, worker = ?, attempts = attempts + 1 "
+                "WHERE id = ?", (time.time(), self.worker_id, row['id']))
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone()
+            conn.execute("COMMIT")
+            return job
+        finally:
+            conn.close()
+
+    def _finish(self, job, status, status_code=None, result=None, error=None):
+        conn = self._connect()
+        try:
+            # Only the claiming worker may finish a job (it may have been requeued meanwhile)
+            conn.execute(
+                "UPDATE jobs SET status = ?, status_code = ?, result = ?, error = ?, finished_at = ? "
+                "WHERE id = ? AND status = 'running' AND worker = ?",
+                (status, status_code, json.dumps(result) if result is not None else None, error,
+                 time.time(), job['id'], self.worker_id))
+        finally:
+            conn.close()
+
+    def _run(self, job):
+        handler = self.handlers.get(job['kind'])
+        if handler is None:
+            self._finish(job, 'failed', error=f"unknown job kind {job['kind']}")
+            return
+        try:
+            status_code, body = handler({'id': job['id'], 'user_id': job['user_id'],
+                                         'payload': json.loads(job['payload'])})
+            self._finish(job, 'done', status_code, body)
+        except Exception as e:
+            log.warning("job.failed", job_id=job['id'], kind=job['kind'], error=e)
+            self._finish(job, 'failed', error=str(e))
+
+    def _work(self):
+        last_maintenance = 0.0
+        while not self._stop.is_set():
+            if time.monotonic() - last_maintenance > 60:
+                last_maintenance = time.monotonic()
+                try:
+                    self.maintain()
+                except sqlite3.Error as e:
+                    log.warning("job_queue.maintenance_failed", error=e)
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                log.warning("job_queue.claim_failed", error=e)
+                job = None
+            if job is None:
+                # Woken by submit() in this process, or poll for other processes' jobs
+                self._wake.wait(POLL_INTERVAL)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def maintain(self):
+        """Requeue jobs whose worker died and drop old finished jobs."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END, "
+                "error = CASE WHEN attempts < ? THEN error ELSE 'worker stopped while running the job' END, "
+                "worker = NULL WHERE status = 'running' AND started_at < ?",
+                (MAX_ATTEMPTS, MAX_ATTEMPTS, now - STALE_SECONDS))
+            conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?",
+                         (now - RETENTION_SECONDS,))
+        finally:
+            conn.close()
+
+    def close(self, timeout=5.0):
+        """Stop the workers. Jobs still running after timeout go back to the
+        queue so another process picks them up."""
+        self._stop.set()
+        self._wake.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE jobs SET status = 'queued', worker = NULL "
+                         "WHERE status = 'running' AND worker = ?", (self.worker_id,))
+        finally:
+            conn.close()
+        self._threads = []
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            oldest = conn.execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        finally:
+            conn.close()
+        return {
+            'queued': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0),
+            'cancelled': counts.get('cancelled', 0),
+            'oldest_queued_seconds': round(time.time() - oldest, 1) if oldest else 0,
+            'workers': len(self._threads),
+        }
+
+
+class _LazyJobQueue:
+    """Forwards to the process's JobQueue, created on first use."""
+
+    def __init__(self):
+        self._queue = None
+        self._lock = threading.Lock()
+
+    def configure(self, queue):
+        """Use this queue from now on (tests, benchmarks, scripts)."""
+        self._queue = queue
+
+    def get(self):
+        if self._queue is None:
+            with self._lock:
+                if self._queue is None:
+                    self._queue = JobQueue()
+        return self._queue
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+job_queue = _LazyJobQueue()
@@ -0,0 +1,349 @@
+import os
+import threading
+from collections import OrderedDict
+from ai.adapt import LEGACY_KEY_RE, TASK_ID_RE, legacy_block_task_counts
+from ai.planner import parse_plan
+from DB.repository import repository
+from DB.progress_codec import storage_fields, stored_progress
+from logs import log
+
+# Write-behind buffer for study_plan progress.
+#
+# /update-progress accepts small deltas (task key -> done / undone, optional
+# per-task feedback). Deltas for a plan are collected for FLUSH_WINDOW seconds
+# and then written as one merged update, so ticking ten tasks in a row costs
+# one row update instead of ten. Reads go through view(), which overlays the
+# pending deltas on the last known row, so a client always sees its own
+# writes even before the flush. close() flushes everything on shutdown.
+#
+# A plan's row (progress, feedback, plan text) is read once and kept in an
+# LRU of PROGRESS_PLAN_CACHE_SIZE plans; deltas are checked against its tasks
+# and overlaid on it, so a click costs no database read. Writes are
+# conditional on the row's progress_version (DB/schema.sql): the merge is
+# written only if the plan has not changed since it was cached, otherwise
+# (another worker, the browser) the row is re-read and the merge redone.
+#
+# With PROGRESS_FLUSH_SECONDS=0 nothing is buffered: every add() is written
+# before it returns and reads come from the database. gunicorn.conf.py picks
+# this when it runs more than one worker, since a buffer only lives in its own
+# process and another worker would serve views without its pending deltas.
+
+FLUSH_WINDOW = float(os.getenv("PROGRESS_FLUSH_SECONDS", "0.5"))
+MAX_PENDING_DELTAS = 500  # flush right away once a plan has this many
+FLUSH_LOCK_STRIPES = 64
+MAX_WRITE_ATTEMPTS = 5  # conditional writes per flush before giving up for now
+PLAN_CACHE_SIZE = int(os.getenv("PROGRESS_PLAN_CACHE_SIZE", "512"))
+
+
+def normalize_deltas(deltas):
+    """Accept {"12-3": true, ...} or [{"task": "12-3", "done": true,
+    "feedback": "hard"}, ...]. Returns (progress deltas, feedback deltas)."""
+    progress, feedback = {}, {}
+    if isinstance(deltas, dict):
+        deltas = [{'task': key, 'done': value} for key, value in deltas.items()]
+    if not isinstance(deltas, list):
+        raise ValueError("deltas must be an object or a list")
+    for delta in deltas:
+        if not isinstance(delta, dict) or not isinstance(delta.get('task'), str) or not delta['task']:
+            raise ValueError("every delta needs a task key")
+        if 'done' in delta:
+            progress[delta['task']] = bool(delta['done'])
+        if 'feedback' in delta:
+            feedback[delta['task']] = delta['feedback']
+    return progress, feedback
+
+
+def task_slots(plan_text, structure):
+    """Predicate telling whether a progress key names a task of the plan:
+    "<block>-<task>" keys as PlanViewer.jsx numbers them, or "d3t2" ids."""
+    blocks = legacy_block_task_counts(plan_text)
+    days = {day['day']: len(day.get('tasks') or [])
+            for day in (structure or {}).get('days') or parse_plan(plan_text)['days']}
+
+    def valid(key):
+        legacy = LEGACY_KEY_RE.match(key)
+        if legacy:
+            block, index = int(legacy.group(1)), int(legacy.group(2))
+            return block < len(blocks) and index < blocks[block]
+        task = TASK_ID_RE.match(key)
+        return bool(task) and 0 < int(task.group(2)) <= days.get(int(task.group(1)), 0)
+    return valid
+
+
+def merge_feedback(current, task_feedback):
+    """Per-task feedback is kept as {task key: label}. Free-text feedback
+    written earlier is preserved under "note"."""
+    if not task_feedback:
+        return current
+    if isinstance(current, dict):
+        merged = dict(current)
+    elif isinstance(current, str) and current.strip():
+        merged = {'note': current}
+    else:
+        merged = {}
+    for key, label in task_feedback.items():
+        if label in (None, ''):
+            merged.pop(key, None)
+        else:
+            merged[key] = label
+    return merged
+
+
+class ProgressBuffer:
+    def __init__(self, repository, window=FLUSH_WINDOW, max_pending=MAX_PENDING_DELTAS,
+                 max_plans=PLAN_CACHE_SIZE):
+        self.repository = repository
+        self.window = window
+        self.max_pending = max_pending
+        self.max_plans = max_plans
+        self._lock = threading.Lock()
+        self._plans = OrderedDict()  # plan_id -> last known row (LRU)
+        self._pending = {}  # plan_id -> {"progress": {...}, "feedback": {...}, "count": n}
+        self._flushing = {}  # plan_id -> deltas being written right now
+        self._timers = {}
+        self._flush_locks = [threading.Lock() for _ in range(FLUSH_LOCK_STRIPES)]
+        self.deltas = 0
+        self.flushes = 0
+        self.failures = 0
+        self.conflicts = 0
+        self.plan_loads = 0
+
+    def _load(self, plan_id):
+        row = self.repository.get_plan(
+            plan_id, "user_id, progress, progress_bits, progress_version, feedback, plan, structure")
+        with self._lock:
+            self.plan_loads += 1
+        if row is None:
+            with self._lock:
+                self._plans.pop(plan_id, None)
+            return None
+        return self._remember(plan_id, row)
+
+    def _remember(self, plan_id, row):
+        """Cache a plan row as read or written. The task slots are kept as
+        long as the plan text is unchanged."""
+        entry = dict(row, progress=stored_progress(row))
+        entry.pop('progress_bits', None)
+        with self._lock:
+            previous = self._plans.pop(plan_id, None)
+            if previous is not None and previous.get('plan') == entry.get('plan') and 'slots' in previous:
+                entry['slots'] = previous['slots']
+            self._plans[plan_id] = entry
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+        return entry
+
+    def _plan(self, plan_id):
+        """The cached row of a plan, loaded on first use."""
+        with self._lock:
+            entry = self._plans.get(plan_id)
+            if entry is not None:
+                self._plans.move_to_end(plan_id)
+                return entry
+        return self._load(plan_id)
+
+    def _unknown_keys(self, entry, progress, feedback):
+        if 'slots' not in entry:
+            entry['slots'] = task_slots(entry.get('plan'), entry.get('structure'))
+        keys = set(progress) | (set(feedback or {}) - {'note'})
+        return sorted(key for key in keys if not entry['slots'](key))
+
+    def _overlay(self, row, plan_id):
+        """row with the in-flight and pending deltas of the plan applied.
+        Caller holds self._lock."""
+        progress, feedback = dict(row['progress']), row['feedback']
+        for layer in (self._flushing.get(plan_id), self._pending.get(plan_id)):
+            if layer:
+                progress.update(layer['progress'])
+                feedback = merge_feedback(feedback, layer['feedback'])
+        view = dict(row, progress=progress, feedback=feedback)
+        view.pop('slots', None)
+        return view
+
+    def add(self, plan_id, progress, feedback=None, user_id=None):
+        """Queue deltas for a plan (or write them right away with window 0).
+        Returns the plan's progress and feedback as they will be once flushed
+        (with the plan text and structure), or None if the plan does not
+        exist. Raises ValueError for task keys the plan does not have and
+        PermissionError if user_id is given and does not own the plan.
+
+        The plan is read once and then served from the cache, so a click
+        costs no database read."""
+        plan_id = str(plan_id)  # JSON bodies send numbers, URLs strings
+        entry = self._plan(plan_id)
+        if entry is not None and self._unknown_keys(entry, progress, feedback):
+            entry = self._load(plan_id)  # the plan may have been adapted since it was cached
+        if entry is None:
+            return None
+        if user_id is not None and str(entry.get('user_id')) != str(user_id):
+            raise PermissionError("not your plan")
+        unknown = self._unknown_keys(entry, progress, feedback)
+        if unknown:
+            raise ValueError(f"unknown task keys for this plan: {', '.join(unknown[:10])}")
+        flush_now = False
+        with self._lock:
+            pending = self._pending.setdefault(plan_id, {'progress': {}, 'feedback': {}, 'count': 0})
+            pending['progress'].update(progress)
+            pending['feedback'].update(feedback or {})
+            pending['count'] += len(progress) + len(feedback or {})
+            self.deltas += len(progress) + len(feedback or {})
+            view = self._overlay(entry, plan_id)
+            if pending['count'] >= self.max_pending or self.window <= 0:
+                flush_now = True
+            elif plan_id not in self._timers:
+                timer = threading.Timer(self.window, self.flush, args=(plan_id,))
+                timer.daemon = True
+                self._timers[plan_id] = timer
+                timer.start()
+        if flush_now:
+            flushed = self.flush(plan_id)
+            if self.window <= 0:
+                if not flushed:
+                    raise RuntimeError("progress could not be saved")
+                entry = self._plan(plan_id)  # as just written
+                with self._lock:
+                    return self._overlay(entry, plan_id) if entry is not None else None
+        return view
+
+    def view(self, plan_id):
+        """Progress and feedback including deltas that are not flushed yet,
+        plus the plan text and structure. Write-through buffers always read
+        the database, since other workers write the same plans."""
+        plan_id = str(plan_id)
+        row = self._load(plan_id) if self.window <= 0 else self._plan(plan_id)
+        if row is None:
+            return None
+        with self._lock:
+            return self._overlay(row, plan_id)
+
+    def replace(self, plan_id, progress, feedback=None, user_id=None):
+        """Whole-document write (the original /update-progress contract).
+        Pending deltas for the plan are superseded. Raises PermissionError if
+        user_id is given and does not own the plan."""
+        plan_id = str(plan_id)
+        if user_id is not None:
+            entry = self._plan(plan_id)
+            if entry is not None and str(entry.get('user_id')) != str(user_id):
+                raise PermissionError("not your plan")
+        with self._lock:
+            self._pending.pop(plan_id, None)
+            timer = self._timers.pop(plan_id, None)
+        if timer:
+            timer.cancel()
+        update_data = storage_fields(progress)
+        if feedback is not None:
+            update_data["feedback"] = feedback
+        return self._write(plan_id, lambda row: update_data)
+
+    def save_plan(self, plan_id, plan_text, structure, user_id=None):
+        """Store an adapted plan (text and structure) in place of the current
+        one. Pending deltas are written first, since they were made against
+        the old plan, and the cached row is replaced by the written one, so
+        its task slots are rebuilt for the new plan. Returns the written row,
+        or None if the plan does not exist. Raises PermissionError if user_id
+        is given and does not own the plan."""
+        plan_id = str(plan_id)
+        entry = self._plan(plan_id)
+        if entry is None:
+            return None
+        if user_id is not None and str(entry.get('user_id')) != str(user_id):
+            raise PermissionError("not your plan")
+        self.flush(plan_id)
+        return self._write(plan_id, lambda row: {'plan': plan_text, 'structure': structure})
+
+    def _write(self, plan_id, build):
+        """Update the plan with build(current row), conditional on the row not
+        having changed since it was cached; on conflict the row is re-read
+        and the write retried. Returns the written row, or None if the plan
+        does not exist."""
+        row = self._plan(plan_id)
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            if row is None:
+                return None
+            written = self.repository.update_plan(plan_id, build(row), expected_version=row['progress_version'])
+            if written is not None:
+                self._remember(plan_id, written)
+                return written
+            with self._lock:
+                self.conflicts += 1
+            row = self._load(plan_id)
+        raise RuntimeError(f"plan {plan_id} kept changing while its progress was written")
+
+    def flush(self, plan_id):
+        """Write a plan's pending deltas as one update. Concurrent flushes of
+        the same plan are serialized; deltas that arrive meanwhile stay queued
+        for the next flush."""
+        plan_id = str(plan_id)
+        with self._flush_locks[hash(plan_id) % FLUSH_LOCK_STRIPES]:
+            with self._lock:
+                timer = self._timers.pop(plan_id, None)
+                pending = self._pending.pop(plan_id, None)
+                if pending:
+                    # Still visible to view() until the write has landed
+                    self._flushing[plan_id] = pending
+            if timer:
+                timer.cancel()
+            if not pending:
+                return True
+            def merged(row):
+                update_data = storage_fields({**row['progress'], **pending['progress']})
+                if pending['feedback']:
+                    update_data["feedback"] = merge_feedback(row['feedback'], pending['feedback'])
+                return update_data
+
+            try:
+                self._write(plan_id, merged)
+            except Exception as e:
+                log.warning("progress.flush_failed", plan_id=plan_id, error=e)
+                with self._lock:
+                    self._flushing.pop(plan_id, None)
+                    self.failures += 1
+                self._requeue(plan_id, pending)
+                return False
+            with self._lock:
+                self._flushing.pop(plan_id, None)
+                self.flushes += 1
+            return True
+
+    def _requeue(self, plan_id, pending):
+        if self.window <= 0:
+            return  # write-through: the caller reports the failure instead
+        # Older deltas go underneath anything queued since the failed flush
+        with self._lock:
+            newer = self._pending.get(plan_id)
+            if newer:
+                pending['progress'].update(newer['progress'])
+                pending['feedback'].update(newer['feedback'])
+                pending['count'] += newer['count']
+            self._pending[plan_id] = pending
+            if plan_id not in self._timers:
+                timer = threading.Timer(self.window * 4, self.flush, args=(plan_id,))
+                timer.daemon = True
+                self._timers[plan_id] = timer
+                timer.start()
+
+    def flush_all(self):
+        with self._lock:
+            plan_ids = list(self._pending)
+        return all([self.flush(plan_id) for plan_id in plan_ids])
+
+    def close(self):
+        if not self.flush_all():
+            log.error("progress.unsaved_on_shutdown", pending_plans=len(self._pending))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending_plans': len(self._pending),
+                'pending_deltas': sum(p['count'] for p in self._pending.values()),
+                'deltas': self.deltas,
+                'flushes': self.flushes,
+                'failures': self.failures,
+                'conflicts': self.conflicts,
+                'cached_plans': len(self._plans),
+                'plan_loads': self.plan_loads,
+                'window_seconds': self.window,
+            }
+
+
+progress_buffer = ProgressBuffer(repository)
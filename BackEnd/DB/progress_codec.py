@@ -0,0 +1,152 @@
+import base64
+import re
+
+# Compact storage for study_plan progress.
+#
+# The frontend keeps progress as {"<day>-<task>": true, ...} (0-based block and
+# task index, see PlanViewer.jsx); structured plans use task ids like "d3t2".
+# Both are stored as one bitset per day in study_plan.progress_bits:
+#
+#   byte 0      key scheme (SCHEME_LEGACY or SCHEME_TASK_ID)
+#   per day     varint byte count, then the day's bits, task 0 = lowest bit
+#
+# base64 encoded. A 365-day plan with four tasks a day packs into ~1 KB
+# instead of ~17 KB of JSON. Unchecked tasks (false) are simply absent.
+
+SCHEME_LEGACY = 1   # "12-3": day index 12, task index 3
+SCHEME_TASK_ID = 2  # "d13t4": day 13, task 4 (1-based)
+LEGACY_KEY_RE = re.compile(r'^(\d+)-(\d+)$')
+TASK_ID_RE = re.compile(r'^d(\d+)t(\d+)$')
+MAX_INDEX = 10000  # larger indexes are not plan positions; keep them as JSON
+
+
+def _positions(progress):
+    """(scheme, [(day index, task index), ...]) for the checked tasks, or
+    None if the keys cannot be packed (mixed schemes or unknown keys)."""
+    scheme = None
+    positions = []
+    for key, value in progress.items():
+        legacy = LEGACY_KEY_RE.match(key)
+        task = None if legacy else TASK_ID_RE.match(key)
+        if legacy:
+            key_scheme, day, index = SCHEME_LEGACY, int(legacy.group(1)), int(legacy.group(2))
+        elif task and int(task.group(1)) > 0 and int(task.group(2)) > 0:
+            key_scheme, day, index = SCHEME_TASK_ID, int(task.group(1)) - 1, int(task.group(2)) - 1
+        else:
+            return None
+        if scheme not in (None, key_scheme) or day > MAX_INDEX or index > MAX_INDEX:
+            return None
+        scheme = key_scheme
+        if value:
+            positions.append((day, index))
+    return scheme or SCHEME_LEGACY, positions
+
+
+def _varint(n):
+    out = bytearray()
+    while True:
+        byte = n & 0x7f
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return out
+
+
+def encode_progress(progress):
+    """Pack a progress dict into a base64 bitset string. Returns None when
+    the dict uses keys the bitset cannot represent."""
+    packed = _positions(progress or {})
+    if packed is None:
+        return None
+    scheme, positions = packed
+    days = {}
+    for day, index in positions:
+        days[day] = days.get(day, 0) | (1 << index)
+    out = bytearray([scheme])
+    for day in range(max(days) + 1 if days else 0):
+        bits = days.get(day, 0)
+        data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+        out += _varint(len(data)) + data
+    return base64.b64encode(bytes(out)).decode('ascii')
+
+
+def _day_masks(data):
+    pos = 1
+    while pos < len(data):
+        length = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            length |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        yield int.from_bytes(data[pos:pos + length], 'little')
+        pos += length
+
+
+def decode_day_masks(encoded):
+    """Per-day task bitmasks (0-based day index -> int) without building keys;
+    for bulk readers such as DB/analytics.py."""
+    if not encoded:
+        return []
+    data = base64.b64decode(encoded)
+    if data[0] not in (SCHEME_LEGACY, SCHEME_TASK_ID):
+        raise ValueError(f"unknown progress encoding {data[0]}")
+    return list(_day_masks(data))
+
+
+def decode_progress(encoded):
+    """Unpack a bitset string into {key: True} in its original key scheme."""
+    if not encoded:
+        return {}
+    data = base64.b64decode(encoded)
+    scheme = data[0]
+    if scheme not in (SCHEME_LEGACY, SCHEME_TASK_ID):
+        raise ValueError(f"unknown progress encoding {scheme}")
+    progress = {}
+    for day, bits in enumerate(_day_masks(data)):
+        index = 0
+        while bits:
+            if bits & 1:
+                key = f"{day}-{index}" if scheme == SCHEME_LEGACY else f"d{day + 1}t{index + 1}"
+                progress[key] = True
+            bits >>= 1
+            index += 1
+    return progress
+
+
+def progress_positions(progress):
+    """0-based (day index, task index) of every checked task, whatever the
+    key scheme. Legacy block indexes are taken as day indexes."""
+    positions = []
+    for key, value in progress.items():
+        if not value:
+            continue
+        legacy = LEGACY_KEY_RE.match(key)
+        if legacy:
+            positions.append((int(legacy.group(1)), int(legacy.group(2))))
+            continue
+        task = TASK_ID_RE.match(key)
+        if task and int(task.group(1)) > 0 and int(task.group(2)) > 0:
+            positions.append((int(task.group(1)) - 1, int(task.group(2)) - 1))
+    return positions
+
+
+def storage_fields(progress):
+    """Column values for writing progress: the bitset when the keys allow
+    it, plain JSON otherwise."""
+    encoded = encode_progress(progress)
+    if encoded is None:
+        return {'progress': progress, 'progress_bits': None}
+    return {'progress': {}, 'progress_bits': encoded}
+
+
+def stored_progress(row):
+    """Progress of a study_plan row, whichever way it was written."""
+    progress = row.get('progress')
+    progress = dict(progress) if isinstance(progress, dict) else {}  # imported plans store []
+    progress.update(decode_progress(row.get('progress_bits')))
+    return progress
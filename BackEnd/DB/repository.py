@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+
+# Data access for the backend: every query the routes, caches and seeding
+# scripts make goes through one of these methods, so a query is tuned (or an
+# index added) in one place.
+#
+# DATA_BACKEND picks the store:
+#   supabase (default)  SupabaseRepository, the Supabase project from .env
+#   sqlite              SQLiteRepository (DB/sqlite_repository.py), a local
+#                       indexed file at SQLITE_PATH, for single-node
+#                       deployments, tests and benchmarks
+#
+# `repository` is created on first use rather than on import, so importing a
+# module never connects anywhere.
+#
+# Rows are plain dicts with the same keys in both backends. Ids are opaque:
+# uuids in Supabase, integers in SQLite.
+
+CONTENT_VERSION_ROW_ID = 1
+QUIZ_QUESTION_COLUMNS = 'id, topic_id, question, options, answer, explanation'
+CODE_GAME_INDEX_COLUMNS = 'id, language, topic, difficulty'
+REVIEW_STATE_COLUMNS = 'user_id, question_id, topic_id, due_day, interval_days, ease, repetitions, lapses, reviewed_at'
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "studycoach.sqlite3")
+HASH_LOOKUP_BATCH = 100  # values per IN (...) filter, keeps the URL short
+SELECT_PAGE = 1000  # rows per request when reading a whole table (PostgREST's default max-rows)
+
+
+def _topic_order(row):
+    return (row['topic_order'] is None, row['topic_order'] or 0)
+
+
+def _batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class SupabaseRepository:
+    def __init__(self, client):
+        self.client = client
+
+    def _select_all(self, table, columns, where=None):
+        """Every row of a select, read in id order one page at a time.
+
+        PostgREST cuts a single response off at its max-rows setting without
+        saying so, so whole-table reads must page. The walk ends on an empty
+        page rather than a short one, which stays correct when max-rows is
+        set lower than SELECT_PAGE. columns must include id."""
+        rows, after_id = [], None
+        while True:
+            query = self.client.table(table).select(columns)
+            if where is not None:
+                query = where(query)
+            query = query.order('id').limit(SELECT_PAGE)
+            if after_id is not None:
+                query = query.gt('id', after_id)
+            page = query.execute().data or []
+            if not page:
+                return rows
+            rows += page
+            after_id = page[-1]['id']
+
+    # --- content -------------------------------------------------------------
+
+    def topics_for_language(self, language):
+        """[{topic, topic_order}] of a language, in curriculum order."""
+        rows = self._select_all('topics', 'id, topic, topic_order', lambda q: q.eq('language', language))
+        rows.sort(key=_topic_order)
+        return [{'topic': row['topic'], 'topic_order': row['topic_order']} for row in rows]
+
+    def all_topics(self):
+        """Every topic as {id, language, topic, topic_order}, by topic_order."""
+        rows = self._select_all('topics', 'id, language, topic, topic_order')
+        rows.sort(key=_topic_order)
+        return rows
+
+    def topic_ids(self, languages):
+        """(language, topic) -> id for every topic of these languages."""
+        if not languages:
+            return {}
+        rows = self._select_all('topics', 'id, language, topic', lambda q: q.in_('language', list(languages)))
+        return {(row['language'], row['topic']): row['id'] for row in rows}
+
+    def quiz_questions(self, topic_ids=None):
+        """Questions of these topics (quiz_questions.topic_id is indexed), or
+        all of them with topic_ids=None."""
+        if topic_ids is None:
+            return self._select_all('quiz_questions', QUIZ_QUESTION_COLUMNS)
+        topic_ids = list(topic_ids)
+        if not topic_ids:
+            return []
+        if len(topic_ids) == 1:
+            return self._select_all('quiz_questions', QUIZ_QUESTION_COLUMNS, lambda q: q.eq('topic_id', topic_ids[0]))
+        return self._select_all('quiz_questions', QUIZ_QUESTION_COLUMNS, lambda q: q.in_('topic_id', topic_ids))
+
+    def quiz_questions_page(self, topic_ids, columns, after_id=None, limit=500):
+        """Up to limit questions ordered by id, starting after after_id, of
+        these topics (None: all topics)."""
+        query = self.client.table('quiz_questions').select(columns).order('id').limit(limit)
+        if topic_ids is not None:
+            topic_ids = list(topic_ids)
+            if not topic_ids:
+                return []
+            query = query.in_('topic_id', topic_ids)
+        if after_id is not None:
+            query = query.gt('id', after_id)
+        return query.execute().data or []
+
+    def code_game_index(self):
+        """{id, language, topic, difficulty} of every code game."""
+        return self._select_all('code_games', CODE_GAME_INDEX_COLUMNS)
+
+    def code_games(self, ids=None):
+        """Full code_games rows for ids, or all of them with ids=None."""
+        if ids is None:
+            return self._select_all('code_games', '*')
+        ids = list(ids)
+        if not ids:
+            return []
+        return self.client.table('code_games').select('*').in_('id', ids).execute().data or []
+
+    def content_version(self):
+        response = self.client.table('content_version').select('version').eq('id', CONTENT_VERSION_ROW_ID).execute()
+        if not response.data:
+            return 0
+        return response.data[0]['version']
+
+    def bump_content_version(self):
+        # A millisecond timestamp is always newer than the previous version and
+        # needs no read-modify-write.
+        version = time.time_ns() // 1_000_000
+        self.client.table('content_version').upsert({'id': CONTENT_VERSION_ROW_ID, 'version': version}).execute()
+        return version
+
+    # --- seeding -------------------------------------------------------------
+
+    def existing_hashes(self, table, hashes):
+        found = set()
+        for batch in _batches(sorted(hashes), HASH_LOOKUP_BATCH):
+            response = self.client.table(table).select('content_hash').in_('content_hash', batch).execute()
+            found.update(row['content_hash'] for row in response.data or [])
+        return found
+
+    def insert_content(self, table, rows):
+        """Insert rows, skipping any whose content_hash already exists (so
+        concurrent or repeated seeding runs do not fail)."""
+        self.client.table(table).upsert(rows, on_conflict='content_hash', ignore_duplicates=True).execute()
+
+    def rows_without_hash(self, table):
+        return self._select_all(table, '*', lambda q: q.is_('content_hash', 'null'))
+
+    def set_hashes(self, table, rows):
+        """Write content_hash on existing rows ({id, content_hash, ...})."""
+        self.client.table(table).upsert(rows, on_conflict='id').execute()
+
+    # --- study plans ---------------------------------------------------------
+
+    def get_plan(self, plan_id, columns):
+        response = self.client.table('study_plan').select(columns).eq('id', plan_id).execute()
+        return response.data[0] if response.data else None
+
+    def update_plan(self, plan_id, fields, expected_version=None):
+        """Returns the updated row, or None if there is no such plan. With
+        expected_version the update only applies while the row's
+        progress_version is still that value (None otherwise); every update
+        moves progress_version on (trigger in DB/schema.sql)."""
+        query = self.client.table('study_plan').update(fields).eq('id', plan_id)
+        if expected_version is not None:
+            query = query.eq('progress_version', expected_version)
+        response = query.execute()
+        return response.data[0] if response.data else None
+
+    def insert_plan(self, row):
+        """Insert a study_plan row and return it with its id."""
+        return self.client.table('study_plan').insert(row).execute().data[0]
+
+    def plans_page(self, columns, after_id=None, limit=1000):
+        """Up to limit plans ordered by id, starting after after_id."""
+        query = self.client.table('study_plan').select(columns).order('id').limit(limit)
+        if after_id is not None:
+            query = query.gt('id', after_id)
+        return query.execute().data or []
+
+    # --- review state (DB/review_scheduler.py) -------------------------------
+
+    def review_states(self, user_id, topic_id, since=None):
+        """A user's review_state rows for a topic, only those with
+        reviewed_at >= since if given."""
+        query = (self.client.table('review_state').select(REVIEW_STATE_COLUMNS)
+                 .eq('user_id', user_id).eq('topic_id', topic_id))
+        if since is not None:
+            query = query.gte('reviewed_at', since)
+        return query.execute().data or []
+
+    def save_review_states(self, rows):
+        """Upsert review_state rows (one per user and question)."""
+        self.client.table('review_state').upsert(rows, on_conflict='user_id,question_id').execute()
+
+    def plan_texts(self, ids):
+        """id -> plan text."""
+        texts = {}
+        for batch in _batches(list(ids), HASH_LOOKUP_BATCH):
+            for row in self.client.table('study_plan').select('id, plan').in_('id', batch).execute().data or []:
+                texts[row['id']] = row.get('plan')
+        return texts
+
+
+def create_repository(backend=None):
+    backend = (backend or os.getenv("DATA_BACKEND", "supabase")).lower()
+    if backend == 'sqlite':
+        from DB.sqlite_repository import SQLiteRepository
+        return SQLiteRepository(os.getenv("SQLITE_PATH", DEFAULT_SQLITE_PATH))
+    if backend == 'supabase':
+        from DB.supabase_client import supabase
+        return SupabaseRepository(supabase)
+    raise ValueError(f"unknown DATA_BACKEND {backend!r} (use supabase or sqlite)")
+
+
+class _LazyRepository:
+    """Forwards to the configured repository, created on first use."""
+
+    def __init__(self):
+        self._repository = None
+        self._lock = threading.Lock()
+
+    def configure(self, repository):
+        """Use this repository from now on (tests, benchmarks, scripts)."""
+        self._repository = repository
+
+    def get(self):
+        if self._repository is None:
+            with self._lock:
+                if self._repository is None:
+                    self._repository = create_repository()
+        return self._repository
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+repository = _LazyRepository()
@@ -0,0 +1,251 @@
+import heapq
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from DB import topic_index
+from DB.catalog import catalog
+from DB.repository import repository
+from logs import log
+
+# Spaced-repetition scheduling of quiz questions (SM-2).
+#
+# Review state is one narrow review_state row per (user, question) the user
+# has answered: due day, interval, ease, repetitions and lapses. Questions
+# never answered have no row and are due right away, after the reviews due
+# the same day.
+#
+# For each (user, topic) in use the scheduler keeps a min-heap of
+# (due day, new?, position, question id) over the topic's questions, so
+# next() pops the k due questions in O(k log n) instead of sorting the bank.
+# An answer pushes a fresh entry; the old one is dropped when it surfaces.
+# Queues are per process and kept in an LRU of SCHEDULER_MAX_QUEUES. Before
+# each read or write a queue pulls the rows written since its last sync
+# (indexed by user, topic, reviewed_at), so answers recorded by another
+# worker are seen. A queue is rebuilt when the content catalog changes.
+#
+# Answers arrive in batches (one POST per quiz session) and are written with
+# one upsert.
+
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+MAX_ANSWERS = 500
+# A correct/incorrect answer without an explicit 0-5 quality
+CORRECT_QUALITY = 4
+INCORRECT_QUALITY = 1
+
+
+def today():
+    return date.today().toordinal()
+
+
+def day_iso(day):
+    return date.fromordinal(day).isoformat() if day is not None else None
+
+
+def sm2(state, quality, day):
+    """Review state after answering with quality 0-5 on this day (SM-2).
+    state is the previous review_state row, or None for a new question."""
+    repetitions = state['repetitions'] if state else 0
+    interval = state['interval_days'] if state else 0
+    ease = state['ease'] if state else INITIAL_EASE
+    lapses = state['lapses'] if state else 0
+    if quality < 3:
+        repetitions = 0
+        interval = 1
+        lapses += 1
+    else:
+        interval = 1 if repetitions == 0 else 6 if repetitions == 1 else max(1, round(interval * ease))
+        repetitions += 1
+    ease = max(MIN_EASE, round(ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02), 2))
+    return {'due_day': day + interval, 'interval_days': interval, 'ease': ease,
+            'repetitions': repetitions, 'lapses': lapses}
+
+
+def normalize_answers(answers):
+    """Accept [{"question_id": ..., "quality": 0-5}] or
+    [{"question_id": ..., "correct": true}]. Returns [(question_id, quality)]."""
+    if not isinstance(answers, list) or not answers:
+        raise ValueError("answers must be a non-empty list")
+    if len(answers) > MAX_ANSWERS:
+        raise ValueError(f"at most {MAX_ANSWERS} answers per batch")
+    normalized = []
+    for answer in answers:
+        if not isinstance(answer, dict) or answer.get('question_id') in (None, ''):
+            raise ValueError("every answer needs a question_id")
+        if 'quality' in answer:
+            quality = answer['quality']
+            if not isinstance(quality, int) or isinstance(quality, bool) or not 0 <= quality <= 5:
+                raise ValueError("quality must be an integer from 0 to 5")
+        elif 'correct' in answer:
+            quality = CORRECT_QUALITY if answer['correct'] else INCORRECT_QUALITY
+        else:
+            raise ValueError("every answer needs quality or correct")
+        normalized.append((answer['question_id'], quality))
+    return normalized
+
+
+class _TopicQueue:
+    def __init__(self, topic_id, questions, generation, day):
+        self.lock = threading.Lock()
+        self.topic_id = topic_id
+        self.questions = {q['id']: q for q in questions}
+        self.position = {question_id: i for i, question_id in enumerate(self.questions)}
+        self.generation = generation
+        self.built_day = day
+        self.states = {}
+        self.synced_at = None
+        self.heap = []
+
+    def load(self, rows):
+        self.apply(rows, push=False)
+        self.heap = [self._entry(question_id) for question_id in self.questions]
+        heapq.heapify(self.heap)
+
+    def _entry(self, question_id):
+        state = self.states.get(question_id)
+        if state is None:
+            return (self.built_day, 1, self.position[question_id], question_id)
+        return (state['due_day'], 0, self.position[question_id], question_id)
+
+    def apply(self, rows, push=True):
+        for row in rows:
+            question_id = row['question_id']
+            if question_id not in self.questions:
+                continue
+            current = self.states.get(question_id)
+            if current is not None and current['reviewed_at'] >= row['reviewed_at']:
+                continue  # already applied
+            self.states[question_id] = row
+            if push:
+                heapq.heappush(self.heap, self._entry(question_id))
+            if self.synced_at is None or row['reviewed_at'] > self.synced_at:
+                self.synced_at = row['reviewed_at']
+        if len(self.heap) > 2 * len(self.questions) + 64:
+            # Mostly superseded entries: rebuild from the current states
+            self.heap = [self._entry(question_id) for question_id in self.questions]
+            heapq.heapify(self.heap)
+
+    def take(self, k, day):
+        """Up to k question ids due by this day, most overdue first, and the
+        due day of the next question after them (None if there is none)."""
+        taken = []
+        seen = set()
+        next_due = None
+        while self.heap:
+            entry = self.heap[0]
+            if entry[3] in seen or entry != self._entry(entry[3]):
+                heapq.heappop(self.heap)  # superseded by a later answer
+                continue
+            if entry[0] > day or len(taken) >= k:
+                next_due = entry[0]
+                break
+            taken.append(heapq.heappop(self.heap))
+            seen.add(entry[3])
+        # Served questions stay due until they are answered
+        for entry in taken:
+            heapq.heappush(self.heap, entry)
+        return [entry[3] for entry in taken], next_due
+
+
+class ReviewScheduler:
+    def __init__(self, repository, max_queues=10000):
+        self.repository = repository
+        self.max_queues = max_queues
+        self._queues = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.served = 0
+        self.answers = 0
+
+    def next(self, user_id, language, topic, count):
+        """(questions due for this user, next due date) or None if the topic
+        does not exist."""
+        queue = self._queue(user_id, language, topic)
+        if queue is None:
+            return None
+        with queue.lock:
+            self._sync(queue, user_id)
+            question_ids, next_due = queue.take(count, today())
+        with self._lock:
+            self.served += len(question_ids)
+        return [queue.questions[question_id] for question_id in question_ids], day_iso(next_due)
+
+    def record(self, user_id, language, topic, answers):
+        """Apply [(question_id, quality)] and store the new states in one
+        write. Returns (updated review states, unknown question ids), or None
+        if the topic does not exist."""
+        queue = self._queue(user_id, language, topic)
+        if queue is None:
+            return None
+        day = today()
+        with queue.lock:
+            self._sync(queue, user_id)
+            # Strictly after everything applied so far, so a sync never
+            # mistakes this write for one it has already seen
+            reviewed_at = max(time.time_ns() // 1_000_000, (queue.synced_at or 0) + 1)
+            updated = {}
+            unknown = []
+            for question_id, quality in answers:
+                if question_id not in queue.questions:
+                    unknown.append(question_id)
+                    continue
+                previous = updated.get(question_id) or queue.states.get(question_id)
+                updated[question_id] = dict(sm2(previous, quality, day), user_id=user_id, question_id=question_id,
+                                            topic_id=queue.topic_id, reviewed_at=reviewed_at)
+            rows = list(updated.values())
+            if rows:
+                self.repository.save_review_states(rows)
+                queue.apply(rows)
+        with self._lock:
+            self.answers += len(answers) - len(unknown)
+        return rows, unknown
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queues': len(self._queues),
+                'max_queues': self.max_queues,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'served': self.served,
+                'answers': self.answers,
+            }
+
+    def _queue(self, user_id, language, topic):
+        topic_id = topic_index.get_topic_id(language, topic)
+        if topic_id is None:
+            return None
+        key = (user_id, topic_id)
+        generation = catalog.generation
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is not None and queue.generation == generation and queue.built_day == today():
+                self._queues.move_to_end(key)
+                self.hits += 1
+                return queue
+            self.misses += 1
+        # Built outside the lock; two requests racing here both build and the
+        # second one wins, which is harmless.
+        queue = _TopicQueue(topic_id, catalog.quiz_questions(language, topic), generation, today())
+        queue.load(self.repository.review_states(user_id, topic_id))
+        with self._lock:
+            self._queues[key] = queue
+            self._queues.move_to_end(key)
+            while len(self._queues) > self.max_queues:
+                self._queues.popitem(last=False)
+                self.evictions += 1
+        return queue
+
+    def _sync(self, queue, user_id):
+        try:
+            queue.apply(self.repository.review_states(user_id, queue.topic_id, queue.synced_at))
+        except Exception as e:
+            log.warning("review.sync_failed", error=e)
+
+
+review_scheduler = ReviewScheduler(repository, max_queues=int(os.getenv("SCHEDULER_MAX_QUEUES", "10000")))
@@ -0,0 +1,78 @@
+-- Backend indexes for the content tables.
+-- Run once in the Supabase SQL editor; every statement is safe to re-run.
+
+-- /api/topics filters by language and orders by topic_order, and the backend
+-- topic index resolves (language, topic) -> id.
+CREATE INDEX IF NOT EXISTS topics_language_order_idx ON topics (language, topic_order);
+CREATE INDEX IF NOT EXISTS topics_language_topic_idx ON topics (language, topic);
+
+-- /api/quiz-questions fetches questions by topic_id.
+CREATE INDEX IF NOT EXISTS quiz_questions_topic_id_idx ON quiz_questions (topic_id);
+-- Its paged mode (?limit/?cursor, ?format=ndjson) walks a topic in id order.
+-- SQLite gets this for free: its topic_id index already ends in the rowid.
+CREATE INDEX IF NOT EXISTS quiz_questions_topic_id_id_idx ON quiz_questions (topic_id, id);
+
+-- Code games are filtered by language, topic and difficulty (see
+-- DB/repository.py; DB/sqlite_repository.py has the same indexes).
+CREATE INDEX IF NOT EXISTS code_games_language_topic_difficulty_idx ON code_games (language, topic, difficulty);
+
+-- Single-row version stamp for the content tables. The insert_*.py seeding
+-- scripts bump it and the backend catalog (DB/catalog.py) clears its cache
+-- when it changes.
+CREATE TABLE IF NOT EXISTS content_version (
+  id INTEGER PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO content_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+-- Parsed day/task structure of a plan ({"days": [...]}, see ai/planner.py),
+-- returned by /generate-plan and /adapt-plan and saved next to the text.
+ALTER TABLE study_plan ADD COLUMN IF NOT EXISTS structure JSONB;
+
+-- Content hashes written by the seeding pipeline (DB/seeding.py). Upserts on
+-- content_hash make re-running a seed file a no-op. Rows inserted before
+-- this existed can be hashed once with: python -m DB.seeding <kind> --backfill
+ALTER TABLE topics ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE quiz_questions ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE code_games ADD COLUMN IF NOT EXISTS content_hash TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS topics_content_hash_idx ON topics (content_hash);
+CREATE UNIQUE INDEX IF NOT EXISTS quiz_questions_content_hash_idx ON quiz_questions (content_hash);
+CREATE UNIQUE INDEX IF NOT EXISTS code_games_content_hash_idx ON code_games (content_hash);
+
+-- Progress packed as one bitset per day (DB/progress_codec.py). The backend
+-- writes progress_bits and leaves progress empty; rows written before this,
+-- or with keys the bitset cannot hold, keep their JSON progress.
+ALTER TABLE study_plan ADD COLUMN IF NOT EXISTS progress_bits TEXT;
+
+-- Moves on with every update of a plan, from the backend or the browser. The
+-- progress buffer writes conditionally on it (read, merge, update ... where
+-- progress_version = <what it read>), so two backend workers flushing the
+-- same plan cannot overwrite each other's ticks.
+ALTER TABLE study_plan ADD COLUMN IF NOT EXISTS progress_version BIGINT NOT NULL DEFAULT 0;
+CREATE OR REPLACE FUNCTION study_plan_bump_progress_version() RETURNS trigger AS $$
+BEGIN
+  NEW.progress_version := OLD.progress_version + 1;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+DROP TRIGGER IF EXISTS study_plan_progress_version ON study_plan;
+CREATE TRIGGER study_plan_progress_version BEFORE UPDATE ON study_plan
+  FOR EACH ROW EXECUTE FUNCTION study_plan_bump_progress_version();
+
+-- Spaced-repetition state (DB/review_scheduler.py): one row per user and
+-- answered question, nothing for questions never answered. Days are
+-- proleptic ordinals (Python date.toordinal()), reviewed_at is epoch ms.
+-- Use the type of quiz_questions.id / topics.id for question_id / topic_id.
+CREATE TABLE IF NOT EXISTS review_state (
+  user_id UUID NOT NULL,
+  question_id UUID NOT NULL,
+  topic_id UUID NOT NULL,
+  due_day INTEGER NOT NULL,
+  interval_days INTEGER NOT NULL,
+  ease REAL NOT NULL,
+  repetitions SMALLINT NOT NULL,
+  lapses SMALLINT NOT NULL,
+  reviewed_at BIGINT NOT NULL,
+  PRIMARY KEY (user_id, question_id)
+);
+CREATE INDEX IF NOT EXISTS review_state_user_topic_idx ON review_state (user_id, topic_id, reviewed_at);
@@ -0,0 +1,372 @@
+import bisect
+import hashlib
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from itertools import islice
+from DB.catalog import catalog
+from DB.repository import repository
+from logs import log
+
+# In-memory full-text index behind /api/search: topics, quiz questions and
+# study plans (title, goal, tags).
+#
+# An inverted index maps each term to {document: weighted term frequency}
+# (title terms count double) and results are ranked with BM25. Postings are
+# split into shards - (kind, language) for topics and questions,
+# ('plan', user_id) for plans - so a query only touches the shards it can
+# return, and another user's plans are never even scanned. Within a shard a
+# term's postings are scanned in impact order (the BM25 term weight, sorted
+# on first use after a change) and at most MAX_SCAN of them, so very common
+# terms cost the same as rare ones. The term weights in those lists use the
+# average document length at the time they were sorted. The last query
+# word also matches as a prefix (autocomplete) against a sorted term list.
+# A query word with no exact or prefix match is matched within one edit
+# (insert, delete, substitute or swap) through a deletion index, in which
+# every term is filed under itself and each of its one-character deletions,
+# so the candidates are a handful of dictionary lookups instead of a scan
+# of the vocabulary. Documents matching more query words rank first.
+#
+# Updates are incremental: refresh() reads the tables and only (re)indexes
+# documents whose text changed, and drops the ones that are gone. It runs
+# in the background at startup, when the content catalog changes (seeding
+# bumps the content version) and every SEARCH_PLAN_REFRESH_SECONDS for
+# plans, which the frontend writes straight to the database;
+# reindex_plan() picks up a single plan right away.
+#
+# Plans are only returned to their owner (user_id).
+
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 2
+MIN_PREFIX = 2
+PREFIX_EXPANSIONS = 24
+PREFIX_WEIGHT = 0.8
+FUZZY_MIN_LENGTH = 4
+FUZZY_WEIGHT = 0.6
+MAX_QUERY_TERMS = 8
+MAX_SCAN = 200  # postings per (shard, term) looked at by a query
+READ_PAGE = 1000  # rows per request when reading questions and plans
+QUESTION_COLUMNS = 'id, topic_id, question, explanation'
+PLAN_COLUMNS = 'id, user_id, title, goal, tags'
+UPSERT_BATCH = 2000
+KINDS = ('topic', 'question', 'plan')
+
+STOPWORDS = frozenset(
+    "a an and are as at be by does for from how in is it of on or that the this to what when which with".split())
+_TOKEN = re.compile(r"[^\W_]+[+#]*")
+
+
+def tokenize(text):
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _deletions(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one_edit(a, b):
+    """Damerau-Levenshtein distance <= 1."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diff = [i for i in range(la) if a[i] != b[i]]
+        if len(diff) == 1:
+            return True
+        return len(diff) == 2 and diff[1] == diff[0] + 1 and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+    if la > lb:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+def _tags(value):
+    if isinstance(value, list):
+        return [str(t).strip() for t in value if str(t).strip()]
+    if isinstance(value, str):
+        return [t.strip() for t in value.split(',') if t.strip()]
+    return []
+
+
+class SearchIndex:
+    def __init__(self, repository, plan_refresh_interval=300):
+        self.repository = repository
+        self.plan_refresh_interval = plan_refresh_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._postings = {}      # (shard, term) -> {doc key: weighted tf}
+        self._ranked = {}        # (shard, term) -> [(doc key, BM25 term weight)], best first; rebuilt after changes
+        self._df = {}            # term -> number of documents containing it
+        self._docs = {}          # doc key -> (result, length, {term: tf}, shard, signature)
+        self._shards = set()     # topic and question shards (plan shards are looked up by user)
+        self._total_length = 0
+        self._terms = []         # sorted vocabulary, for prefix lookups
+        self._variants = {}      # term or one-deletion of a term -> {terms}
+        self._content_generation = None
+        self._plans_refreshed_at = None
+        self.ready = False
+        self.queries = 0
+        self.refreshes = 0
+        self.last_refresh_seconds = 0.0
+
+    # --- indexing ------------------------------------------------------------
+
+    def upsert(self, docs):
+        """Index [(key, title, body, result, shard)], replacing any previous
+        version of each key. Unchanged documents are skipped. Works in
+        batches so searches are never blocked for long."""
+        docs = list(docs)
+        for start in range(0, len(docs), UPSERT_BATCH):
+            changed = []
+            for key, title, body, result, shard in docs[start:start + UPSERT_BATCH]:
+                signature = hashlib.sha1(f"{title}\0{body}\0{shard}".encode()).digest()
+                current = self._docs.get(key)
+                if current is not None and current[4] == signature:
+                    continue
+                tf = {}
+                for term in tokenize(title):
+                    tf[term] = tf.get(term, 0) + TITLE_WEIGHT
+                for term in tokenize(body):
+                    tf[term] = tf.get(term, 0) + 1
+                changed.append((key, (result, sum(tf.values()), tf, shard, signature)))
+            if changed:
+                self._apply(changed)
+
+    def _apply(self, changed):
+        new_terms = set()
+        with self._lock:
+            for key, doc in changed:
+                if key in self._docs:
+                    self._remove(key)
+                shard = doc[3]
+                if shard[0] != 'plan':
+                    self._shards.add(shard)
+                for term, count in doc[2].items():
+                    postings = self._postings.get((shard, term))
+                    if postings is None:
+                        postings = self._postings[(shard, term)] = {}
+                    postings[key] = count
+                    self._ranked.pop((shard, term), None)
+                    df = self._df.get(term, 0)
+                    if not df:
+                        new_terms.add(term)
+                    self._df[term] = df + 1
+                self._docs[key] = doc
+                self._total_length += doc[1]
+            new_terms = {term for term in new_terms if term in self._df}  # unless removed again
+            if new_terms:
+                # Merged once per batch rather than an insort per new term
+                self._terms = list(heapq.merge(self._terms, sorted(new_terms)))
+                for term in new_terms:
+                    for variant in _deletions(term) | {term}:
+                        self._variants.setdefault(variant, set()).add(term)
+
+    def remove(self, keys):
+        with self._lock:
+            for key in keys:
+                if key in self._docs:
+                    self._remove(key)
+
+    def _remove(self, key):
+        _, length, tf, shard, _ = self._docs.pop(key)
+        self._total_length -= length
+        for term in tf:
+            postings = self._postings[(shard, term)]
+            postings.pop(key, None)
+            self._ranked.pop((shard, term), None)
+            if not postings:
+                del self._postings[(shard, term)]
+            self._df[term] -= 1
+            if not self._df[term]:
+                del self._df[term]
+                i = bisect.bisect_left(self._terms, term)
+                if i < len(self._terms) and self._terms[i] == term:
+                    del self._terms[i]
+                for variant in _deletions(term) | {term}:
+                    terms = self._variants.get(variant)
+                    if terms is not None:
+                        terms.discard(term)
+                        if not terms:
+                            del self._variants[variant]
+
+    def _sync(self, kind, docs):
+        """Make the index's documents of this kind exactly docs."""
+        keep = {doc[0] for doc in docs}
+        with self._lock:
+            gone = [key for key in self._docs if key[0] == kind and key not in keep]
+        self.remove(gone)
+        self.upsert(docs)
+
+    def refresh(self, content=True, plans=True):
+        """Bring the index up to date with the database. Only one refresh
+        runs at a time; a call while one is running returns False."""
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        started = time.monotonic()
+        try:
+            if content:
+                generation = catalog.generation
+                topics = self.repository.all_topics()
+                topic_by_id = {row['id']: row for row in topics}
+                self._sync('topic', [_topic_doc(row) for row in topics])
+                questions = _walk(lambda after_id: self.repository.quiz_questions_page(
+                    None, QUESTION_COLUMNS, after_id, READ_PAGE))
+                self._sync('question', [_question_doc(row, topic_by_id.get(row.get('topic_id')))
+                                        for row in questions])
+                self._content_generation = generation
+            if plans:
+                plans = _walk(lambda after_id: self.repository.plans_page(PLAN_COLUMNS, after_id, READ_PAGE))
+                self._sync('plan', [_plan_doc(row) for row in plans])
+                self._plans_refreshed_at = time.monotonic()
+            self.ready = True
+            self.refreshes += 1
+            self.last_refresh_seconds = round(time.monotonic() - started, 3)
+            log.info("search.refreshed", documents=len(self._docs), terms=len(self._df),
+                     seconds=self.last_refresh_seconds)
+            return True
+        except Exception as e:
+            log.warning("search.refresh_failed", error=e)
+            return False
+        finally:
+            self._refresh_lock.release()
+
+    def reindex_plan(self, plan_id):
+        """Re-read one plan (after it was created, edited or deleted)."""
+        row = self.repository.get_plan(plan_id, PLAN_COLUMNS)
+        if row is None:
+            keys = [('plan', plan_id)]
+            if isinstance(plan_id, str) and plan_id.isdigit():
+                keys.append(('plan', int(plan_id)))  # integer ids (SQLite) arrive as URL strings
+            self.remove(keys)
+        else:
+            self.upsert([_plan_doc(row)])
+        return row is not None
+
+    def ensure_fresh(self):
+        """Start a background refresh if the content version changed or the
+        plans are due for one."""
+        content = self._content_generation != catalog.generation
+        plans = (self._plans_refreshed_at is None
+                 or time.monotonic() - self._plans_refreshed_at >= self.plan_refresh_interval)
+        if (content or plans) and not self._refresh_lock.locked():
+            threading.Thread(target=self.refresh, args=(content, plans), daemon=True).start()
+
+    # --- queries -------------------------------------------------------------
+
+    def search(self, query, kinds=KINDS, language=None, user_id=None, limit=10):
+        tokens = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+        # The word being typed (no trailing space) also matches as a prefix
+        typing = tokens[-1] if tokens and not query[-1:].isspace() else None
+        with self._lock:
+            self.queries += 1
+            total = len(self._docs)
+            if not tokens or not total:
+                return []
+            average = self._total_length / total
+            shards = [shard for shard in self._shards
+                      if shard[0] in kinds and (not language or shard[1] in (language, None))]
+            if 'plan' in kinds and user_id:
+                shards.append(('plan', user_id))
+            scores = {}
+            matched = {}
+            for token in tokens:
+                best = {}
+                for term, weight in self._expand(token, token == typing).items():
+                    df = self._df[term]
+                    idf = weight * math.log(1 + (total - df + 0.5) / (df + 0.5))
+                    for shard in shards:
+                        for key, impact in islice(self._ranked_postings(shard, term, average), MAX_SCAN):
+                            score = idf * impact
+                            if score > best.get(key, 0.0):
+                                best[key] = score
+                for key, score in best.items():
+                    scores[key] = scores.get(key, 0.0) + score
+                    matched[key] = matched.get(key, 0) + 1
+            top = heapq.nlargest(limit, scores, key=lambda key: (matched[key], scores[key]))
+            return [dict(self._docs[key][0], score=round(scores[key], 4)) for key in top]
+
+    def _ranked_postings(self, shard, term, average):
+        ranked = self._ranked.get((shard, term))
+        if ranked is None:
+            postings = self._postings.get((shard, term))
+            if not postings:
+                return ()
+            docs = self._docs
+            ranked = sorted(((key, tf * (K1 + 1) / (tf + K1 * (1 - B + B * docs[key][1] / average)))
+                             for key, tf in postings.items()), key=lambda item: item[1], reverse=True)
+            self._ranked[(shard, term)] = ranked
+        return ranked
+
+    def _expand(self, token, prefix):
+        """Index terms a query word matches, with their weights."""
+        terms = {}
+        if token in self._df:
+            terms[token] = 1.0
+        if prefix and len(token) >= MIN_PREFIX:
+            i = bisect.bisect_right(self._terms, token)
+            while i < len(self._terms) and len(terms) < PREFIX_EXPANSIONS and self._terms[i].startswith(token):
+                terms.setdefault(self._terms[i], PREFIX_WEIGHT)
+                i += 1
+        if not terms and len(token) >= FUZZY_MIN_LENGTH:
+            for variant in _deletions(token) | {token}:
+                for term in self._variants.get(variant, ()):
+                    if _within_one_edit(token, term):
+                        terms.setdefault(term, FUZZY_WEIGHT)
+        return terms
+
+    def stats(self):
+        with self._lock:
+            return {
+                'documents': len(self._docs),
+                'terms': len(self._df),
+                'ready': self.ready,
+                'queries': self.queries,
+                'refreshes': self.refreshes,
+                'last_refresh_seconds': self.last_refresh_seconds,
+            }
+
+
+def _walk(fetch_page):
+    """Rows of an id-ordered paged read. Only an empty page ends it: a short
+    one may just be PostgREST's max-rows cap."""
+    after_id = None
+    while True:
+        page = fetch_page(after_id)
+        if not page:
+            return
+        yield from page
+        after_id = page[-1]['id']
+
+
+def _topic_doc(row):
+    result = {'kind': 'topic', 'id': row['id'], 'title': row['topic'], 'language': row['language']}
+    return ('topic', row['id']), row['topic'], row['language'], result, ('topic', row['language'])
+
+
+def _question_doc(row, topic):
+    language = topic['language'] if topic else None
+    topic_name = topic['topic'] if topic else None
+    result = {'kind': 'question', 'id': row['id'], 'title': row.get('question') or '',
+              'topic': topic_name, 'language': language}
+    body = ' '.join(filter(None, [row.get('explanation'), topic_name]))
+    return ('question', row['id']), row.get('question') or '', body, result, ('question', language)
+
+
+def _plan_doc(row):
+    tags = _tags(row.get('tags'))
+    title = row.get('title') or row.get('goal') or ''
+    result = {'kind': 'plan', 'id': row['id'], 'title': title, 'goal': row.get('goal'), 'tags': tags}
+    body = ' '.join(filter(None, [row.get('goal') if row.get('title') else None] + tags))
+    return ('plan', row['id']), title, body, result, ('plan', row.get('user_id'))
+
+
+search_index = SearchIndex(repository,
+                           plan_refresh_interval=float(os.getenv("SEARCH_PLAN_REFRESH_SECONDS", "300")))
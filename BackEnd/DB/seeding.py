@@ -0,0 +1,247 @@
+import argparse
+import hashlib
+import json
+import os
+from DB.repository import repository as default_repository
+
+# Shared seeding pipeline for the content tables, used by the insert_*.py
+# scripts and runnable on its own:
+#
+#   python -m DB.seeding questions seed_data/python_advanced_modules_questions.json --dry-run
+#   python -m DB.seeding games seed_data/code_games.json
+#
+# Seed files are plain JSON lists of row objects (seed_data/), read as data
+# and never executed.
+#
+# Every row gets a content_hash of the fields that identify it (see
+# DB/schema.sql for the unique indexes). A run
+#   1. validates all rows in memory,
+#   2. resolves every (language, topic) pair with one topics query,
+#   3. looks up which hashes already exist, in batches,
+#   4. writes only the new rows as batched upserts on content_hash,
+# so re-running the same file is a no-op. --dry-run stops after step 3 and
+# prints the diff. Rows inserted before content_hash existed can be hashed
+# once with --backfill.
+#
+# Rows go to the configured data backend (DB/repository.py, DATA_BACKEND).
+
+SEED_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'seed_data')
+DEFAULT_BATCH_SIZE = 500
+DIFF_PREVIEW = 10
+
+
+def content_hash(*fields):
+    canonical = json.dumps([str(f).strip() if f is not None else None for f in fields], ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def topic_hash(row):
+    return content_hash('topic', row['language'], row['topic'])
+
+
+def question_hash(row):
+    return content_hash('question', row['language'], row['topic'], row['question'])
+
+
+def game_hash(row):
+    return content_hash('game', row['language'], row['topic'], row['difficulty'], row['type'],
+                        row['prompt'], row.get('code_snippet'))
+
+
+def _batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# --- validation ------------------------------------------------------------
+
+def validate_topic(row):
+    errors = [f"missing {f}" for f in ('language', 'topic') if not row.get(f)]
+    if not isinstance(row.get('topic_order'), int):
+        errors.append("topic_order must be an integer")
+    return errors
+
+
+def validate_question(row):
+    errors = [f"missing {f}" for f in ('language', 'topic', 'question', 'answer') if not row.get(f)]
+    options = row.get('options')
+    if not isinstance(options, list) or len(options) < 2:
+        errors.append("options must be a list of at least 2 choices")
+    elif row.get('answer') not in options:
+        errors.append("answer is not one of the options")
+    return errors
+
+
+def validate_game(row):
+    return [f"missing {f}" for f in ('language', 'topic', 'difficulty', 'type', 'prompt', 'answer') if not row.get(f)]
+
+
+def _validate(rows, validator, label):
+    valid = []
+    for i, row in enumerate(rows):
+        errors = validator(row)
+        if errors:
+            print(f"[{label}] skipping row {i}: {', '.join(errors)}")
+        else:
+            valid.append(row)
+    return valid
+
+
+# --- pipeline --------------------------------------------------------------
+
+def resolve_topic_ids(repository, pairs):
+    """Map (language, topic) -> topic id with a single query."""
+    return repository.topic_ids(sorted({language for language, _ in pairs}))
+
+
+def _write(repository, table, rows, label, dry_run, batch_size, describe):
+    """Diff rows (each carrying content_hash) against the table and upsert
+    the new ones. Returns the number of rows written."""
+    # Drop duplicates inside the input itself
+    unique = list({row['content_hash']: row for row in rows}.values())
+    if len(unique) < len(rows):
+        print(f"[{label}] {len(rows) - len(unique)} duplicate rows in the input ignored")
+    present = repository.existing_hashes(table, [row['content_hash'] for row in unique])
+    new_rows = [row for row in unique if row['content_hash'] not in present]
+    print(f"[{label}] {len(unique)} rows: {len(new_rows)} new, {len(unique) - len(new_rows)} already present")
+
+    if dry_run:
+        for row in new_rows[:DIFF_PREVIEW]:
+            print(f"  + {describe(row)}")
+        if len(new_rows) > DIFF_PREVIEW:
+            print(f"  ... and {len(new_rows) - DIFF_PREVIEW} more")
+        return 0
+
+    written = 0
+    batches = (len(new_rows) + batch_size - 1) // batch_size
+    for number, batch in enumerate(_batches(new_rows, batch_size), start=1):
+        repository.insert_content(table, batch)
+        written += len(batch)
+        print(f"[{label}] batch {number}/{batches}: {written}/{len(new_rows)} rows written")
+    return written
+
+
+def seed_topics(repository, topics, dry_run=False, batch_size=DEFAULT_BATCH_SIZE):
+    valid = _validate(topics, validate_topic, 'topics')
+    rows = [{
+        'language': t['language'],
+        'topic': t['topic'],
+        'topic_order': t['topic_order'],
+        'content_hash': topic_hash(t),
+    } for t in valid]
+    written = _write(repository, 'topics', rows, 'topics', dry_run, batch_size,
+                     lambda r: f"{r['language']} | {r['topic_order']}. {r['topic']}")
+    if written:
+        repository.bump_content_version()
+    return written
+
+
+def seed_quiz_questions(repository, questions, dry_run=False, batch_size=DEFAULT_BATCH_SIZE, dedup=False):
+    valid = _validate(questions, validate_question, 'quiz_questions')
+    if dedup:
+        # Keep the first question of every near-duplicate cluster (DB/dedup.py)
+        from DB.dedup import drop_near_duplicates
+        valid, clusters = drop_near_duplicates(valid)
+        if clusters:
+            print(f"[quiz_questions] {sum(len(c) - 1 for c in clusters)} near-duplicate questions dropped")
+    topic_ids = resolve_topic_ids(repository, {(q['language'], q['topic']) for q in valid})
+    missing = sorted({(q['language'], q['topic']) for q in valid} - set(topic_ids))
+    if missing:
+        print("The following (language, topic) pairs are missing in the topics table:")
+        for language, topic in missing:
+            print(f"  - {language} | {topic}")
+        print("Questions for these pairs are skipped. Seed the topics first.")
+    rows = [{
+        'topic_id': topic_ids[(q['language'], q['topic'])],
+        'question': q['question'],
+        'options': json.dumps(q['options']),
+        'answer': q['answer'],
+        'explanation': q.get('explanation', ''),
+        'content_hash': question_hash(q),
+    } for q in valid if (q['language'], q['topic']) in topic_ids]
+    written = _write(repository, 'quiz_questions', rows, 'quiz_questions', dry_run, batch_size,
+                     lambda r: r['question'])
+    if written:
+        repository.bump_content_version()
+    return written
+
+
+def seed_code_games(repository, games, dry_run=False, batch_size=DEFAULT_BATCH_SIZE):
+    valid = _validate(games, validate_game, 'code_games')
+    rows = [dict(g, content_hash=game_hash(g)) for g in valid]
+    written = _write(repository, 'code_games', rows, 'code_games', dry_run, batch_size,
+                     lambda r: f"{r['language']} | {r['topic']} | {r['difficulty']} | {r['prompt']}")
+    if written:
+        repository.bump_content_version()
+    return written
+
+
+def backfill_hashes(repository, kind, batch_size=DEFAULT_BATCH_SIZE):
+    """Set content_hash on rows inserted before the pipeline existed, so the
+    next run recognises them instead of inserting them again."""
+    table = {'topics': 'topics', 'questions': 'quiz_questions', 'games': 'code_games'}[kind]
+    rows = repository.rows_without_hash(table)
+    if kind == 'questions':
+        topics = repository.all_topics()
+        pair_by_id = {t['id']: (t['language'], t['topic']) for t in topics}
+        rows = [r for r in rows if r.get('topic_id') in pair_by_id]
+        for r in rows:
+            language, topic = pair_by_id[r['topic_id']]
+            r['content_hash'] = question_hash(dict(r, language=language, topic=topic))
+    else:
+        hasher = topic_hash if kind == 'topics' else game_hash
+        for r in rows:
+            r['content_hash'] = hasher(r)
+    for batch in _batches(rows, batch_size):
+        repository.set_hashes(table, batch)
+    print(f"[{table}] content_hash set on {len(rows)} rows")
+    return len(rows)
+
+
+# --- command line ----------------------------------------------------------
+
+SEEDERS = {
+    'topics': seed_topics,
+    'questions': seed_quiz_questions,
+    'games': seed_code_games,
+}
+
+
+def load_rows(path):
+    """Rows from a JSON file holding a list of objects. Raises ValueError for
+    anything else."""
+    if not path.endswith('.json'):
+        raise ValueError(f"{path}: seed files are .json lists of rows")
+    with open(path, encoding='utf-8') as f:
+        rows = json.load(f)
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError(f"{path}: expected a JSON list of objects")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed topics, quiz questions or code games")
+    parser.add_argument('kind', choices=sorted(SEEDERS))
+    parser.add_argument('path', nargs='?', help=".json list of rows (see seed_data/)")
+    parser.add_argument('--dry-run', action='store_true', help="only print what would be inserted")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--backfill', action='store_true', help="hash rows that were inserted without content_hash")
+    parser.add_argument('--dedup', action='store_true', help="questions only: drop near-duplicate questions")
+    args = parser.parse_args()
+    if not args.backfill and not args.path:
+        parser.error("path is required unless --backfill is given")
+
+    if args.backfill:
+        backfill_hashes(default_repository, args.kind, args.batch_size)
+        return
+    try:
+        rows = load_rows(args.path)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    seed = SEEDERS[args.kind]
+    options = {'dedup': True} if args.dedup and args.kind == 'questions' else {}
+    seed(default_repository, rows, dry_run=args.dry_run, batch_size=args.batch_size, **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+import json
+import sqlite3
+import threading
+import time
+from metrics import db_duration
+from DB.repository import CONTENT_VERSION_ROW_ID, QUIZ_QUESTION_COLUMNS, CODE_GAME_INDEX_COLUMNS, REVIEW_STATE_COLUMNS
+
+# Local SQLite backend of the data-access layer (DB/repository.py), selected
+# with DATA_BACKEND=sqlite and SQLITE_PATH.
+#
+# Same tables and row shapes as the Supabase project, with the indexes the
+# backend's queries need:
+#   topics (language, topic_order)                 /api/topics, curriculum
+#   quiz_questions (topic_id)                      /api/quiz-questions
+#   code_games (language, topic, difficulty)       filtered lookups; with the
+#                                                  integer rowid it also
+#                                                  covers code_game_index()
+# Each thread keeps its own connection; WAL mode lets readers run while a
+# write commits, and busy_timeout queues concurrent writers.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY,
+    language TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    topic_order INTEGER,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS topics_language_order_idx ON topics (language, topic_order);
+CREATE INDEX IF NOT EXISTS topics_language_topic_idx ON topics (language, topic);
+CREATE UNIQUE INDEX IF NOT EXISTS topics_content_hash_idx ON topics (content_hash);
+
+CREATE TABLE IF NOT EXISTS quiz_questions (
+    id INTEGER PRIMARY KEY,
+    topic_id INTEGER,
+    question TEXT,
+    options TEXT,
+    answer TEXT,
+    explanation TEXT,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS quiz_questions_topic_id_idx ON quiz_questions (topic_id);
+CREATE UNIQUE INDEX IF NOT EXISTS quiz_questions_content_hash_idx ON quiz_questions (content_hash);
+
+CREATE TABLE IF NOT EXISTS code_games (
+    id INTEGER PRIMARY KEY,
+    language TEXT,
+    topic TEXT,
+    difficulty TEXT,
+    type TEXT,
+    prompt TEXT,
+    code_snippet TEXT,
+    answer TEXT,
+    explanation TEXT,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS code_games_language_topic_difficulty_idx ON code_games (language, topic, difficulty);
+CREATE UNIQUE INDEX IF NOT EXISTS code_games_content_hash_idx ON code_games (content_hash);
+
+CREATE TABLE IF NOT EXISTS content_version (
+    id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO content_version (id, version) VALUES (1, 0);
+
+CREATE TABLE IF NOT EXISTS study_plan (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT,
+    title TEXT,
+    goal TEXT,
+    tags TEXT,
+    days INTEGER,
+    start_date TEXT,
+    created_at TEXT,
+    plan TEXT,
+    structure TEXT,
+    progress TEXT,
+    progress_bits TEXT,
+    progress_version INTEGER NOT NULL DEFAULT 0,
+    feedback TEXT
+);
+CREATE INDEX IF NOT EXISTS study_plan_user_idx ON study_plan (user_id);
+
+CREATE TABLE IF NOT EXISTS review_state (
+    user_id TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    topic_id INTEGER NOT NULL,
+    due_day INTEGER NOT NULL,
+    interval_days INTEGER NOT NULL,
+    ease REAL NOT NULL,
+    repetitions INTEGER NOT NULL,
+    lapses INTEGER NOT NULL,
+    reviewed_at INTEGER NOT NULL,
+    PRIMARY KEY (user_id, question_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS review_state_user_topic_idx ON review_state (user_id, topic_id, reviewed_at);
+"""
+
+# jsonb columns in Supabase: stored as JSON text here, decoded on read
+JSON_COLUMNS = {'structure', 'progress', 'feedback', 'tags'}
+WRITE_BATCH = 500  # values per IN (...) list
+
+
+def _columns(spec):
+    return [c.strip() for c in spec.split(',') if c.strip()]
+
+
+def _column_list(names):
+    return ', '.join(f'"{name}"' for name in names)
+
+
+def _encode(column, value):
+    if column in JSON_COLUMNS and value is not None and not isinstance(value, str):
+        return json.dumps(value)
+    return value
+
+
+def _decode(cursor):
+    names = [d[0] for d in cursor.description]
+    rows = []
+    for values in cursor.fetchall():
+        row = dict(zip(names, values))
+        for name in JSON_COLUMNS.intersection(row):
+            if isinstance(row[name], str):
+                try:
+                    row[name] = json.loads(row[name])
+                except ValueError:
+                    pass
+        rows.append(row)
+    return rows
+
+
+class SQLiteRepository:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self.connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        plan_columns = {row[1] for row in conn.execute("PRAGMA table_info(study_plan)")}
+        if 'progress_version' not in plan_columns:  # files created before the column existed
+            conn.execute("ALTER TABLE study_plan ADD COLUMN progress_version INTEGER NOT NULL DEFAULT 0")
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _query(self, table, operation, sql, params=()):
+        started = time.perf_counter()
+        outcome = 'ok'
+        try:
+            return _decode(self.connection().execute(sql, params))
+        except sqlite3.Error:
+            outcome = 'error'
+            raise
+        finally:
+            db_duration.observe(time.perf_counter() - started, 'sqlite', table, operation, outcome)
+
+    def _write(self, table, operation, sql, rows):
+        """Run one statement per parameter row in a single transaction."""
+        started = time.perf_counter()
+        outcome = 'ok'
+        conn = self.connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(sql, rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            outcome = 'error'
+            raise
+        finally:
+            db_duration.observe(time.perf_counter() - started, 'sqlite', table, operation, outcome)
+
+    # --- content -------------------------------------------------------------
+
+    def topics_for_language(self, language):
+        return self._query('topics', 'topics_for_language',
+                           'SELECT topic, topic_order FROM topics WHERE language = ? ORDER BY topic_order',
+                           (language,))
+
+    def all_topics(self):
+        return self._query('topics', 'all_topics',
+                           'SELECT id, language, topic, topic_order FROM topics ORDER BY topic_order')
+
+    def topic_ids(self, languages):
+        languages = list(languages)
+        if not languages:
+            return {}
+        rows = self._query('topics', 'topic_ids',
+                           f'SELECT id, language, topic FROM topics WHERE language IN ({",".join("?" * len(languages))})',
+                           languages)
+        return {(row['language'], row['topic']): row['id'] for row in rows}
+
+    def quiz_questions(self, topic_ids=None):
+        sql = f'SELECT {QUIZ_QUESTION_COLUMNS} FROM quiz_questions'
+        if topic_ids is None:
+            return self._query('quiz_questions', 'quiz_questions', sql)
+        topic_ids = list(topic_ids)
+        if not topic_ids:
+            return []
+        return self._query('quiz_questions', 'quiz_questions',
+                           f'{sql} WHERE topic_id IN ({",".join("?" * len(topic_ids))})', topic_ids)
+
+    def quiz_questions_page(self, topic_ids, columns, after_id=None, limit=500):
+        where, params = [], []
+        if topic_ids is not None:
+            topic_ids = list(topic_ids)
+            if not topic_ids:
+                return []
+            where.append(f'topic_id IN ({",".join("?" * len(topic_ids))})')
+            params += topic_ids
+        if after_id is not None:
+            where.append('id > ?')
+            params.append(after_id)
+        sql = f'SELECT {_column_list(_columns(columns))} FROM quiz_questions'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        return self._query('quiz_questions', 'quiz_questions_page', f'{sql} ORDER BY id LIMIT ?', params + [limit])
+
+    def code_game_index(self):
+        return self._query('code_games', 'code_game_index', f'SELECT {CODE_GAME_INDEX_COLUMNS} FROM code_games')
+
+    def code_games(self, ids=None):
+        if ids is None:
+            return self._query('code_games', 'code_games', 'SELECT * FROM code_games')
+        ids = list(ids)
+        rows = []
+        for i in range(0, len(ids), WRITE_BATCH):
+            batch = ids[i:i + WRITE_BATCH]
+            rows += self._query('code_games', 'code_games',
+                                f'SELECT * FROM code_games WHERE id IN ({",".join("?" * len(batch))})', batch)
+        return rows
+
+    def content_version(self):
+        rows = self._query('content_version', 'content_version',
+                           'SELECT version FROM content_version WHERE id = ?', (CONTENT_VERSION_ROW_ID,))
+        return rows[0]['version'] if rows else 0
+
+    def bump_content_version(self):
+        version = time.time_ns() // 1_000_000
+        self._write('content_version', 'bump_content_version',
+                    'INSERT INTO content_version (id, version) VALUES (?, ?) '
+                    'ON CONFLICT (id) DO UPDATE SET version = excluded.version',
+                    [(CONTENT_VERSION_ROW_ID, version)])
+        return version
+
+    # --- seeding -------------------------------------------------------------
+
+    def existing_hashes(self, table, hashes):
+        found = set()
+        hashes = sorted(hashes)
+        for i in range(0, len(hashes), WRITE_BATCH):
+            batch = hashes[i:i + WRITE_BATCH]
+            rows = self._query(table, 'existing_hashes',
+                               f'SELECT content_hash FROM "{table}" WHERE content_hash IN ({",".join("?" * len(batch))})',
+                               batch)
+            found.update(row['content_hash'] for row in rows)
+        return found
+
+    def insert_content(self, table, rows):
+        if not rows:
+            return
+        names = list(rows[0])
+        self._write(table, 'insert_content',
+                    f'INSERT INTO "{table}" ({_column_list(names)}) VALUES ({",".join("?" * len(names))}) '
+                    'ON CONFLICT (content_hash) DO NOTHING',
+                    [[_encode(n, row.get(n)) for n in names] for row in rows])
+
+    def rows_without_hash(self, table):
+        return self._query(table, 'rows_without_hash', f'SELECT * FROM "{table}" WHERE content_hash IS NULL')
+
+    def set_hashes(self, table, rows):
+        self._write(table, 'set_hashes', f'UPDATE "{table}" SET content_hash = ? WHERE id = ?',
+                    [(row['content_hash'], row['id']) for row in rows])
+
+    # --- study plans ---------------------------------------------------------
+
+    def get_plan(self, plan_id, columns):
+        rows = self._query('study_plan', 'get_plan',
+                           f'SELECT {_column_list(_columns(columns))} FROM study_plan WHERE id = ?', (plan_id,))
+        return rows[0] if rows else None
+
+    def update_plan(self, plan_id, fields, expected_version=None):
+        names = [name for name in fields if name != 'progress_version']
+        assignments = ''.join(f'"{name}" = ?, ' for name in names)
+        sql = f'UPDATE study_plan SET {assignments}progress_version = progress_version + 1 WHERE id = ?'
+        params = [_encode(n, fields[n]) for n in names] + [plan_id]
+        if expected_version is not None:
+            sql += ' AND progress_version = ?'
+            params.append(expected_version)
+        rows = self._query('study_plan', 'update_plan', sql + ' RETURNING *', params)
+        return rows[0] if rows else None
+
+    def insert_plan(self, row):
+        names = list(row)
+        rows = self._query('study_plan', 'insert_plan',
+                           f'INSERT INTO study_plan ({_column_list(names)}) VALUES ({",".join("?" * len(names))}) '
+                           'RETURNING *', [_encode(n, row[n]) for n in names])
+        return rows[0]
+
+    def plans_page(self, columns, after_id=None, limit=1000):
+        names = _column_list(_columns(columns))
+        if after_id is None:
+            return self._query('study_plan', 'plans_page',
+                               f'SELECT {names} FROM study_plan ORDER BY id LIMIT ?', (limit,))
+        return self._query('study_plan', 'plans_page',
+                           f'SELECT {names} FROM study_plan WHERE id > ? ORDER BY id LIMIT ?', (after_id, limit))
+
+    # --- review state --------------------------------------------------------
+
+    def review_states(self, user_id, topic_id, since=None):
+        sql = f'SELECT {REVIEW_STATE_COLUMNS} FROM review_state WHERE user_id = ? AND topic_id = ?'
+        if since is None:
+            return self._query('review_state', 'review_states', sql, (user_id, topic_id))
+        return self._query('review_state', 'review_states', f'{sql} AND reviewed_at >= ?', (user_id, topic_id, since))
+
+    def save_review_states(self, rows):
+        names = _columns(REVIEW_STATE_COLUMNS)
+        updates = ', '.join(f'{name} = excluded.{name}' for name in names[2:])
+        self._write('review_state', 'save_review_states',
+                    f'INSERT INTO review_state ({_column_list(names)}) VALUES ({",".join("?" * len(names))}) '
+                    f'ON CONFLICT (user_id, question_id) DO UPDATE SET {updates}',
+                    [[row[name] for name in names] for row in rows])
+
+    def plan_texts(self, ids):
+        ids = list(ids)
+        texts = {}
+        for i in range(0, len(ids), WRITE_BATCH):
+            batch = ids[i:i + WRITE_BATCH]
+            for row in self._query('study_plan', 'plan_texts',
+                                   f'SELECT id, plan FROM study_plan WHERE id IN ({",".join("?" * len(batch))})',
+                                   batch):
+                texts[row['id']] = row['plan']
+        return texts
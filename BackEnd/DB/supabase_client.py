@@ -1,10 +1,13 @@
 import os
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from metrics import InstrumentedClient
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_KEY")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Imported by DB/repository.py when DATA_BACKEND=supabase (the default).
+# Queries made through table() are timed for /metrics
+supabase: Client = InstrumentedClient(create_client(SUPABASE_URL, SUPABASE_KEY))
@@ -0,0 +1,100 @@
+import threading
+import time
+from DB.repository import repository
+
+# In-process index of the topics table: (language, topic) -> topic id.
+# The topics table is small and only changes when insert_topics.py runs, so we
+# load it once and only go back to the database when a lookup misses.
+# Misses reload at most once per MISS_RELOAD_INTERVAL seconds so requests for
+# unknown topics cannot turn into a full table read on every call.
+MISS_RELOAD_INTERVAL = 30
+
+_lock = threading.Lock()
+_by_pair = {}
+_by_language = {}
+_loaded = False
+_loaded_at = 0.0
+
+
+def _load():
+    global _by_pair, _by_language, _loaded, _loaded_at
+    by_pair = {}
+    by_language = {}
+    for row in repository.all_topics():
+        by_pair[(row['language'], row['topic'])] = row['id']
+        by_language.setdefault(row['language'], []).append(row['id'])
+    _by_pair, _by_language, _loaded = by_pair, by_language, True
+    _loaded_at = time.monotonic()
+
+
+def refresh():
+    with _lock:
+        _load()
+
+
+def invalidate():
+    """Drop the index; the next lookup reloads it."""
+    global _loaded
+    _loaded = False
+
+
+def _reload_on_miss():
+    if time.monotonic() - _loaded_at >= MISS_RELOAD_INTERVAL:
+        refresh()
+
+
+def _ensure_loaded():
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                _load()
+
+
+def get_topic_id(language, topic):
+    """Return the topic id for (language, topic), or None if it does not exist."""
+    _ensure_loaded()
+    topic_id = _by_pair.get((language, topic))
+    if topic_id is None:
+        # The topic may have been seeded after we loaded.
+        _reload_on_miss()
+        topic_id = _by_pair.get((language, topic))
+    return topic_id
+
+
+def get_topic_ids(language):
+    """Return all topic ids for a language."""
+    _ensure_loaded()
+    ids = _by_language.get(language)
+    if ids is None:
+        _reload_on_miss()
+        ids = _by_language.get(language)
+    return list(ids or [])
+
+
+def get_topic_ids_for_topic(topic):
+    """Return the ids of every topic with this name, across languages."""
+    _ensure_loaded()
+    ids = [tid for (_, name), tid in _by_pair.items() if name == topic]
+    if not ids:
+        _reload_on_miss()
+        ids = [tid for (_, name), tid in _by_pair.items() if name == topic]
+    return ids
+
+
+def topic_ids_matching(language=None, topic=None):
+    """Ids of the topics a (language, topic) filter selects, either of
+    which may be None; None when there is no filter at all."""
+    if topic and language:
+        topic_id = get_topic_id(language, topic)
+        return [topic_id] if topic_id is not None else []
+    if topic:
+        return get_topic_ids_for_topic(topic)
+    if language:
+        return get_topic_ids(language)
+    return None
+
+
+def languages():
+    """Return every language that has topics."""
+    _ensure_loaded()
+    return list(_by_language)
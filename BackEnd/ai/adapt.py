@@ -0,0 +1,171 @@
+import re
+from datetime import date, timedelta
+from ai.planner import DAY_HEADER_RE, task_id, parse_start_date, format_plan_date, parse_days, \
+    renumber_days, join_day_blocks
+from ai.prompts import build_incremental_adapt_prompt
+
+# Incremental /adapt-plan.
+#
+# Instead of sending the whole plan and progress to the LLM, the leading run of
+# fully completed days is frozen locally. Only the incomplete tail and a short
+# summary of skipped / difficult tasks go into the prompt, and the days that
+# come back are renumbered, re-dated and appended after the frozen ones.
+
+LEGACY_KEY_RE = re.compile(r'^(\d+)-(\d+)$')
+TASK_ID_RE = re.compile(r'^d(\d+)t(\d+)$')
+ISO_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+MAX_SUMMARY_ITEMS = 30
+MAX_FEEDBACK_CHARS = 1000
+
+
+def _legacy_block_days(plan_text):
+    """Day numbers of the blocks PlanViewer.jsx builds, in its order.
+
+    The frontend keys progress as "<block index>-<task index>" and only starts
+    a block after a dashed separator line, so its block indexes do not always
+    line up with day numbers."""
+    lines = plan_text.replace('\\n', '\n').splitlines()
+    days = []
+    i = 0
+    while i < len(lines):
+        if re.match(r'^-{5,}$', lines[i]):
+            i += 1
+            while i < len(lines) and not lines[i].strip():
+                i += 1
+            header = DAY_HEADER_RE.match(lines[i]) if i < len(lines) else None
+            days.append(int(header.group(1)) if header else None)
+        else:
+            i += 1
+    return days
+
+
+def legacy_block_task_counts(plan_text):
+    """Number of tasks in each block PlanViewer.jsx builds, in its order, so
+    a "<block>-<task>" key can be checked against the plan."""
+    lines = (plan_text or '').replace('\\n', '\n').splitlines()
+    counts = []
+    i = 0
+    while i < len(lines):
+        if not re.match(r'^-{5,}$', lines[i]):
+            i += 1
+            continue
+        i += 1
+        while i < len(lines) and not lines[i].strip():
+            i += 1
+        if i < len(lines) and lines[i].startswith('📆 Day'):
+            i += 1
+        while i < len(lines) and not lines[i].strip():
+            i += 1
+        if i < len(lines) and re.match(r'^\*\*.*\*\*$', lines[i]):
+            i += 1
+        tasks = 0
+        while i < len(lines) and not re.match(r'^-{5,}$', lines[i]):
+            tasks += 1 if lines[i].strip() else 0
+            i += 1
+        counts.append(tasks)
+    return counts
+
+
+def completed_task_ids(plan_text, progress):
+    """Normalize progress keys (our "d3t2" ids or the frontend's legacy
+    "<block>-<task>" keys) to the set of completed task ids."""
+    done = set()
+    legacy_days = None
+    for key, value in (progress or {}).items():
+        if not value:
+            continue
+        if TASK_ID_RE.match(key):
+            done.add(key)
+            continue
+        legacy = LEGACY_KEY_RE.match(key)
+        if legacy:
+            if legacy_days is None:
+                legacy_days = _legacy_block_days(plan_text)
+            block, index = int(legacy.group(1)), int(legacy.group(2))
+            if block < len(legacy_days) and legacy_days[block] is not None:
+                done.add(task_id(legacy_days[block], index + 1))
+    return done
+
+
+def split_completed(days, done):
+    """Split days into the leading run of fully completed days and the rest."""
+    frozen = 0
+    for day in days:
+        if not day['tasks'] or not all(task['id'] in done for task in day['tasks']):
+            break
+        frozen += 1
+    return days[:frozen], days[frozen:]
+
+
+def summarize_progress(tail, done, feedback, today=None):
+    """Compact notes for the prompt: tasks on past days that were not done,
+    plus whatever feedback the user left (per-task labels or free text)."""
+    today = today or date.today()
+    lines = []
+    for day in tail:
+        if not ISO_DATE_RE.match(day.get('date') or '') or day['date'] >= today.isoformat():
+            continue
+        for task in day['tasks']:
+            if task['id'] not in done:
+                lines.append(f"- skipped (Day {day['day']}): {task['text']}")
+    if isinstance(feedback, dict):
+        texts = {task['id']: task['text'] for day in tail for task in day['tasks']}
+        for key, label in feedback.items():
+            if label and key in texts:
+                lines.append(f"- marked {label}: {texts[key]}")
+    if isinstance(feedback, dict):
+        # Free text kept next to per-task labels (DB/progress_buffer.py)
+        feedback = feedback.get('note')
+    summary = '\n'.join(lines[:MAX_SUMMARY_ITEMS])
+    if len(lines) > MAX_SUMMARY_ITEMS:
+        summary += f"\n- ... and {len(lines) - MAX_SUMMARY_ITEMS} more"
+    if isinstance(feedback, str) and feedback.strip():
+        summary += f"\nUser feedback: {feedback.strip()[:MAX_FEEDBACK_CHARS]}"
+    return summary.strip() or "No skipped tasks and no feedback."
+
+
+def plan_start_date(days, start_date):
+    if start_date:
+        return parse_start_date(start_date)
+    if days and ISO_DATE_RE.match(days[0].get('date') or ''):
+        return parse_start_date(days[0]['date'])
+    return date.today()
+
+
+def merge_adapted_days(frozen, adapted_text, start):
+    """Renumber and re-date the regenerated days so they continue after the
+    frozen ones, and return (plan text, structure)."""
+    blocks, structure = renumber_days(parse_days(adapted_text), len(frozen) + 1, start)
+    frozen_structure = [{k: v for k, v in day.items() if k != 'text'} for day in frozen]
+    text = join_day_blocks([day['text'] for day in frozen] + blocks)
+    return text, {'days': frozen_structure + structure}
+
+
+def adapt_incrementally(plan_text, progress, feedback, goal, start_date, complete):
+    """Adapt only the incomplete tail of a plan. complete(prompt) returns the
+    LLM output. Returns (plan text, structure, number of frozen days), or
+    None if the plan cannot be parsed and needs a full adaptation."""
+    days = parse_days(plan_text)
+    if not days:
+        return None
+    done = completed_task_ids(plan_text, progress)
+    frozen, tail = split_completed(days, done)
+    start = plan_start_date(days, start_date)
+    if not tail:
+        # Everything is done; nothing to send to the LLM
+        structure = [{k: v for k, v in day.items() if k != 'text'} for day in days]
+        return plan_text, {'days': structure}, len(frozen)
+
+    prompt = build_incremental_adapt_prompt(
+        remaining_plan='\n\n'.join(day['text'] for day in tail),
+        summary=summarize_progress(tail, done, feedback),
+        goal=goal,
+        first_day=len(frozen) + 1,
+        last_day=len(frozen) + len(tail),
+        first_date=format_plan_date(start + timedelta(days=len(frozen))),
+    )
+    adapted = complete(prompt)
+    text, structure = merge_adapted_days(frozen, adapted, start)
+    if len(structure['days']) == len(frozen):
+        raise ValueError("LLM returned no days in the plan format")
+    return text, structure, len(frozen)
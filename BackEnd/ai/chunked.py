@@ -0,0 +1,101 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from ai.planner import parse_start_date, format_plan_date, parse_days, renumber_days, join_day_blocks
+from ai.prompts import build_outline_prompt, build_window_prompt
+from logs import log
+
+# Chunked generation for long plans.
+#
+# A 90- or 180-day plan in one completion is slow and often cut off by the
+# model's output limit. Long durations are split into windows of
+# PLAN_WINDOW_DAYS days. One short call first outlines the focus of every
+# window, then the windows are generated concurrently on a bounded pool of
+# PLAN_CHUNK_WORKERS threads, and the results are renumbered and re-dated into
+# one continuous plan. Wall-clock time follows the window size rather than the
+# total duration.
+#
+# A window must come back with exactly its number of days. A short window is
+# asked for once more (WINDOW_ATTEMPTS) and then fails the whole plan with
+# ValueError, which the routes answer with the offline fallback plan, rather
+# than silently shipping a plan with fewer days than requested.
+
+CHUNKED_PLAN_MIN_DAYS = int(os.getenv("CHUNKED_PLAN_MIN_DAYS", "45"))
+PLAN_WINDOW_DAYS = int(os.getenv("PLAN_WINDOW_DAYS", "14"))
+PLAN_CHUNK_WORKERS = int(os.getenv("PLAN_CHUNK_WORKERS", "4"))
+WINDOW_ATTEMPTS = 2
+
+OUTLINE_LINE_RE = re.compile(r'Days?\s*(\d+)\s*(?:-|–|to)\s*(\d+)\s*:\s*(.+)', re.IGNORECASE)
+
+_pool = ThreadPoolExecutor(max_workers=PLAN_CHUNK_WORKERS, thread_name_prefix="plan-window")
+
+
+def should_chunk(days):
+    return days >= CHUNKED_PLAN_MIN_DAYS
+
+
+def plan_windows(days, window_days=PLAN_WINDOW_DAYS):
+    """[(first_day, last_day), ...] covering days 1..days."""
+    return [(first, min(first + window_days - 1, days)) for first in range(1, days + 1, window_days)]
+
+
+def parse_outline(text, windows, goal):
+    by_first = {}
+    for line in (text or '').splitlines():
+        match = OUTLINE_LINE_RE.search(line)
+        if match:
+            by_first[int(match.group(1))] = match.group(3).strip()
+    return [by_first.get(first) or f"Continue working towards: {goal}" for first, _ in windows]
+
+
+def iter_chunked_plan(goal, days, start_date, complete):
+    """Generate a long plan window by window. complete(prompt) returns the LLM
+    output. Yields (blocks, structure days) for every window, in day order,
+    as soon as that window and all windows before it are done."""
+    start = parse_start_date(start_date)
+    windows = plan_windows(days)
+    focuses = parse_outline(complete(build_outline_prompt(goal, days, windows)), windows, goal)
+
+    def generate(index):
+        first, last = windows[index]
+        prompt = build_window_prompt(
+            goal, days, first, last,
+            first_date=format_plan_date(start + timedelta(days=first - 1)),
+            focus=focuses[index],
+            previous_focus=focuses[index - 1] if index > 0 else None,
+            next_focus=focuses[index + 1] if index + 1 < len(windows) else None,
+        )
+        # Keep at most one block per day of the window; renumbering below
+        # makes the days continuous even if the model numbered them oddly.
+        expected = last - first + 1
+        for attempt in range(1, WINDOW_ATTEMPTS + 1):
+            window_days = parse_days(complete(prompt))[:expected]
+            if len(window_days) == expected:
+                return window_days
+            log.warning("plan.window_short", first=first, last=last, days=len(window_days), attempt=attempt)
+        raise ValueError(f"LLM returned {len(window_days)} of {expected} days for days {first}-{last}")
+
+    futures = [_pool.submit(generate, index) for index in range(len(windows))]
+    next_day = 1
+    try:
+        for future in futures:
+            window_days = future.result()
+            blocks, structure = renumber_days(window_days, next_day, start)
+            next_day += len(window_days)
+            yield blocks, structure
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def generate_chunked_plan(goal, days, start_date, complete):
+    """Returns (plan text, structure) for a long plan."""
+    blocks = []
+    structure = []
+    for window_blocks, window_structure in iter_chunked_plan(goal, days, start_date, complete):
+        blocks.extend(window_blocks)
+        structure.extend(window_structure)
+    if not blocks:
+        raise ValueError("LLM returned no days in the plan format")
+    return join_day_blocks(blocks), {'days': structure}
@@ -0,0 +1,447 @@
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from ai.model_router import ModelRouter
+from ai.streaming import delta_content, iter_openrouter_deltas
+from logs import log
+from metrics import llm_attempts, llm_duration, llm_hedges, llm_retries, llm_tokens, llm_ttft
+
+load_dotenv()
+
+# Single entry point for every OpenRouter call made by the backend.
+#
+# - one pooled keep-alive requests.Session shared by all routes
+# - connect/read timeouts so a hung upstream cannot pin a worker forever
+# - bounded retries with jittered exponential backoff on 429/5xx and
+#   connection errors (honouring Retry-After)
+# - a global limit on concurrent upstream calls
+# - coalescing: identical prompts that are already in flight wait for the
+#   running call instead of making their own
+# - latency, time to first token and token usage go to /metrics
+#
+# Every call is routed over the LLM_MODELS list (best first, see
+# ai/model_router.py) and streamed upstream, so the gateway knows when the
+# first token arrives. If none has arrived after LLM_HEDGE_AFTER_SECONDS the
+# next model is started alongside (a hedge), and a model that fails is
+# replaced by the next one right away. stream() commits to the first model
+# that produces a token, complete() to the first that finishes; the other
+# attempts are closed. If no model produced a token within
+# LLM_LATENCY_BUDGET_SECONDS the call fails with 504.
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+DEFAULT_MODEL = "mistralai/mistral-small-3.1-24b-instruct:free"
+DEFAULT_MODELS = (DEFAULT_MODEL, "meta-llama/llama-3.3-70b-instruct:free")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """An upstream call failed. status_code is what the route should return."""
+
+    def __init__(self, message, status_code=502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_END = object()
+
+
+def _parse_chunk(line):
+    """The JSON of a "data:" line, or None for anything else."""
+    if not line or not line.startswith("data:"):
+        return None
+    data = line[len("data:"):].strip()
+    if not data or data == "[DONE]":
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+class _Attempt:
+    """One streaming call to one model. A background thread reads the
+    response into a queue and reports 'first', 'done' or 'error' to the
+    race's notices. The concurrency slot is held until the thread ends or
+    the attempt is closed, whichever comes first; a closed attempt stops
+    retrying and backing off at the next check."""
+
+    def __init__(self, gateway, model, prompt, mode, notices):
+        self.gateway = gateway
+        self.model = model
+        self.prompt = prompt
+        self.mode = mode
+        self.notices = notices
+        self.lines = queue.Queue()
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.error = None
+        self.finished = False
+        self.closed = False
+        self.cancelled = threading.Event()
+        self._response = None
+        self._holds_slot = True
+        self._lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._run, name=f"llm-{self.model}", daemon=True).start()
+
+    def _run(self):
+        try:
+            response = self.gateway._post(self.gateway._payload(self.prompt, self.model, stream=True),
+                                          stream=True, mode=self.mode, cancel=self.cancelled)
+            with self._lock:
+                if self.closed:
+                    response.close()
+                    return
+                self._response = response
+            for line in response.iter_lines(decode_unicode=True):
+                chunk = _parse_chunk(line)
+                if isinstance(chunk, dict):
+                    if self.first_token is None and delta_content(chunk):
+                        self.first_token = time.perf_counter() - self.started
+                        llm_ttft.observe(self.first_token, self.model)
+                        self.gateway.router.record_first_token(self.model, self.first_token)
+                        self.notices.put(("first", self))
+                    if isinstance(chunk.get("usage"), dict):
+                        record_usage(chunk["usage"])
+                self.lines.put(line)
+                if line.strip() == "data: [DONE]":
+                    break
+            self.finished = True
+            self.notices.put(("done", self))
+        except Exception as e:
+            if not self.closed:
+                self.error = e if isinstance(e, LLMError) else LLMError(f"LLM stream failed: {e}", 502)
+                self.notices.put(("error", self))
+        finally:
+            self.lines.put(_END)
+            self._release_slot()
+
+    def _release_slot(self):
+        with self._lock:
+            holds, self._holds_slot = self._holds_slot, False
+        if holds:
+            self.gateway._slots.release()
+
+    def iter_lines(self, decode_unicode=False):
+        while True:
+            line = self.lines.get()
+            if line is _END:
+                break
+            yield line if decode_unicode else line.encode("utf-8")
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            response = self._response
+        self.cancelled.set()
+        if response is not None:
+            response.close()
+        self._release_slot()
+
+
+class LLMGateway:
+    def __init__(self, api_key, url=OPENROUTER_URL, models=DEFAULT_MODELS,
+                 connect_timeout=5.0, read_timeout=120.0, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, max_concurrency=8,
+                 queue_timeout=30.0, hedge_after=4.0, latency_budget=20.0):
+        self.api_key = api_key
+        self.url = url
+        self.router = ModelRouter(models, prior_latency=hedge_after)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.queue_timeout = queue_timeout
+        self.hedge_after = hedge_after
+        self.latency_budget = latency_budget
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Counters are bumped from request threads and attempt threads alike
+        self._counts_lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.hedges = 0
+        self.failovers = 0
+        self.over_budget = 0
+
+    def _headers(self):
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _payload(self, prompt, model, stream=False):
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def _count(self, name):
+        with self._counts_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _backoff(self, attempt, response=None, cancel=None):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                delay = min(self.backoff_max, float(retry_after))
+        # Full jitter so a burst of retries does not hit the upstream in step
+        delay = random.uniform(0, delay)
+        if cancel is None:
+            time.sleep(delay)
+        else:
+            cancel.wait(delay)
+
+    def _acquire(self, timeout=None):
+        if not self._slots.acquire(timeout=self.queue_timeout if timeout is None else timeout):
+            raise LLMError("Too many concurrent LLM requests", 503)
+
+    def _post(self, payload, stream=False, mode=None, cancel=None):
+        """POST with retries. Returns a 200 response or raises LLMError.
+        Setting the cancel event stops the retries (and any backoff)."""
+        last_error = None
+        model = payload["model"]
+        mode = mode or ("stream" if stream else "complete")
+        for attempt in range(self.max_retries + 1):
+            if cancel is not None and cancel.is_set():
+                raise LLMError("LLM request cancelled", 499)
+            if attempt:
+                self._count("retries")
+                llm_retries.inc(str(last_error.status_code))
+            self._count("calls")
+            started = time.perf_counter()
+            try:
+                response = self.session.post(self.url, json=payload, headers=self._headers(),
+                                             timeout=self.timeout, stream=stream)
+            except requests.Timeout:
+                llm_duration.observe(time.perf_counter() - started, model, mode, "timeout")
+                last_error = LLMError("LLM request timed out", 504)
+            except requests.ConnectionError as e:
+                llm_duration.observe(time.perf_counter() - started, model, mode, "connection_error")
+                last_error = LLMError(f"LLM connection failed: {e}", 502)
+            else:
+                llm_duration.observe(time.perf_counter() - started, model, mode, str(response.status_code))
+                if response.status_code == 200:
+                    return response
+                last_error = LLMError(f"LLM returned {response.status_code}", response.status_code)
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    response.close()
+                    break
+                response.close()
+                self._backoff(attempt, response, cancel)
+                continue
+            if attempt < self.max_retries:
+                self._backoff(attempt, cancel=cancel)
+        raise last_error
+
+    def _race(self, prompt, models, mode, until, budget):
+        """Run prompt over models (best first) until one attempt reports
+        `until` ('first' token or 'done'). Returns that attempt; the others
+        are closed."""
+        notices = queue.Queue()
+        pending = list(models)
+        attempts = []
+        started = time.monotonic()
+        deadline = started + budget
+
+        def launch(reason, timeout):
+            # Hedges only use a free slot; the primary and failovers wait
+            self._acquire(timeout)
+            attempt = _Attempt(self, pending.pop(0), prompt, mode, notices)
+            attempts.append(attempt)
+            attempt.start()
+            if reason:
+                llm_hedges.inc(reason)
+                self._count("hedges" if reason == "slow" else "failovers")
+
+        def finish(winner):
+            for attempt in attempts:
+                if attempt is winner or attempt.error is not None:
+                    continue
+                attempt.close()
+                llm_attempts.inc(attempt.model, "cancelled")
+                self.router.record_cancelled(attempt.model, time.perf_counter() - attempt.started,
+                                             attempt.first_token is not None)
+            if winner is not None:
+                llm_attempts.inc(winner.model, "won")
+                if until == "done":
+                    self.router.record_success(winner.model)
+            return winner
+
+        launch(None, None)
+        next_hedge = started + self.hedge_after
+        while True:
+            have_first = any(a.first_token is not None for a in attempts)
+            now = time.monotonic()
+            timeout = None
+            if not have_first:
+                timeout = deadline - now
+                if pending:
+                    timeout = min(timeout, next_hedge - now)
+            try:
+                kind, attempt = notices.get(timeout=max(0.0, timeout) if timeout is not None else None)
+            except queue.Empty:
+                now = time.monotonic()
+                if now >= deadline:
+                    finish(None)
+                    self._count("failures")
+                    self._count("over_budget")
+                    raise LLMError(f"No model answered within {budget:g}s", 504)
+                if pending:
+                    try:
+                        launch("slow", 0)
+                    except LLMError:
+                        pass  # no free slot, try again at the next tick
+                    next_hedge = now + self.hedge_after
+                continue
+            if kind == "error":
+                llm_attempts.inc(attempt.model, "error")
+                self.router.record_error(attempt.model)
+                log.warning("llm.attempt_failed", model=attempt.model, error=attempt.error)
+                live = [a for a in attempts if a.error is None]
+                if pending and not any(a.first_token is not None for a in live):
+                    try:
+                        launch("error", max(0.0, deadline - time.monotonic()))
+                    except LLMError:
+                        if not live:
+                            self._count("failures")
+                            raise
+                    next_hedge = time.monotonic() + self.hedge_after
+                elif not live:
+                    self._count("failures")
+                    raise attempt.error
+                continue
+            # A stream that finishes without a content token is an empty answer
+            if kind == until or kind == "done":
+                return finish(attempt)
+
+    def _models(self, model):
+        return [model] if model else self.router.order()
+
+    def complete(self, prompt, model=None, budget=None):
+        """Return the completion text for prompt. model pins one model;
+        otherwise the request is hedged over the configured models."""
+        key = hashlib.sha256(f"{model or '*'}\0{prompt}".encode("utf-8")).hexdigest()
+        with self._inflight_lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+        if not leader:
+            self._count("coalesced")
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            winner = self._race(prompt, self._models(model), "complete", "done", budget or self.latency_budget)
+            call.result = "".join(iter_openrouter_deltas(winner))
+            return call.result
+        except LLMError as e:
+            call.error = e
+            raise
+        except RuntimeError as e:
+            call.error = LLMError(f"Invalid LLM response: {e}", 502)
+            raise call.error
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            call.done.set()
+
+    def stream(self, prompt, model=None, budget=None):
+        """Start a streaming completion. Returns an object with
+        iter_lines()/close() for the first model that produced a token; its
+        concurrency slot is released when it is closed or read to the end."""
+        winner = self._race(prompt, self._models(model), "stream", "first", budget or self.latency_budget)
+        return _HedgedStream(winner, self.router)
+
+    def stats(self):
+        with self._counts_lock:
+            counts = {
+                "calls": self.calls,
+                "retries": self.retries,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+                "hedges": self.hedges,
+                "failovers": self.failovers,
+                "over_budget": self.over_budget,
+            }
+        return {
+            **counts,
+            "in_flight": len(self._inflight),
+            "models": self.router.stats(),
+        }
+
+
+def record_usage(usage):
+    if usage:
+        llm_tokens.inc("prompt", amount=usage.get("prompt_tokens") or 0)
+        llm_tokens.inc("completion", amount=usage.get("completion_tokens") or 0)
+
+
+class _HedgedStream:
+    # The winning attempt of stream(). Its model is credited once the stream
+    # has been read to the end; a client that leaves early counts for nothing.
+    def __init__(self, attempt, router):
+        self._attempt = attempt
+        self._router = router
+        self._recorded = False
+
+    def iter_lines(self, decode_unicode=False):
+        return self._attempt.iter_lines(decode_unicode=decode_unicode)
+
+    def close(self):
+        self._attempt.close()
+        if not self._recorded:
+            self._recorded = True
+            if self._attempt.error is not None:
+                self._router.record_error(self._attempt.model)
+            elif self._attempt.finished:
+                self._router.record_success(self._attempt.model)
+
+
+def _models_from_env():
+    models = [m.strip() for m in os.getenv("LLM_MODELS", "").split(",") if m.strip()]
+    return models or DEFAULT_MODELS
+
+
+gateway = LLMGateway(
+    api_key=os.getenv("OPENROUTER_API_KEY"),
+    models=_models_from_env(),
+    connect_timeout=float(os.getenv("LLM_CONNECT_TIMEOUT", "5")),
+    read_timeout=float(os.getenv("LLM_READ_TIMEOUT", "120")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    hedge_after=float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "4")),
+    latency_budget=float(os.getenv("LLM_LATENCY_BUDGET_SECONDS", "20")),
+)
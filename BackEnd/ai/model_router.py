@@ -0,0 +1,80 @@
+import threading
+
+# Per-model latency and success tracking for the LLM gateway
+# (ai/llm_gateway.py), which asks order() which model to try first and which
+# one to hedge with.
+#
+# Each model keeps an exponentially weighted moving average of its time to
+# first token and of its success rate (1 for a completed answer, 0 for an
+# error). Models are ranked by expected latency / success rate, so a model
+# that is slow or failing drops behind the next one after a few requests and
+# comes back once its numbers recover (it keeps getting traffic as the hedge).
+# A model with no samples yet is assumed to answer right at the hedge
+# threshold; ties keep the configured order (LLM_MODELS).
+
+EWMA_ALPHA = 0.2
+MIN_SUCCESS_RATE = 0.05
+
+
+class ModelRouter:
+    def __init__(self, models, prior_latency):
+        self.models = list(models)
+        self.prior_latency = prior_latency
+        self._lock = threading.Lock()
+        self._stats = {model: {'latency': None, 'success_rate': 1.0, 'requests': 0, 'wins': 0,
+                               'errors': 0, 'cancelled': 0} for model in self.models}
+
+    def order(self):
+        """The configured models, best first."""
+        with self._lock:
+            return sorted(self.models, key=lambda model: (self._score(model), self.models.index(model)))
+
+    def _score(self, model):
+        stats = self._stats[model]
+        latency = stats['latency'] if stats['latency'] is not None else self.prior_latency
+        return latency / max(stats['success_rate'], MIN_SUCCESS_RATE)
+
+    def _observe_latency(self, stats, seconds):
+        previous = stats['latency']
+        stats['latency'] = seconds if previous is None else previous + EWMA_ALPHA * (seconds - previous)
+
+    def _observe_outcome(self, stats, ok):
+        stats['success_rate'] += EWMA_ALPHA * ((1.0 if ok else 0.0) - stats['success_rate'])
+
+    def record_first_token(self, model, seconds):
+        with self._lock:
+            self._observe_latency(self._stats[model], seconds)
+
+    def record_success(self, model, won=True):
+        with self._lock:
+            stats = self._stats[model]
+            stats['requests'] += 1
+            stats['wins'] += 1 if won else 0
+            self._observe_outcome(stats, True)
+
+    def record_error(self, model):
+        with self._lock:
+            stats = self._stats[model]
+            stats['requests'] += 1
+            stats['errors'] += 1
+            self._observe_outcome(stats, False)
+
+    def record_cancelled(self, model, waited, had_first_token):
+        """A losing attempt was cancelled after `waited` seconds. Without a
+        first token by then, its time to first token was at least that long,
+        so the wait can only raise the estimate, never lower it."""
+        with self._lock:
+            stats = self._stats[model]
+            stats['requests'] += 1
+            stats['cancelled'] += 1
+            if not had_first_token:
+                current = stats['latency'] if stats['latency'] is not None else self.prior_latency
+                if waited > current:
+                    self._observe_latency(stats, waited)
+
+    def stats(self):
+        with self._lock:
+            return {model: dict(stats, score=round(self._score(model), 3),
+                                latency=round(stats['latency'], 3) if stats['latency'] is not None else None,
+                                success_rate=round(stats['success_rate'], 3))
+                    for model, stats in self._stats.items()}
@@ -0,0 +1,104 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from ai.planner import DAY_LINE_RE, to_relative_plan, rebase_plan_dates
+from logs import log
+
+# Cache of generated plans keyed on the normalized (goal, duration) pair.
+#
+# Plans are stored date-relative (the date on every "📆 Day N" line replaced
+# by a placeholder), so a cached plan can be re-dated to any startDate without
+# another LLM call. The cache is an LRU bounded by PLAN_CACHE_MAX_ENTRIES and,
+# if PLAN_CACHE_PATH is set, persisted to that JSON file so it survives
+# restarts.
+
+
+def normalize_goal(goal):
+    goal = re.sub(r'\s+', ' ', str(goal or '').strip().lower())
+    return goal.strip(' .!?')
+
+
+class PlanCache:
+    def __init__(self, max_entries=256, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            self._load()
+
+    @staticmethod
+    def key(goal, duration):
+        return f"{int(duration)}|{normalize_goal(goal)}"
+
+    def get(self, goal, duration, start_date):
+        """Return the cached plan re-dated to start_date, or None."""
+        key = self.key(goal, duration)
+        with self._lock:
+            template = self._entries.get(key)
+            if template is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return rebase_plan_dates(template, start_date)
+
+    def put(self, goal, duration, plan_text):
+        # Only cache output that came back in the expected day format
+        if not plan_text or not DAY_LINE_RE.search(plan_text):
+            return
+        key = self.key(goal, duration)
+        with self._lock:
+            self._entries[key] = to_relative_plan(plan_text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            if self.path:
+                self._save()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'persistent': bool(self.path),
+            }
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log.warning("plan_cache.load_failed", error=e)
+            return
+        for key, template in entries[-self.max_entries:]:
+            self._entries[key] = template
+
+    def _save(self):
+        # Write to a temp file and rename so a crash never leaves half a file
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(list(self._entries.items()), f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            log.warning("plan_cache.save_failed", error=e)
+
+
+plan_cache = PlanCache(
+    max_entries=int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "256")),
+    path=os.getenv("PLAN_CACHE_PATH") or None,
+)
@@ -1,10 +1,322 @@
 # D:\study-coach\backend\ai\planner.py
+import re
+from datetime import date, datetime, timedelta
 
-def generate_study_plan(goal, days, user_id):
-    return f"""Study Plan for: {goal}
+# "📆 Day N: <date>" header lines in the plain-text plan format
+DAY_LINE_RE = re.compile(r'^(📆 Day (\d+))(?::[^\n]*)?$', re.MULTILINE)
+DAY_HEADER_RE = re.compile(r'^\s*📆\s*Day\s+(\d+)\s*[:\-–—]?\s*(.*?)\s*$')
+SEPARATOR_RE = re.compile(r'^\s*-{5,}\s*$')
+TITLE_RE = re.compile(r'^\s*\*\*(.+?)\*\*\s*$')
+BULLET_RE = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+RELATIVE_DATE = '{date}'
+DAY_SEPARATOR = '-' * 90
+DATE_FORMATS = ("%B %d %Y", "%b %d %Y", "%B %d, %Y", "%b %d, %Y", "%d %B %Y", "%Y-%m-%d")
 
-Day 1: Introduction to {goal}
-Day 2: Continue {goal}
-...
-Day {days}: Final review and assessment
-"""
+
+REVIEW_EVERY = 7
+GENERIC_PHASES = ("Fundamentals", "Core Concepts", "Hands-on Practice", "Advanced Topics", "Projects")
+LANGUAGE_ALIASES = {"js": "JavaScript", "postgres": "SQL", "mysql": "SQL"}
+
+
+def detect_language(goal, languages):
+    """Return the curriculum language mentioned in the goal, if any."""
+    text = str(goal or '').lower()
+    for language in sorted(languages, key=len, reverse=True):
+        if re.search(rf'(?<![\w+#]){re.escape(language.lower())}(?![\w+#])', text):
+            return language
+    for alias, language in LANGUAGE_ALIASES.items():
+        if language in languages and re.search(rf'\b{alias}\b', text):
+            return language
+    return None
+
+
+def _day_kinds(days):
+    """'review' every REVIEW_EVERY-th day and on the last day, 'study' otherwise."""
+    kinds = []
+    for day in range(1, days + 1):
+        review = day == days and days > 1 or day % REVIEW_EVERY == 0
+        kinds.append('review' if review else 'study')
+    return kinds
+
+
+def _study_day_topics(topics, study_days):
+    """Spread the ordered topics over the study days. Each entry is the list
+    of (topic, part, parts) covered that day."""
+    if not study_days:
+        return []
+    schedule = [[] for _ in range(study_days)]
+    if len(topics) <= study_days:
+        # Every topic gets a contiguous run of days, longer runs first
+        for i, topic in enumerate(topics):
+            first = i * study_days // len(topics)
+            last = (i + 1) * study_days // len(topics)
+            for part, day in enumerate(range(first, last)):
+                schedule[day].append((topic, part + 1, last - first))
+    else:
+        # More topics than days: several topics per day, in order
+        for i, topic in enumerate(topics):
+            schedule[i * study_days // len(topics)].append((topic, 1, 1))
+    return schedule
+
+
+def _study_title(names):
+    names = list(dict.fromkeys(names))
+    if len(names) <= 2:
+        return ' & '.join(names)
+    return f"{names[0]} & {len(names) - 1} more topics"
+
+
+def _study_tasks(entries, language):
+    where = f" in {language}" if language else ""
+    if len(entries) > 1:
+        # Several topics on one day: one task each plus a combined check
+        tasks = [f"Study {topic}{where}: read the key ideas and try a few examples." for topic, _, _ in entries]
+        names = ', '.join(topic for topic, _, _ in entries)
+        if language:
+            tasks.append(f"Take the {language} quizzes in Practice for: {names}.")
+        else:
+            tasks.append(f"Summarize {names} in your own words.")
+        return tasks
+    tasks = []
+    for topic, part, parts in entries:
+        if part == 1:
+            tasks.append(f"Read an introduction to {topic}{where} and note the key ideas.")
+            tasks.append(f"Work through small examples of {topic} yourself.")
+        else:
+            tasks.append(f"Practice {topic}: solve a few exercises without looking at the notes.")
+        if part == parts:
+            if language:
+                tasks.append(f"Take the {language} quiz on {topic} in Practice.")
+            else:
+                tasks.append(f"Summarize {topic} in your own words and list open questions.")
+        elif part > 1:
+            tasks.append(f"Build a small program or example that uses {topic}.")
+    return tasks
+
+
+def generate_study_plan(goal, days, start_date="today", topics=None, language=None):
+    """Build a dated day-by-day plan without calling the LLM.
+
+    topics is the ordered curriculum for the goal's language (topic names in
+    topic_order, from the topics table). Topics are spread over the study
+    days, with a review day every REVIEW_EVERY days and on the last day. With
+    no curriculum, generic phases of the goal are used instead.
+    Returns (plan text, structure) in the same format as the LLM routes."""
+    days = max(1, int(days))
+    start = parse_start_date(start_date)
+    topics = list(topics or [])
+    if not topics:
+        topics = [f"{phase} of {goal}" for phase in GENERIC_PHASES]
+    kinds = _day_kinds(days)
+    schedule = iter(_study_day_topics(topics, kinds.count('study')))
+
+    blocks = []
+    structure = []
+    covered = []  # topics studied since the last review
+    for number, kind in enumerate(kinds, start=1):
+        if kind == 'study':
+            entries = next(schedule)
+            names = [topic for topic, _, _ in entries]
+            title = _study_title(names)
+            tasks = _study_tasks(entries, language)
+            covered.extend(name for name in names if name not in covered)
+        elif number == days:
+            title = "Final Review and Assessment"
+            tasks = [
+                f"Review your notes for {goal}.",
+                "Redo the exercises and quiz questions you got wrong.",
+                "Build a small project that uses what you learned.",
+            ]
+        else:
+            title = "Weekly Review"
+            recent = ', '.join(covered) or goal
+            tasks = [
+                f"Review: {recent}.",
+                "Redo the exercises you found difficult this week.",
+                "Write down what is still unclear and revisit it.",
+            ]
+            covered = []
+        when = start + timedelta(days=number - 1)
+        blocks.append(f"📆 Day {number}: {format_plan_date(when)}\n**{title}**\n\n" + '\n'.join(tasks))
+        structure.append({
+            'day': number,
+            'date': when.isoformat(),
+            'title': title,
+            'tasks': [{'id': task_id(number, i + 1), 'text': text} for i, text in enumerate(tasks)],
+        })
+    return join_day_blocks(blocks), {'days': structure}
+
+
+def parse_start_date(value):
+    """Parse the startDate sent by the frontend (yyyy-MM-dd). Anything else,
+    including the default "today", means today."""
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return date.today()
+
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+MONTHS = ("january", "february", "march", "april", "may", "june", "july",
+          "august", "september", "october", "november", "december")
+
+
+def format_plan_date(d):
+    # Same shape as the prompt example: "sun july 20 2025"
+    return f"{WEEKDAYS[d.weekday()]} {MONTHS[d.month - 1]} {d.day} {d.year}"
+
+
+def to_relative_plan(text):
+    """Replace the date on every "📆 Day N" line with a placeholder so the
+    plan can be re-dated to any start date."""
+    return DAY_LINE_RE.sub(lambda m: f"{m.group(1)}: {RELATIVE_DATE}", text)
+
+
+def rebase_plan_dates(text, start_date):
+    """Date every "📆 Day N" line as start_date + N - 1."""
+    start = parse_start_date(start_date)
+
+    def dated(m):
+        day = int(m.group(2))
+        return f"{m.group(1)}: {format_plan_date(start + timedelta(days=day - 1))}"
+
+    return DAY_LINE_RE.sub(dated, text)
+
+
+def parse_plan_date(label):
+    """Turn a header date like "sun july 20 2025" into an ISO date string.
+    Labels we cannot read are returned unchanged."""
+    words = label.replace(',', ' ').split()
+    if words and not words[0].isdigit() and len(words) == 4:
+        words = words[1:]  # drop the weekday
+    text = ' '.join(words)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return label or None
+
+
+def task_id(day, index):
+    """Stable id of the index-th (1-based) task of a day, e.g. "d3t2"."""
+    return f"d{day}t{index}"
+
+
+class PlanParser:
+    """Single-pass parser for the plain-text plan format.
+
+    Feed it the LLM output in chunks of any size; feed() returns the days
+    completed so far and close() returns the last one. Each day is
+
+        {"day": 3, "date": "2025-07-22", "title": "...",
+         "tasks": [{"id": "d3t1", "text": "..."}, ...]}
+
+    With include_text=True every day also carries its raw block as "text".
+    Anything before the first "📆 Day" header is ignored."""
+
+    def __init__(self, include_text=False):
+        self.include_text = include_text
+        self._partial = ''
+        self._day = None
+        self._lines = []
+
+    def feed(self, chunk):
+        self._partial += chunk
+        *lines, self._partial = self._partial.split('\n')
+        completed = []
+        for line in lines:
+            day = self._line(line.rstrip('\r'))
+            if day:
+                completed.append(day)
+        return completed
+
+    def close(self):
+        completed = []
+        if self._partial:
+            day = self._line(self._partial.rstrip('\r'))
+            self._partial = ''
+            if day:
+                completed.append(day)
+        day = self._finish()
+        if day:
+            completed.append(day)
+        return completed
+
+    def _line(self, line):
+        header = DAY_HEADER_RE.match(line)
+        if header:
+            finished = self._finish()
+            self._day = {
+                'day': int(header.group(1)),
+                'date': parse_plan_date(header.group(2)),
+                'title': '',
+                'tasks': [],
+            }
+            self._lines = [line]
+            return finished
+        if self._day is None:
+            return None
+        if SEPARATOR_RE.match(line):
+            return self._finish()
+        self._lines.append(line)
+        if not line.strip():
+            return None
+        title = TITLE_RE.match(line)
+        if title and not self._day['title'] and not self._day['tasks']:
+            self._day['title'] = title.group(1).strip()
+            return None
+        day = self._day
+        day['tasks'].append({
+            'id': task_id(day['day'], len(day['tasks']) + 1),
+            'text': BULLET_RE.sub('', line).strip(),
+        })
+        return None
+
+    def _finish(self):
+        day, self._day = self._day, None
+        if day and self.include_text:
+            day['text'] = '\n'.join(self._lines).strip()
+        self._lines = []
+        return day
+
+
+def parse_plan(text):
+    """Parse a whole plan text into {"days": [...]}."""
+    parser = PlanParser()
+    days = parser.feed(text or '')
+    days.extend(parser.close())
+    return {'days': days}
+
+
+def parse_days(plan_text):
+    """Parse a plan into days that keep their raw block as "text"."""
+    parser = PlanParser(include_text=True)
+    return parser.feed(plan_text or '') + parser.close()
+
+
+def renumber_days(days, first_day, start_date):
+    """Number parsed days consecutively from first_day and date them from
+    start_date (day N is start_date + N - 1). Returns (blocks, days) with the
+    rewritten raw text blocks and the matching structure entries."""
+    start = parse_start_date(start_date)
+    blocks = []
+    structure = []
+    for offset, day in enumerate(days):
+        number = first_day + offset
+        header, _, body = day['text'].partition('\n')
+        header = DAY_HEADER_RE.sub(f"📆 Day {number}", header, count=1)
+        blocks.append(rebase_plan_dates(f"{header}\n{body}".rstrip(), start))
+        structure.append({
+            'day': number,
+            'date': (start + timedelta(days=number - 1)).isoformat(),
+            'title': day['title'],
+            'tasks': [{'id': task_id(number, i + 1), 'text': task['text']} for i, task in enumerate(day['tasks'])],
+        })
+    return blocks, structure
+
+
+def join_day_blocks(blocks):
+    return f"\n\n{DAY_SEPARATOR}\n\n".join(blocks) + f"\n\n{DAY_SEPARATOR}\n"
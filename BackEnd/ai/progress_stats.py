@@ -0,0 +1,66 @@
+from datetime import date
+from ai.planner import parse_plan
+from ai.adapt import completed_task_ids, ISO_DATE_RE
+
+# Completion numbers for a plan, so clients get totals, streaks and per-day
+# percentages instead of walking the raw progress map themselves.
+
+
+def _percent(done, total):
+    return round(100.0 * done / total, 1) if total else 0.0
+
+
+def completion_stats(plan_text, structure, progress, today=None):
+    """Totals, streaks and per-day completion.
+
+    structure is the stored plan structure ({"days": [...]}) or None, in
+    which case the plan text is parsed. progress may use task ids or the
+    frontend's "<day>-<task>" keys. A day counts as done when all its tasks
+    are; streaks are runs of consecutive done days, and the current streak
+    ends today (or on the last plan day before today)."""
+    today = (today or date.today()).isoformat()
+    days = (structure or {}).get('days') or parse_plan(plan_text)['days']
+    done = completed_task_ids(plan_text or '', progress)
+
+    per_day = []
+    total = completed = 0
+    for day in days:
+        tasks = day.get('tasks') or []
+        finished = sum(1 for task in tasks if task['id'] in done)
+        total += len(tasks)
+        completed += finished
+        per_day.append({
+            'day': day['day'],
+            'date': day.get('date'),
+            'total': len(tasks),
+            'completed': finished,
+            'percent': _percent(finished, len(tasks)),
+        })
+
+    def finished_day(entry):
+        return entry['total'] and entry['completed'] == entry['total']
+
+    longest = run = 0
+    for entry in per_day:
+        run = run + 1 if finished_day(entry) else 0
+        longest = max(longest, run)
+
+    elapsed = [e for e in per_day if not ISO_DATE_RE.match(e['date'] or '') or e['date'] <= today]
+    if elapsed and elapsed[-1]['date'] == today and not finished_day(elapsed[-1]):
+        elapsed.pop()  # today is still in progress and does not break the streak
+    current = 0
+    for entry in reversed(elapsed):
+        if not finished_day(entry):
+            break
+        current += 1
+
+    return {
+        'total_tasks': total,
+        'completed_tasks': completed,
+        'percent': _percent(completed, total),
+        'days_total': len(per_day),
+        'days_completed': sum(1 for e in per_day if finished_day(e)),
+        'current_streak': current,
+        'longest_streak': longest,
+        'days': per_day,
+    }
@@ -0,0 +1,119 @@
+# Prompt templates for the OpenRouter plan endpoints.
+# All of them ask for the plain-text "📆 Day N" format that PlanViewer.jsx and
+# ai/planner.py parse.
+
+PLAN_FORMAT = """📆 Day 1: sun july 20 2025
+**Introduction to Web Development**
+
+Familiarize yourself with the basics of HTML, CSS, and JavaScript.
+Install a code editor (e.g., Visual Studio Code, Sublime Text) and a web browser for testing (e.g., Google Chrome, Firefox).
+Complete a beginner's tutorial or course for each language.
+
+------------------------------------------------------------------------------------------
+
+📆 Day 2: mon july 21 2025
+**HTML Deep Dive**
+
+Study more in-depth HTML topics such as forms, tables, lists, and embedded media.
+Practice creating basic web pages and experiment with HTML structure.
+Use a validator tool like the W3C Markup Validation Service to check your HTML.
+
+---------------------------------------------------------------------------------------
+
+Repeat this format for all days. Use bold (**) for the day title. Do NOT return JSON, code blocks, curly braces, or markdown. Do NOT use triple backticks. Do NOT include any explanation. Only return the formatted plan as shown above.
+
+INCORRECT:
+```
+[
+  { "day": 1, ... }
+]
+```
+CORRECT:
+📆 Day 1: ... (as above)
+"""
+
+
+def build_generate_prompt(goal, days, start_date):
+    return f"""
+Generate a {days}-day structured study plan for achieving the goal: '{goal}'.
+Start date is {start_date}.
+Return the plan in the following exact format (not JSON, not markdown, not code block):
+
+{PLAN_FORMAT}"""
+
+
+def build_adapt_prompt(plan, progress, feedback, goal, days, start_date):
+    return f"""
+You are an AI study coach. Here is the user's original study plan:
+---
+{plan}
+---
+
+Here is the user's progress (in JSON):
+{progress}
+
+Here is the user's feedback (if any):
+{feedback}
+
+The user's goal: {goal}
+Total days: {days}
+Start date: {start_date}
+
+Adapt the plan as follows:
+- Reschedule any incomplete or missed tasks to future days.
+- Add review sessions for tasks marked as difficult or skipped.
+- If the user found tasks too easy, increase the challenge slightly.
+- If the user found tasks too hard, make them easier or break them down.
+- Do not remove completed tasks, but mark them as done.
+- Make sure the plan is clear and actionable.
+Return the adapted plan in the following exact format (not JSON, not markdown, not code block):
+
+{PLAN_FORMAT}"""
+
+
+def build_incremental_adapt_prompt(remaining_plan, summary, goal, first_day, last_day, first_date):
+    return f"""
+You are an AI study coach. The user is following a study plan for the goal: '{goal}'.
+Days 1 to {first_day - 1} are already completed and must not be changed.
+Here are the remaining days of the plan that still need to be done:
+---
+{remaining_plan}
+---
+
+Notes on the user's progress so far:
+{summary}
+
+Rewrite ONLY days {first_day} to {last_day}, starting with Day {first_day} on {first_date}:
+- Reschedule any incomplete or missed tasks from these days.
+- Add review sessions for tasks marked as difficult or skipped.
+- If the user found tasks too easy, increase the challenge slightly.
+- If the user found tasks too hard, make them easier or break them down.
+- Number the days from Day {first_day} to Day {last_day}, one block per day.
+- Make sure the plan is clear and actionable.
+Return the rewritten days in the following exact format (not JSON, not markdown, not code block):
+
+{PLAN_FORMAT}"""
+
+
+def build_outline_prompt(goal, days, windows):
+    ranges = '\n'.join(f"Days {first}-{last}:" for first, last in windows)
+    return f"""
+You are an AI study coach. Outline a {days}-day study plan for the goal: '{goal}'.
+The plan is split into the blocks of days below. For each block write one line with the block's main focus, building from fundamentals to advanced topics and ending with review and a final project.
+Return exactly one line per block, in this format and nothing else:
+
+{ranges}
+"""
+
+
+def build_window_prompt(goal, total_days, first_day, last_day, first_date, focus, previous_focus, next_focus):
+    return f"""
+You are an AI study coach writing part of a {total_days}-day study plan for the goal: '{goal}'.
+Write days {first_day} to {last_day} only. Day {first_day} is on {first_date}.
+Focus of these days: {focus}
+The days before this part covered: {previous_focus or 'nothing yet, this is the start of the plan'}
+The days after this part will cover: {next_focus or 'nothing, this is the end of the plan'}
+Number the days from Day {first_day} to Day {last_day}, one block per day.
+Return the days in the following exact format (not JSON, not markdown, not code block):
+
+{PLAN_FORMAT}"""
@@ -0,0 +1,113 @@
+import json
+from ai.planner import PlanParser, join_day_blocks
+
+# Helpers for relaying an OpenRouter streaming completion to the browser as
+# server-sent events.
+#
+# OpenRouter streams OpenAI-style SSE: "data: {json chunk}" lines, ": ..."
+# keep-alive comments and a final "data: [DONE]". We pull the content deltas
+# out of it, run it through the plan parser (ai/planner.py) so every
+# "📆 Day N" block is sent as soon as it is complete, and re-emit both as our
+# own events:
+#
+#   event: token  data: {"text": "..."}        every content delta
+#   event: day    data: {"day": N, "date", "title", "tasks", "text"}
+#                                              every completed day block
+#   event: done   data: {"<result key>": "...", "structure": {"days": [...]}}
+#                                              same body as the JSON response
+#   event: error  data: {"error": "..."}
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def delta_content(chunk):
+    """The content delta of one parsed stream chunk, '' if it has none."""
+    choices = chunk.get('choices') if isinstance(chunk, dict) else None
+    if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+        return ''
+    delta = choices[0].get('delta')
+    content = delta.get('content') if isinstance(delta, dict) else None
+    return content if isinstance(content, str) else ''
+
+
+def iter_openrouter_deltas(response):
+    """Yield the content deltas of a streaming OpenRouter response."""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or line.startswith(':'):
+            continue
+        if not line.startswith('data:'):
+            continue
+        data = line[len('data:'):].strip()
+        if data == '[DONE]':
+            return
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            continue
+        if chunk.get('error'):
+            raise RuntimeError(chunk['error'].get('message', 'OpenRouter stream error'))
+        delta = delta_content(chunk)
+        if delta:
+            yield delta
+
+
+def relay_plan_stream(response, result_key, on_complete=None):
+    """Turn a streaming OpenRouter response into our SSE events. on_complete
+    is called with the full text once the stream finished cleanly."""
+    parser = PlanParser(include_text=True)
+    parts = []
+    days = []
+    try:
+        for delta in iter_openrouter_deltas(response):
+            parts.append(delta)
+            yield sse_event('token', {'text': delta})
+            for day in parser.feed(delta):
+                days.append(day)
+                yield sse_event('day', day)
+        for day in parser.close():
+            days.append(day)
+            yield sse_event('day', day)
+        text = ''.join(parts)
+        if on_complete:
+            on_complete(text)
+        yield sse_event('done', {result_key: text, 'structure': _structure(days)})
+    except Exception as e:
+        yield sse_event('error', {'error': str(e)})
+    finally:
+        response.close()
+
+
+def replay_plan_text(text, result_key):
+    """Emit an already complete plan (e.g. from the plan cache) as the same
+    events a live stream would produce."""
+    parser = PlanParser(include_text=True)
+    days = parser.feed(text) + parser.close()
+    for day in days:
+        yield sse_event('day', day)
+    yield sse_event('done', {result_key: text, 'structure': _structure(days)})
+
+
+def _structure(days):
+    # Same shape as ai.planner.parse_plan(), without the raw day text
+    return {'days': [{k: v for k, v in day.items() if k != 'text'} for day in days]}
+
+
+def relay_plan_chunks(chunks, result_key, on_complete=None):
+    """Emit a plan generated window by window (ai/chunked.py) as day events,
+    followed by done. chunks yields (blocks, structure days) in order."""
+    blocks = []
+    days = []
+    try:
+        for window_blocks, window_days in chunks:
+            for block, day in zip(window_blocks, window_days):
+                yield sse_event('day', dict(day, text=block))
+            blocks.extend(window_blocks)
+            days.extend(window_days)
+        text = join_day_blocks(blocks)
+        if on_complete:
+            on_complete(text)
+        yield sse_event('done', {result_key: text, 'structure': {'days': days}})
+    except Exception as e:
+        yield sse_event('error', {'error': str(e)})
@@ -1,17 +1,144 @@
 # backend/app.py
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
-import requests
 import os
+import threading
+import atexit
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from dotenv import load_dotenv
-from DB.supabase_client import supabase
+from DB.repository import repository, QUIZ_QUESTION_COLUMNS
+from DB.catalog import catalog
+from DB.game_sampler import sampler
+from DB import topic_index
+from DB.progress_buffer import progress_buffer, normalize_deltas
+from DB.progress_codec import stored_progress
+from DB import analytics
+from DB.job_queue import job_queue, QueueFull
+from DB.search_index import search_index, KINDS as SEARCH_KINDS
+from DB.review_scheduler import review_scheduler, normalize_answers, day_iso
+from ai.prompts import build_generate_prompt, build_adapt_prompt
+from ai.streaming import relay_plan_stream, relay_plan_chunks, replay_plan_text, sse_event
+from ai.plan_cache import plan_cache
+from ai.planner import parse_plan, generate_study_plan, detect_language
+from ai.adapt import adapt_incrementally
+from ai.progress_stats import completion_stats
+from ai.chunked import should_chunk, iter_chunked_plan, generate_chunked_plan
+from ai.llm_gateway import gateway as llm_gateway, LLMError
+import metrics
+from auth import current_user_id
+from http_cache import response_cache
+import pagination
+from logs import log
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)  # Allow requests from frontend
-
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+metrics.install_flask(app)
+
+MAX_CODE_GAMES = 50
+MAX_CODE_GAME_EXCLUDES = 500
+MAX_PLAN_DAYS = 365
+# How long /generate-plan waits for the LLM before answering with the offline
+# draft instead. The LLM call keeps running and its plan lands in the cache.
+PLAN_LLM_DEADLINE_SECONDS = float(os.getenv("PLAN_LLM_DEADLINE_SECONDS", "30"))
+
+# Cache-Control of the content endpoints. Responses carry ETags, so once
+# max-age has passed a browser revalidates with a cheap 304. Unseeded code
+# game samples are random on every request and are not stored.
+TOPICS_CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=3600"
+QUIZ_QUESTIONS_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=600"
+CODE_GAMES_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=600"
+RANDOM_CODE_GAMES_CACHE_CONTROL = "no-store"
+
+# Paged /api/quiz-questions (?limit, ?cursor, ?fields, ?format=ndjson)
+QUIZ_QUESTION_FIELDS = [c.strip() for c in QUIZ_QUESTION_COLUMNS.split(',')]
+QUIZ_PAGE_DEFAULT = 100
+QUIZ_PAGE_MAX = 1000
+MAX_REVIEW_QUESTIONS = 50
+MAX_SEARCH_RESULTS = 50
+MAX_SEARCH_QUERY = 200
+
+JOB_EVENTS_POLL_SECONDS = 0.5
+# Queue priority of each job kind (0-9, higher first). Adapting a plan the
+# user is already following goes ahead of generating a new one.
+JOB_PRIORITIES = {"generate-plan": 5, "adapt-plan": 6}
+JOB_EVENTS_MAX_SECONDS = 600
+
+_plan_pool = ThreadPoolExecutor(max_workers=int(os.getenv("PLAN_POOL_WORKERS", "16")),
+                                thread_name_prefix="plan-llm")
+
+def wants_stream(data):
+    # Streaming is opt-in so existing clients keep getting one JSON response.
+    return (
+        data.get("stream") is True
+        or request.args.get("stream") == "1"
+        or "text/event-stream" in request.headers.get("Accept", "")
+    )
+
+def wants_job(data):
+    # "async": true queues the request and answers 202 with a job id
+    return data.get("async") is True or request.args.get("async") == "1"
+
+def submit_job(kind, data):
+    # The job belongs to the signed-in user (the per-user limits count
+    # against them) and its priority is the server's choice, never the client's
+    user_id = current_user_id()
+    if user_id is None:
+        return jsonify({"error": "Sign in required"}), 401
+    payload = {k: v for k, v in data.items() if k not in ("async", "stream", "priority", "user_id")}
+    try:
+        job_id = job_queue.submit(kind, payload, user_id, JOB_PRIORITIES[kind])
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), e.status_code
+    return jsonify({"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}",
+                    "events_url": f"/jobs/{job_id}/events"}), 202
+
+def job_handler(path, view):
+    """Run a queued request through the same view as the synchronous route."""
+    def handler(job):
+        with app.test_request_context(path, method="POST", json=job["payload"]):
+            g.job_id = job["id"]
+            response = app.make_response(view())
+            return response.status_code, response.get_json()
+    return handler
+
+def offline_plan(goal, days, start_date):
+    """Instant template plan from the topics curriculum (ai/planner.py)."""
+    try:
+        language = detect_language(goal, topic_index.languages())
+        topics = [row['topic'] for row in catalog.topics(language)] if language else []
+    except Exception as e:
+        log.warning("plan.curriculum_lookup_failed", error=e)
+        language, topics = None, []
+    return generate_study_plan(goal, days, start_date, topics, language)
+
+def fallback_plan_response(goal, days, start_date, reason):
+    plan, structure = offline_plan(goal, days, start_date)
+    return jsonify({"plan": plan, "structure": structure, "fallback": True, "fallback_reason": reason})
+
+def sse_response(events):
+    return Response(stream_with_context(events), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def stream_plan_response(prompt, result_key, on_complete=None, fallback=None):
+    """Relay an OpenRouter streaming completion as server-sent events. If the
+    upstream call cannot start and fallback is given, the plan text it
+    returns is sent instead, after a fallback event."""
+    def events():
+        try:
+            response = llm_gateway.stream(prompt)
+        except LLMError as e:
+            if fallback:
+                yield sse_event("fallback", {"reason": str(e)})
+                yield from replay_plan_text(fallback(), result_key)
+            else:
+                yield sse_event("error", {"error": str(e)})
+            return
+        yield from relay_plan_stream(response, result_key, on_complete)
+
+    return sse_response(events())
 
 @app.route("/generate-plan", methods=["POST"])
 def generate_plan():
@@ -19,90 +146,164 @@ def generate_plan():
     goal = data.get("goal")
     days = data.get("duration", 30)
     start_date = data.get("startDate", "today")
-
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-
-    prompt = f"""
-Generate a {days}-day structured study plan for achieving the goal: '{goal}'.
-Start date is {start_date}.
-Return the plan in the following exact format (not JSON, not markdown, not code block):
-
-📆 Day 1: sun july 20 2025
-**Introduction to Web Development**
-
-Familiarize yourself with the basics of HTML, CSS, and JavaScript.
-Install a code editor (e.g., Visual Studio Code, Sublime Text) and a web browser for testing (e.g., Google Chrome, Firefox).
-Complete a beginner's tutorial or course for each language.
-
-------------------------------------------------------------------------------------------
-
-📆 Day 2: mon july 21 2025
-**HTML Deep Dive**
-
-Study more in-depth HTML topics such as forms, tables, lists, and embedded media.
-Practice creating basic web pages and experiment with HTML structure.
-Use a validator tool like the W3C Markup Validation Service to check your HTML.
-
----------------------------------------------------------------------------------------
-
-Repeat this format for all days. Use bold (**) for the day title. Do NOT return JSON, code blocks, curly braces, or markdown. Do NOT use triple backticks. Do NOT include any explanation. Only return the formatted plan as shown above.
-
-INCORRECT:
-```
-[
-  {{ "day": 1, ... }}
-]
-```
-CORRECT:
-📆 Day 1: ... (as above)
-"""
-
-    payload = {
-        "model": "mistralai/mistral-small-3.1-24b-instruct:free",
-        "messages": [
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
-    }
-
-    response = requests.post("https://openrouter.ai/api/v1/chat/completions",
-                             json=payload, headers=headers)
-
-    if response.status_code == 200:
-        res_data = response.json()
-        content = res_data.get("choices", [{}])[0].get("message", {}).get("content", "")
-        return jsonify({"plan": content})
+    try:
+        days = int(days)
+    except (TypeError, ValueError):
+        return jsonify({"error": "duration must be a number of days"}), 400
+    if not 1 <= days <= MAX_PLAN_DAYS:
+        return jsonify({"error": f"duration must be between 1 and {MAX_PLAN_DAYS} days"}), 400
+    if wants_job(data):
+        return submit_job("generate-plan", data)
+
+    # Popular goals are served from the plan cache, re-dated to startDate.
+    # "regenerate": true skips the lookup and asks the LLM for a fresh plan.
+    cached = None if data.get("regenerate") else plan_cache.get(goal, days, start_date)
+    if cached is not None:
+        if wants_stream(data):
+            return sse_response(replay_plan_text(cached, "plan"))
+        return jsonify({"plan": cached, "structure": parse_plan(cached), "cached": True})
+
+    # "mode": "draft" answers instantly from the offline template engine
+    if data.get("mode") == "draft":
+        plan, structure = offline_plan(goal, days, start_date)
+        return jsonify({"plan": plan, "structure": structure, "draft": True})
+
+    # Long plans are generated in parallel windows and stitched together
+    if should_chunk(days):
+        if wants_stream(data):
+            chunks = iter_chunked_plan(goal, days, start_date, llm_gateway.complete)
+            return sse_response(relay_plan_chunks(chunks, "plan", lambda text: plan_cache.put(goal, days, text)))
+
+        def generate():
+            content, structure = generate_chunked_plan(goal, days, start_date, llm_gateway.complete)
+            plan_cache.put(goal, days, content)
+            return content, structure
     else:
-        return jsonify({"error": "Failed to generate plan"}), response.status_code
+        prompt = build_generate_prompt(goal, days, start_date)
+        if wants_stream(data):
+            return stream_plan_response(prompt, "plan", lambda text: plan_cache.put(goal, days, text),
+                                        fallback=lambda: offline_plan(goal, days, start_date)[0])
+
+        def generate():
+            content = llm_gateway.complete(prompt)
+            plan_cache.put(goal, days, content)
+            return content, parse_plan(content)
+
+    # Slow or failing LLM calls fall back to the offline plan. Queued jobs
+    # have no client waiting on the connection, so they wait for the LLM.
+    future = _plan_pool.submit(generate)
+    try:
+        content, structure = future.result(timeout=None if g.get("job_id") else PLAN_LLM_DEADLINE_SECONDS)
+    except FutureTimeout:
+        log.info("plan.fallback", reason="timeout")
+        return fallback_plan_response(goal, days, start_date, "timeout")
+    except LLMError as e:
+        log.warning("plan.fallback", reason="llm_error", error=e)
+        return fallback_plan_response(goal, days, start_date, str(e))
+    except ValueError as e:
+        log.warning("plan.fallback", reason="invalid_response", error=e)
+        return fallback_plan_response(goal, days, start_date, str(e))
+    return jsonify({"plan": content, "structure": structure})
 
 @app.route("/update-progress", methods=["POST"])
 def update_progress():
+    """Either {"plan_id", "deltas": [{"task", "done", "feedback"?}, ...]} (or
+    {"plan_id", "deltas": {"12-3": true}}), buffered and written as one merged
+    update a moment later, or the original {"plan_id", "progress", "feedback"?}
+    that replaces the whole progress object. Only the plan's owner (bearer
+    token) may write it."""
+    user_id = current_user_id()
+    if user_id is None:
+        return jsonify({"error": "Sign in required"}), 401
     data = request.get_json()
     plan_id = data.get("plan_id")
+    deltas = data.get("deltas")
     progress = data.get("progress")
     feedback = data.get("feedback")
-    if not plan_id or progress is None:
+    if not plan_id or (progress is None and deltas is None):
         return jsonify({"error": "Missing plan_id or progress"}), 400
-    update_data = {"progress": progress}
-    if feedback is not None:
-        update_data["feedback"] = feedback
+    if deltas is not None:
+        try:
+            progress_deltas, feedback_deltas = normalize_deltas(deltas)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        try:
+            view = progress_buffer.add(plan_id, progress_deltas, feedback_deltas, user_id=user_id)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except PermissionError:
+            return jsonify({"error": "Not your plan"}), 403
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+        if view is None:
+            return jsonify({"error": "Plan not found or not updated"}), 404
+        return jsonify({"success": True, "progress": view["progress"], "feedback": view["feedback"],
+                        "stats": progress_stats(view)})
     try:
-        response = supabase.table("study_plan").update(update_data).eq("id", plan_id).execute()
-        if response.data:
-            return jsonify({"success": True, "data": response.data})
+        row = progress_buffer.replace(plan_id, progress, feedback, user_id=user_id)
+        if row is not None:
+            return jsonify({"success": True, "data": [dict(row, progress=stored_progress(row))]})
         else:
             return jsonify({"error": "Plan not found or not updated"}), 404
+    except PermissionError:
+        return jsonify({"error": "Not your plan"}), 403
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/accept-adapted-plan", methods=["POST"])
+def accept_adapted_plan():
+    """{"plan_id", "plan", "structure"?}: replace a plan's text with the
+    adapted one from /adapt-plan. Goes through the progress buffer so its
+    cached row and task slots follow the new plan. Owner only."""
+    user_id = current_user_id()
+    if user_id is None:
+        return jsonify({"error": "Sign in required"}), 401
+    data = request.get_json(silent=True) or {}
+    plan_id, plan = data.get("plan_id"), data.get("plan")
+    if not plan_id or not isinstance(plan, str) or not plan.strip():
+        return jsonify({"error": "Missing plan_id or plan"}), 400
+    structure = data.get("structure")
+    if not isinstance(structure, dict):
+        structure = parse_plan(plan)
+    try:
+        row = progress_buffer.save_plan(plan_id, plan, structure, user_id=user_id)
+    except PermissionError:
+        return jsonify({"error": "Not your plan"}), 403
     except Exception as e:
+        log.error("plan.accept_failed", plan_id=plan_id, error=e)
         return jsonify({"error": str(e)}), 500
+    if row is None:
+        return jsonify({"error": "Plan not found or not updated"}), 404
+    return jsonify({"success": True, "plan": row["plan"], "structure": row.get("structure")})
+
+@app.route("/progress/<plan_id>", methods=["GET"])
+def get_progress(plan_id):
+    # Includes deltas that are still waiting in the write-behind buffer.
+    # Only for the plan's owner (bearer token).
+    user_id = current_user_id()
+    if user_id is None:
+        return jsonify({"error": "Sign in required"}), 401
+    try:
+        view = progress_buffer.view(plan_id)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if view is None:
+        return jsonify({"error": "Plan not found"}), 404
+    if str(view.get("user_id")) != user_id:
+        return jsonify({"error": "Not your plan"}), 403
+    return jsonify({"plan_id": plan_id, "progress": view["progress"], "feedback": view["feedback"],
+                    "stats": progress_stats(view)})
+
+def progress_stats(view):
+    try:
+        return completion_stats(view.get("plan"), view.get("structure"), view["progress"])
+    except Exception as e:
+        log.warning("progress.stats_failed", error=e)
+        return None
 
 @app.route("/adapt-plan", methods=["POST"])
 def adapt_plan():
-    print("Received /adapt-plan request")
+    log.debug("adapt.request", sample=0.1)
     data = request.get_json()
     plan = data.get("plan")
     progress = data.get("progress")
@@ -113,111 +314,235 @@ def adapt_plan():
 
     if not plan or progress is None:
         return jsonify({"error": "Missing plan or progress"}), 400
+    if wants_job(data):
+        return submit_job("adapt-plan", data)
+
+    # "mode": "incremental" keeps completed days as they are and only
+    # regenerates the rest (JSON response only).
+    if data.get("mode") == "incremental":
+        try:
+            result = adapt_incrementally(plan, progress, feedback, goal, start_date, llm_gateway.complete)
+        except LLMError as e:
+            log.warning("adapt.failed", mode="incremental", error=e)
+            return jsonify({"error": "Failed to adapt plan"}), e.status_code
+        except ValueError as e:
+            log.warning("adapt.failed", mode="incremental", error=e)
+            return jsonify({"error": "Failed to adapt plan"}), 502
+        if result is not None:
+            adapted, structure, frozen_days = result
+            return jsonify({"adapted_plan": adapted, "structure": structure, "frozen_days": frozen_days})
+
+    prompt = build_adapt_prompt(plan, progress, feedback, goal, days, start_date)
+    if wants_stream(data):
+        return stream_plan_response(prompt, "adapted_plan")
 
-    # Prepare a prompt for the LLM
-    prompt = f"""
-You are an AI study coach. Here is the user's original study plan:
----
-{plan}
----
-
-Here is the user's progress (in JSON):
-{progress}
-
-Here is the user's feedback (if any):
-{feedback}
-
-The user's goal: {goal}
-Total days: {days}
-Start date: {start_date}
-
-Adapt the plan as follows:
-- Reschedule any incomplete or missed tasks to future days.
-- Add review sessions for tasks marked as difficult or skipped.
-- If the user found tasks too easy, increase the challenge slightly.
-- If the user found tasks too hard, make them easier or break them down.
-- Do not remove completed tasks, but mark them as done.
-- Make sure the plan is clear and actionable.
-Return the adapted plan in the following exact format (not JSON, not markdown, not code block):
-
-📆 Day 1: sun july 20 2025
-**Introduction to Web Development**
-
-Familiarize yourself with the basics of HTML, CSS, and JavaScript.
-Install a code editor (e.g., Visual Studio Code, Sublime Text) and a web browser for testing (e.g., Google Chrome, Firefox).
-Complete a beginner's tutorial or course for each language.
-
-------------------------------------------------------------------------------------------
-
-📆 Day 2: mon july 21 2025
-**HTML Deep Dive**
-
-Study more in-depth HTML topics such as forms, tables, lists, and embedded media.
-Practice creating basic web pages and experiment with HTML structure.
-Use a validator tool like the W3C Markup Validation Service to check your HTML.
-
----------------------------------------------------------------------------------------
-
-Repeat this format for all days. Use bold (**) for the day title. Do NOT return JSON, code blocks, curly braces, or markdown. Do NOT use triple backticks. Do NOT include any explanation. Only return the formatted plan as shown above.
-
-INCORRECT:
-```
-[
-  {{ "day": 1, ... }}
-]
-```
-CORRECT:
-📆 Day 1: ... (as above)
-"""
-
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": "mistralai/mistral-small-3.1-24b-instruct:free",
-        "messages": [
-            {"role": "user", "content": prompt}
-        ]
-    }
-    print("Sending request to OpenRouter API")
-    response = requests.post("https://openrouter.ai/api/v1/chat/completions",
-                             json=payload, headers=headers)
-    print("OpenRouter API response:", response.text)
-    if response.status_code == 200:
-        res_data = response.json()
-        content = res_data.get("choices", [{}])[0].get("message", {}).get("content", "")
-        print("Returning to frontend:", {"adapted_plan": content})
-        return jsonify({"adapted_plan": content})
-    else:
-        print("Returning to frontend error:", {"error": "Failed to adapt plan"})
-        return jsonify({"error": "Failed to adapt plan"}), response.status_code
+    try:
+        content = llm_gateway.complete(prompt)
+    except LLMError as e:
+        log.warning("adapt.failed", mode="full", error=e)
+        return jsonify({"error": "Failed to adapt plan"}), e.status_code
+    return jsonify({"adapted_plan": content, "structure": parse_plan(content)})
+
+# A job is only visible to the user who submitted it; anyone else gets the
+# same 404 as for a job that does not exist.
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    user_id = current_user_id()
+    if user_id is None:
+        return jsonify({"error": "Sign in required"}), 401
+    job = job_queue.get(job_id, user_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    user_id = current_user_id()
+    if user_id is None:
+        return jsonify({"error": "Sign in required"}), 401
+    if job_queue.cancel(job_id, user_id):
+        return jsonify({"id": job_id, "status": "cancelled"})
+    if job_queue.get(job_id, user_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"error": "Job already started"}), 409
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """Server-sent events: "status" whenever the job changes, then "done"
+    with the result (or "error")."""
+    user_id = current_user_id()
+    if user_id is None:
+        return jsonify({"error": "Sign in required"}), 401
+    if job_queue.get(job_id, user_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def events():
+        last = None
+        deadline = time.monotonic() + JOB_EVENTS_MAX_SECONDS
+        while time.monotonic() < deadline:
+            job = job_queue.get(job_id)
+            state = (job["status"], job.get("position"))
+            if state != last:
+                last = state
+                status = {"id": job_id, "status": job["status"]}
+                if "position" in job:
+                    status["position"] = job["position"]
+                yield sse_event("status", status)
+            if job["status"] == "done":
+                yield sse_event("done", {"status_code": job["status_code"], "result": job["result"]})
+                return
+            if job["status"] in ("failed", "cancelled"):
+                yield sse_event("error", {"status": job["status"], "error": job.get("error")})
+                return
+            time.sleep(JOB_EVENTS_POLL_SECONDS)
+        yield sse_event("error", {"error": "still running, poll the status url"})
+
+    return sse_response(events())
+
+@app.route('/api/jobs/stats', methods=['GET'])
+def get_job_stats():
+    return jsonify(job_queue.stats())
+
+def wants_ndjson():
+    return (request.args.get('format') == 'ndjson'
+            or request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson')
 
 @app.route('/api/quiz-questions', methods=['GET'])
 def get_quiz_questions():
-    print("/api/quiz-questions called")
+    # Without paging parameters: the whole filtered list as one array, from
+    # the catalog. With ?limit or ?cursor: one page {"items", "next_cursor"};
+    # with ?format=ndjson: every row (up to ?limit) streamed one per line.
+    # Both read the database in id order, a page at a time.
+    language = request.args.get('language') or None
+    topic = request.args.get('topic') or None
+    query = ('quiz_questions', language, topic)
+    ndjson = wants_ndjson()
+    try:
+        fields = pagination.parse_fields(request.args.get('fields'), QUIZ_QUESTION_FIELDS)
+        after_id = pagination.decode_cursor(request.args.get('cursor'), query)
+        limit = pagination.parse_limit(request.args.get('limit'), QUIZ_PAGE_DEFAULT, None if ndjson else QUIZ_PAGE_MAX)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        if ndjson or 'limit' in request.args or 'cursor' in request.args:
+            topic_ids = topic_index.topic_ids_matching(language, topic)
+            columns = pagination.select_columns(fields, QUIZ_QUESTION_FIELDS)
+
+            def fetch_page(after, n):
+                return repository.quiz_questions_page(topic_ids, columns, after, n)
+
+            if ndjson:
+                rows = pagination.iter_rows(fetch_page, after_id, limit if 'limit' in request.args else None)
+                return Response(stream_with_context(pagination.ndjson_lines(rows, fields)),
+                                mimetype='application/x-ndjson', headers={'Cache-Control': 'no-store'})
+            rows = fetch_page(after_id, limit)
+            next_cursor = pagination.encode_cursor(rows[-1]['id'], query) if len(rows) == limit else None
+            return jsonify({'items': [pagination.project(row, fields) for row in rows], 'next_cursor': next_cursor})
+
+        if fields:
+            return response_cache.json(
+                query + (tuple(fields),), catalog.version(),
+                lambda: [pagination.project(row, fields) for row in catalog.quiz_questions(language, topic)],
+                QUIZ_QUESTIONS_CACHE_CONTROL)
+        return response_cache.json(query, catalog.version(),
+                                   lambda: catalog.quiz_questions(language, topic), QUIZ_QUESTIONS_CACHE_CONTROL)
+    except Exception as e:
+        log.error("quiz_questions.failed", error=e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/review/next', methods=['GET'])
+def get_review_questions():
+    # The next questions due for the signed-in user in a topic (spaced
+    # repetition, see DB/review_scheduler.py), instead of the whole topic
+    user_id = current_user_id()
+    if user_id is None:
+        return jsonify({'error': 'Sign in required'}), 401
     language = request.args.get('language')
     topic = request.args.get('topic')
-    print("Params:", language, topic)
-    # Join quiz_questions with topics to filter by language and topic name
-    query = supabase.table('quiz_questions').select('*, topics(topic, language)').execute()
-    if hasattr(query, 'error') and query.error:
-        print("Supabase ERROR:", query.error)
-        return jsonify({"error": str(query.error)}), 500
-    if not hasattr(query, 'data') or not query.data:
-        print("No data returned from Supabase.")
-        return jsonify([])
-    print("All query data:", query.data)
-    # Filter in Python since supabase-py does not support join+where easily
-    filtered = [
-        q for q in query.data
-        if (
-            (not language or (q.get('topics') and q['topics'].get('language') == language)) and
-            (not topic or (q.get('topics') and q['topics'].get('topic') == topic))
-        )
-    ]
-    print("Filtered questions:", filtered)
-    return jsonify(filtered)
+    if not language or not topic:
+        return jsonify({'error': 'language and topic are required'}), 400
+    try:
+        count = pagination.parse_limit(request.args.get('count'), 10, MAX_REVIEW_QUESTIONS, name='count')
+        fields = pagination.parse_fields(request.args.get('fields'), QUIZ_QUESTION_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        result = review_scheduler.next(user_id, language, topic, count)
+    except Exception as e:
+        log.error("review.next_failed", error=e)
+        return jsonify({'error': str(e)}), 500
+    if result is None:
+        return jsonify({'error': 'Unknown topic'}), 404
+    questions, next_due = result
+    return jsonify({'questions': [pagination.project(q, fields) for q in questions], 'next_due': next_due})
+
+@app.route('/api/review/answers', methods=['POST'])
+def record_review_answers():
+    # A session's answers in one batch, for the signed-in user:
+    # {"language", "topic", "answers": [{"question_id", "quality": 0-5 | "correct": bool}]}
+    user_id = current_user_id()
+    if user_id is None:
+        return jsonify({'error': 'Sign in required'}), 401
+    data = request.get_json(silent=True) or {}
+    language, topic = data.get('language'), data.get('topic')
+    if not language or not topic:
+        return jsonify({'error': 'language and topic are required'}), 400
+    try:
+        answers = normalize_answers(data.get('answers'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        result = review_scheduler.record(user_id, language, topic, answers)
+    except Exception as e:
+        log.error("review.record_failed", error=e)
+        return jsonify({'error': str(e)}), 500
+    if result is None:
+        return jsonify({'error': 'Unknown topic'}), 404
+    rows, unknown = result
+    return jsonify({
+        'recorded': [{'question_id': row['question_id'], 'due': day_iso(row['due_day']),
+                      'interval_days': row['interval_days'], 'ease': row['ease']} for row in rows],
+        'unknown': unknown,
+    })
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    # Full-text / autocomplete search over topics, quiz questions and the
+    # caller's plans (DB/search_index.py). ?kinds=topic,question,plan
+    # narrows it; plans are only searched for a signed-in caller (bearer
+    # token) and only their own.
+    query = (request.args.get('q') or '')[:MAX_SEARCH_QUERY]
+    kinds = tuple(k for k in (request.args.get('kinds') or ','.join(SEARCH_KINDS)).split(',') if k)
+    unknown = [k for k in kinds if k not in SEARCH_KINDS]
+    if unknown:
+        return jsonify({'error': f"unknown kinds: {', '.join(unknown)}"}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', 10)), MAX_SEARCH_RESULTS))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    search_index.ensure_fresh()
+    results = search_index.search(query, kinds, language=request.args.get('language') or None,
+                                  user_id=current_user_id(), limit=limit)
+    return jsonify({'results': results, 'ready': search_index.ready})
+
+@app.route('/api/search/plans/<plan_id>', methods=['POST'])
+def reindex_search_plan(plan_id):
+    # Called after a plan is saved, edited or deleted so search sees it now
+    # rather than at the next periodic refresh. Only the owner may ask; a
+    # deleted plan simply leaves the index.
+    user_id = current_user_id()
+    if user_id is None:
+        return jsonify({'error': 'Sign in required'}), 401
+    try:
+        row = repository.get_plan(plan_id, 'user_id')
+        if row is not None and str(row.get('user_id')) != user_id:
+            return jsonify({'error': 'Not your plan'}), 403
+        found = search_index.reindex_plan(plan_id)
+    except Exception as e:
+        log.error("search.reindex_failed", plan_id=plan_id, error=e)
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'indexed': found})
 
 @app.route('/api/topics', methods=['GET'])
 def get_topics():
@@ -225,35 +550,135 @@ def get_topics():
     if not language:
         return jsonify({'error': 'Missing language parameter'}), 400
     try:
-        response = supabase.table('topics').select('topic, topic_order').eq('language', language).order('topic_order').execute()
-        topics = response.data if response.data else []
-        return jsonify({'topics': topics})
+        return response_cache.json(('topics', language), catalog.version(),
+                                   lambda: {'topics': catalog.topics(language)}, TOPICS_CACHE_CONTROL)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/code-games', methods=['GET'])
 def get_code_game():
-    language = request.args.get('language')
-    topic = request.args.get('topic')
-    difficulty = request.args.get('difficulty')
-
-    query = supabase.table('code_games').select('*')
-    if language:
-        query = query.eq('language', language)
-    if topic:
-        query = query.eq('topic', topic)
-    if difficulty:
-        query = query.eq('difficulty', difficulty)
-
-    res = query.execute()
-    games = res.data if hasattr(res, 'data') else []
-    if not games:
+    language = request.args.get('language') or None
+    topic = request.args.get('topic') or None
+    difficulty = request.args.get('difficulty') or None
+    # Optional: count (default 10), seed for a reproducible set, and a
+    # comma-separated list of already-seen game ids to exclude.
+    try:
+        count = pagination.parse_limit(request.args.get('count'), 10, MAX_CODE_GAMES, name='count')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    seed = request.args.get('seed') or None
+    exclude = [x for x in request.args.get('exclude', '').split(',') if x][:MAX_CODE_GAME_EXCLUDES]
+
+    if seed is None:
+        selected_games = sampler.sample(language, topic, difficulty, k=count, exclude=exclude)
+        if not selected_games:
+            return jsonify({'error': 'No code games found'}), 404
+        return response_cache.uncached_json(selected_games, RANDOM_CODE_GAMES_CACHE_CONTROL)
+
+    # A seeded sample is the same until the content changes
+    response = response_cache.json(
+        ('code_games', language, topic, difficulty, count, seed, tuple(exclude)), catalog.version(),
+        lambda: sampler.sample(language, topic, difficulty, k=count, seed=seed, exclude=exclude) or None,
+        CODE_GAMES_CACHE_CONTROL)
+    if response is None:
         return jsonify({'error': 'No code games found'}), 404
+    return response
 
-    import random
-    random.shuffle(games)
-    selected_games = games[:10]
-    return jsonify(selected_games)
+@app.route('/api/catalog/stats', methods=['GET'])
+def get_catalog_stats():
+    return jsonify(catalog.stats())
+
+@app.route('/api/plan-cache/stats', methods=['GET'])
+def get_plan_cache_stats():
+    return jsonify(plan_cache.stats())
+
+@app.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    # Cached report; ?refresh=1 asks for a background rebuild (see
+    # DB/analytics.py). 202 until the first report exists.
+    refresh = request.args.get('refresh') in ('1', 'true')
+    try:
+        report = analytics.get_report(repository, refresh=refresh)
+        if report is None:
+            return jsonify({"status": "computing"}), 202
+        return jsonify(report)
+    except Exception as e:
+        log.error("analytics.failed", error=e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/progress/stats', methods=['GET'])
+def get_progress_buffer_stats():
+    return jsonify(progress_buffer.stats())
+
+@app.route('/api/llm/stats', methods=['GET'])
+def get_llm_stats():
+    # Gateway counters plus per-model latency, success rate and routing order
+    return jsonify(dict(llm_gateway.stats(), order=llm_gateway.router.order()))
+
+# Components whose stats() are exported as gauges by /metrics
+METRIC_COMPONENTS = {
+    "catalog": catalog.stats,
+    "plan_cache": plan_cache.stats,
+    "progress_buffer": progress_buffer.stats,
+    "job_queue": job_queue.stats,
+    "llm_gateway": llm_gateway.stats,
+    "response_cache": response_cache.stats,
+    "review_scheduler": review_scheduler.stats,
+    "search": search_index.stats,
+}
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    # Prometheus text format: request/upstream histograms plus the current
+    # numbers of the caches and queues. Counts are per worker process.
+    gauges = []
+    for component, stats in METRIC_COMPONENTS.items():
+        try:
+            values = stats()
+        except Exception as e:
+            log.warning("metrics.stats_failed", component=component, error=e)
+            continue
+        if "hits" in values and "hit_rate" not in values:
+            lookups = values["hits"] + values["misses"]
+            values["hit_rate"] = round(values["hits"] / lookups, 4) if lookups else 0.0
+        for key, value in values.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                gauges.append((f"{component}_{key}", f"{component} {key.replace('_', ' ')}", {(): value}))
+    return Response(metrics.registry.render(gauges), mimetype="text/plain; version=0.0.4")
+
+def warm_content():
+    catalog.warm()
+    try:
+        sampler.refresh()
+    except Exception as e:
+        log.warning("code_games.warm_failed", error=e)
+    search_index.refresh()
+
+job_queue.register("generate-plan", job_handler("/generate-plan", generate_plan))
+job_queue.register("adapt-plan", job_handler("/adapt-plan", adapt_plan))
+
+_background_started = False
+_background_lock = threading.Lock()
+
+def start_background():
+    """Start this process's background work: the content warm-up and the job
+    queue workers. Called by the server (gunicorn's post_worker_init hook,
+    serve.py, app.run below), not on import, so tools and tests that import
+    the app do not start threads."""
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+    # Warm the content catalog in the background so startup is not blocked on the database
+    threading.Thread(target=warm_content, daemon=True).start()
+    job_queue.start()
+    atexit.register(job_queue.close)
+
+# Buffered progress deltas must not be lost when the server stops
+atexit.register(progress_buffer.close)
 
 if __name__ == "__main__":
-    app.run(host="127.0.0.1", port=5000, debug=True)
+    # Development server; use serve.py (gunicorn / waitress) in production
+    start_background()
+    app.run(host="127.0.0.1", port=5000, debug=os.getenv("FLASK_DEBUG", "1") == "1", threaded=True)
@@ -0,0 +1,135 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import request
+from dotenv import load_dotenv
+from logs import log
+
+load_dotenv()
+
+# Who is calling: the user id of the Supabase session the frontend sends as
+# "Authorization: Bearer <access token>".
+#
+# Routes that read or write a user's own data (plans, progress, review
+# schedule, jobs) take the user id from here and never from the query string
+# or body, which any client can set to someone else's id.
+#
+# With SUPABASE_JWT_SECRET (Project Settings -> API -> JWT secret) tokens are
+# checked locally: HS256 signature, expiry and the "authenticated" audience.
+# Without it each new token is checked once with Supabase Auth (which also
+# covers projects on asymmetric signing keys) and the answer is kept for
+# AUTH_CACHE_SECONDS, never past the token's own expiry.
+
+JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+AUDIENCE = "authenticated"
+LEEWAY_SECONDS = 30
+AUTH_CACHE_SECONDS = float(os.getenv("AUTH_CACHE_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = 10000
+
+
+class AuthError(Exception):
+    pass
+
+
+def _b64decode(part):
+    return base64.urlsafe_b64decode(part + '=' * (-len(part) % 4))
+
+
+def _claims(token):
+    """Header and payload of a JWT, without checking anything beyond both
+    being JSON objects."""
+    try:
+        header, payload, _ = token.split('.')
+        header, payload = json.loads(_b64decode(header)), json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        raise AuthError("malformed token")
+    if not isinstance(header, dict) or not isinstance(payload, dict):
+        raise AuthError("malformed token")
+    return header, payload
+
+
+def verify_hs256(token, secret, now=None):
+    """The claims of a valid HS256 token signed with secret. Raises AuthError."""
+    header, claims = _claims(token)
+    if header.get('alg') != 'HS256':
+        raise AuthError("unsupported token algorithm")
+    signed, _, signature = token.rpartition('.')
+    expected = hmac.new(secret.encode('utf-8'), signed.encode('ascii'), hashlib.sha256).digest()
+    try:
+        valid = hmac.compare_digest(expected, _b64decode(signature))
+    except ValueError:
+        valid = False
+    if not valid:
+        raise AuthError("bad token signature")
+    now = time.time() if now is None else now
+    if not isinstance(claims.get('exp'), (int, float)) or claims['exp'] + LEEWAY_SECONDS < now:
+        raise AuthError("token expired")
+    audience = claims.get('aud')
+    if AUDIENCE not in (audience if isinstance(audience, list) else [audience]):
+        raise AuthError("token is not for signed-in users")
+    if not claims.get('sub'):
+        raise AuthError("token has no subject")
+    return claims
+
+
+class _RemoteVerifier:
+    """Asks Supabase Auth who a token belongs to and remembers the answer."""
+
+    def __init__(self, ttl=AUTH_CACHE_SECONDS, max_entries=AUTH_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # sha256(token) -> (expires, user_id)
+        self._lock = threading.Lock()
+
+    def user_id(self, token):
+        key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+        _, claims = _claims(token)
+        if isinstance(claims.get('exp'), (int, float)) and claims['exp'] < now:
+            raise AuthError("token expired")
+        from DB.supabase_client import supabase
+        try:
+            user = supabase.auth.get_user(token).user
+        except Exception as e:
+            log.info("auth.rejected", error=e)
+            raise AuthError("invalid token")
+        if user is None:
+            raise AuthError("invalid token")
+        expires = min(now + self.ttl, claims.get('exp') or now + self.ttl)
+        with self._lock:
+            self._entries[key] = (expires, user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return user.id
+
+
+_remote = _RemoteVerifier()
+
+
+def user_id_for_token(token):
+    if JWT_SECRET:
+        return verify_hs256(token, JWT_SECRET)['sub']
+    return _remote.user_id(token)
+
+
+def current_user_id():
+    """The signed-in user's id for this request, or None when the request has
+    no valid Supabase access token."""
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None
+    try:
+        return str(user_id_for_token(token.strip()))
+    except AuthError as e:
+        log.debug("auth.invalid_token", reason=str(e))
+        return None
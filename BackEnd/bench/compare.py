@@ -0,0 +1,49 @@
+import argparse
+import json
+
+# Compare two benchmark results files (bench/run.py):
+#
+#   python -m bench.compare bench/results/<before>.json bench/results/<after>.json
+#
+# Prints p50/p99 latency and throughput per scenario and concurrency level
+# with the relative change; + on latency and - on throughput are slower.
+
+
+def _change(before, after):
+    if not before or after is None:
+        return '     -'
+    return f"{(after - before) / before * 100:+6.1f}%"
+
+
+def print_comparison(before, after):
+    old = {(r['scenario'], r['concurrency']): r for r in before['results']}
+    print(f"Before: {before.get('started_at')} {before.get('commit') or ''} {before.get('label') or ''}")
+    print(f"After:  {after.get('started_at')} {after.get('commit') or ''} {after.get('label') or ''}")
+    if before['config'].get('rows') != after['config'].get('rows'):
+        print(f"Note: different data sizes ({before['config'].get('rows')} vs {after['config'].get('rows')} rows)")
+    print(f"{'scenario':<16} {'conc':>4} {'p50 ms':>9} {'change':>8} {'p99 ms':>9} {'change':>8} "
+          f"{'rps':>8} {'change':>8}")
+    for result in after['results']:
+        previous = old.get((result['scenario'], result['concurrency']))
+        latency = result['latency_ms'] or {}
+        previous_latency = (previous or {}).get('latency_ms') or {}
+        print(f"{result['scenario']:<16} {result['concurrency']:>4} "
+              f"{latency.get('p50', '-'):>9} {_change(previous_latency.get('p50'), latency.get('p50')):>8} "
+              f"{latency.get('p99', '-'):>9} {_change(previous_latency.get('p99'), latency.get('p99')):>8} "
+              f"{result['throughput_rps']:>8} "
+              f"{_change((previous or {}).get('throughput_rps'), result['throughput_rps']):>8}")
+    print(f"Peak RSS: {(before.get('peak_rss_kb') or 0) / 1024:.1f} MiB -> "
+          f"{(after.get('peak_rss_kb') or 0) / 1024:.1f} MiB "
+          f"{_change(before.get('peak_rss_kb'), after.get('peak_rss_kb'))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark results files.")
+    parser.add_argument('before')
+    parser.add_argument('after')
+    args = parser.parse_args()
+    with open(args.before, encoding='utf-8') as f:
+        before = json.load(f)
+    with open(args.after, encoding='utf-8') as f:
+        after = json.load(f)
+    print_comparison(before, after)
@@ -0,0 +1,141 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the OpenRouter chat completions API (bench/run.py).
+#
+# Answers POST /v1/chat/completions with a plan in the "📆 Day N" format for
+# the number of days the prompt asks for, after `latency` seconds (plus up
+# to `jitter`). With "stream": true it sends the plan as SSE chunks of
+# `chunk_words` words, `token_interval` seconds apart, then a usage chunk
+# and [DONE]. `error_rate` of the requests get a 429 or 503, which exercises
+# the gateway's retries. `model_latency` ({model: seconds}) overrides the
+# latency for some models, to exercise hedging across models.
+
+DAYS_RE = re.compile(r'(\d+)-day')
+WINDOW_RE = re.compile(r'Write days (\d+) to (\d+) only')
+OUTLINE_RE = re.compile(r'^Days (\d+)-(\d+):$', re.MULTILINE)
+DEFAULT_DAYS = 7
+
+
+class Behaviour:
+    def __init__(self, latency=0.5, jitter=0.2, token_interval=0.01, chunk_words=4, error_rate=0.0,
+                 model_latency=None):
+        self.latency = latency
+        self.model_latency = model_latency or {}
+        self.jitter = jitter
+        self.token_interval = token_interval
+        self.chunk_words = chunk_words
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    def to_dict(self):
+        return {'latency': self.latency, 'jitter': self.jitter, 'token_interval': self.token_interval,
+                'chunk_words': self.chunk_words, 'error_rate': self.error_rate, 'model_latency': self.model_latency}
+
+
+def fake_plan(prompt):
+    window = WINDOW_RE.search(prompt)
+    if window:
+        first, last = int(window.group(1)), int(window.group(2))
+    else:
+        match = DAYS_RE.search(prompt)
+        first, last = 1, int(match.group(1)) if match else DEFAULT_DAYS
+    outline = OUTLINE_RE.findall(prompt)
+    if outline and not window:
+        return '\n'.join(f"Days {a}-{b}: part {i + 1}" for i, (a, b) in enumerate(outline))
+    start = date.today()
+    blocks = []
+    for day in range(first, last + 1):
+        when = start + timedelta(days=day - 1)
+        blocks.append(
+            f"📆 Day {day}: {when.strftime('%a %B %d %Y').lower()}\n**Topic {day}**\n\n"
+            f"Read the notes for topic {day}.\nSolve three exercises on topic {day}.\n"
+            f"Review what you learned on day {day}.\n\n" + '-' * 40)
+    return '\n\n'.join(blocks)
+
+
+def _handler(behaviour):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b'', content_type='application/json'):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            behaviour.requests += 1
+            latency = behaviour.model_latency.get(body.get('model'), behaviour.latency)
+            time.sleep(latency + random.uniform(0, behaviour.jitter))
+            if behaviour.error_rate and random.random() < behaviour.error_rate:
+                behaviour.errors += 1
+                self._send(random.choice((429, 503)))
+                return
+            prompt = body.get('messages', [{}])[0].get('content', '')
+            text = fake_plan(prompt)
+            usage = {'prompt_tokens': len(prompt.split()), 'completion_tokens': len(text.split())}
+            if not body.get('stream'):
+                out = {'model': body.get('model'), 'choices': [{'message': {'content': text}}], 'usage': usage}
+                self._send(200, json.dumps(out).encode('utf-8'))
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            words = text.split(' ')
+            try:
+                for i in range(0, len(words), behaviour.chunk_words):
+                    piece = ' '.join(words[i:i + behaviour.chunk_words]) + ' '
+                    chunk = {'choices': [{'delta': {'content': piece}}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                    time.sleep(behaviour.token_interval)
+                self.wfile.write(f"data: {json.dumps({'choices': [{'delta': {}}], 'usage': usage})}\n\n".encode('utf-8'))
+                self.wfile.write(b"data: [DONE]\n\n")
+            except (BrokenPipeError, ConnectionResetError):
+                behaviour.cancelled += 1  # the gateway closed a losing hedge
+
+    return Handler
+
+
+def start(behaviour, host='127.0.0.1', port=0):
+    """Serve in a background thread. Returns (server, completions url)."""
+    server = ThreadingHTTPServer((host, port), _handler(behaviour))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/v1/chat/completions"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenRouter server for benchmarks.")
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--token-interval', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--model-latency', action='append', default=[], metavar='MODEL=SECONDS',
+                        help='latency for one model (repeatable)')
+    args = parser.parse_args()
+    model_latency = {model: float(seconds) for model, _, seconds in (m.rpartition('=') for m in args.model_latency)}
+    server, url = start(Behaviour(args.latency, args.jitter, args.token_interval, error_rate=args.error_rate,
+                                  model_latency=model_latency), port=args.port)
+    print(f"Fake OpenRouter on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,483 @@
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import requests
+import pagination
+from bench import fake_openrouter
+from bench.compare import print_comparison
+from bench.synthetic import LANGUAGES, WORDS, plan_owner, seed, topic_names
+from DB.sqlite_repository import SQLiteRepository
+
+# Offline load and latency benchmark for the app.py routes.
+#
+#   cd BackEnd
+#   python -m bench.run                            # 10k rows, concurrency 1,8,32
+#   python -m bench.run --rows 1000000 --scenarios topics,code_games,progress_get
+#   python -m bench.run --baseline bench/results/<earlier run>.json
+#
+# The backend runs in its own process (bench/server.py) on the SQLite data
+# backend (DB/sqlite_repository.py) seeded by bench/synthetic.py, and a
+# local fake OpenRouter (bench/fake_openrouter.py), so nothing leaves the
+# machine. Every scenario is driven by `concurrency` closed-loop client
+# threads for --duration seconds; we report p50/p95/p99 latency (and time to
+# first byte for streams), throughput, errors and the server's RSS. Results
+# go to bench/results/ as JSON, and --baseline prints the change against an
+# earlier run.
+#
+# The client threads share this process with the fake OpenRouter, so at high
+# concurrency on cheap routes the numbers are partly the driver's limit.
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+DATA_DIR = os.path.join(BENCH_DIR, '.data')
+
+# The server checks bearer tokens against this secret (auth.py), and the
+# scenarios that touch a user's own data sign in as that user
+JWT_SECRET = 'bench-jwt-secret'
+GOALS = ['learn Python', 'learn SQL', 'learn JavaScript', 'learn Go', 'learn Java']
+PLAN_DAYS = 14
+
+
+class Context:
+    """What scenarios need to build requests: the seeded ids and names."""
+
+    def __init__(self, plans, rows):
+        self.plans = plans
+        self.rows = rows
+        self.plan_text = fake_openrouter.fake_plan(f"{PLAN_DAYS}-day")
+        self.counter = 0
+        self.tokens = {}
+        self.etags = {}
+        self.lock = threading.Lock()
+
+    def unique(self):
+        with self.lock:
+            self.counter += 1
+            return self.counter
+
+    def plan_id(self, rnd):
+        return rnd.randint(1, self.plans)
+
+    def auth(self, user_id):
+        """Authorization header for a Supabase-style access token of user_id."""
+        with self.lock:
+            token = self.tokens.get(user_id)
+            if token is None:
+                token = self.tokens[user_id] = _sign({'sub': user_id, 'aud': 'authenticated',
+                                                      'exp': int(time.time()) + 24 * 3600}, JWT_SECRET)
+        return {'Authorization': f"Bearer {token}"}
+
+    @staticmethod
+    def language_topic(rnd):
+        language = rnd.choice(LANGUAGES)
+        return language, rnd.choice(topic_names(language))
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _sign(claims, secret):
+    signed = '.'.join(_b64(json.dumps(part).encode('utf-8'))
+                      for part in ({'alg': 'HS256', 'typ': 'JWT'}, claims))
+    return signed + '.' + _b64(hmac.new(secret.encode('utf-8'), signed.encode('ascii'), hashlib.sha256).digest())
+
+
+# Each scenario builds a random request as (method, path, json body[, query
+# params[, headers]]); the FLOWS below drive several requests themselves.
+
+def _topics(ctx, rnd):
+    return 'GET', f"/api/topics?language={rnd.choice(LANGUAGES)}", None
+
+
+def _quiz_questions(ctx, rnd):
+    language, topic = ctx.language_topic(rnd)
+    return 'GET', '/api/quiz-questions', None, {'language': language, 'topic': topic}
+
+
+def _quiz_page(ctx, rnd):
+    # One keyset page starting anywhere in the table, as a client following
+    # next_cursor would ask for it
+    language = rnd.choice(LANGUAGES)
+    cursor = pagination.encode_cursor(rnd.randint(0, ctx.rows), ('quiz_questions', language, None))
+    return 'GET', '/api/quiz-questions', None, {'language': language, 'limit': 100, 'cursor': cursor,
+                                                  'fields': 'id,question,answer'}
+
+
+def _quiz_ndjson(ctx, rnd):
+    return 'GET', '/api/quiz-questions', None, {'language': rnd.choice(LANGUAGES), 'format': 'ndjson'}
+
+
+def _search(ctx, rnd):
+    # Half the searches are signed in and also cover that user's plans
+    query = ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 3)))
+    if rnd.random() < 0.3:
+        query = query[:rnd.randint(2, len(query))]  # autocomplete prefix
+    headers = ctx.auth(plan_owner(ctx.plan_id(rnd))) if rnd.random() < 0.5 else None
+    return 'GET', '/api/search', None, {'q': query}, headers
+
+
+def _code_games(ctx, rnd):
+    return 'GET', '/api/code-games', None, {'language': rnd.choice(LANGUAGES), 'count': 10}
+
+
+def _progress_get(ctx, rnd):
+    plan_id = ctx.plan_id(rnd)
+    return 'GET', f"/progress/{plan_id}", None, None, ctx.auth(plan_owner(plan_id))
+
+
+def _progress_update(ctx, rnd):
+    # Seeded plans have at least 7 days of at least 2 tasks; other keys are a 400
+    plan_id = ctx.plan_id(rnd)
+    deltas = [{'task': f"d{rnd.randint(1, 7)}t{rnd.randint(1, 2)}", 'done': rnd.random() < 0.8}
+              for _ in range(rnd.randint(1, 3))]
+    return 'POST', '/update-progress', {'plan_id': plan_id, 'deltas': deltas}, None, \
+        ctx.auth(plan_owner(plan_id))
+
+
+def _generate_cached(ctx, rnd):
+    return 'POST', '/generate-plan', {'goal': rnd.choice(GOALS), 'duration': PLAN_DAYS, 'startDate': 'today'}
+
+
+def _generate(ctx, rnd):
+    return 'POST', '/generate-plan', {'goal': f"learn topic {ctx.unique()}", 'duration': PLAN_DAYS,
+                                      'regenerate': True}
+
+
+def _generate_stream(ctx, rnd):
+    return 'POST', '/generate-plan', {'goal': f"learn topic {ctx.unique()}", 'duration': PLAN_DAYS,
+                                      'regenerate': True, 'stream': True}
+
+
+def _generate_draft(ctx, rnd):
+    return 'POST', '/generate-plan', {'goal': rnd.choice(GOALS), 'duration': 30, 'mode': 'draft'}
+
+
+def _adapt(ctx, rnd):
+    return 'POST', '/adapt-plan', {'plan': ctx.plan_text, 'progress': {'d1t1': True}, 'goal': 'learn Python',
+                                   'days': PLAN_DAYS, 'start_date': 'today'}
+
+
+def _adapt_stream(ctx, rnd):
+    body = dict(_adapt(ctx, rnd)[2], stream=True)
+    return 'POST', '/adapt-plan', body
+
+
+def _analytics(ctx, rnd):
+    return 'GET', '/api/analytics', None
+
+
+def _stats(ctx, rnd):
+    return 'GET', rnd.choice(['/api/catalog/stats', '/api/plan-cache/stats', '/api/progress/stats',
+                              '/api/jobs/stats', '/metrics']), None
+
+
+def _job(session, base_url, ctx, rnd):
+    """Submit an async plan and follow its event stream to the end. Latency
+    is submit to result."""
+    body = {'goal': f"learn topic {ctx.unique()}", 'duration': PLAN_DAYS, 'regenerate': True, 'async': True}
+    headers = ctx.auth(f"bench-{rnd.randint(1, 20)}")
+    response = session.post(base_url + '/generate-plan', json=body, headers=headers, timeout=120)
+    if response.status_code != 202:
+        return response.status_code, None
+    with session.get(base_url + response.json()['events_url'], headers=headers, stream=True, timeout=600) as events:
+        for line in events.iter_lines(decode_unicode=True):
+            if line == 'event: done':
+                return 200, None
+            if line == 'event: error':
+                return 500, None
+    return 599, None
+
+
+def _topics_revalidate(session, base_url, ctx, rnd):
+    """Conditional GET of a topics list the client already has, which
+    should be answered with 304. The first request per language learns the
+    ETag."""
+    language = rnd.choice(LANGUAGES)
+    headers = {'If-None-Match': ctx.etags[language]} if language in ctx.etags else None
+    response = session.get(base_url + '/api/topics', params={'language': language}, headers=headers, timeout=60)
+    response.content
+    if response.status_code == 200 and response.headers.get('ETag'):
+        ctx.etags[language] = response.headers['ETag']
+    return response.status_code, None
+
+
+def _review(session, base_url, ctx, rnd):
+    """One spaced-repetition session: fetch the due questions of a topic and
+    record an answer for each. Latency is both requests."""
+    language, topic = ctx.language_topic(rnd)
+    headers = ctx.auth(f"bench-{rnd.randint(1, 200)}")
+    response = session.get(base_url + '/api/review/next', params={'language': language, 'topic': topic, 'count': 10},
+                           headers=headers, timeout=60)
+    if response.status_code != 200:
+        return response.status_code, None
+    answers = [{'question_id': q['id'], 'quality': rnd.randint(0, 5)} for q in response.json()['questions']]
+    if not answers:
+        return 200, None
+    response = session.post(base_url + '/api/review/answers', json={'language': language, 'topic': topic,
+                                                                    'answers': answers},
+                            headers=headers, timeout=60)
+    return response.status_code, None
+
+
+FLOWS = (_job, _topics_revalidate, _review)
+
+# name -> (request factory, streams the response)
+SCENARIOS = {
+    'topics': (_topics, False),
+    'quiz_questions': (_quiz_questions, False),
+    'quiz_page': (_quiz_page, False),
+    'quiz_ndjson': (_quiz_ndjson, True),
+    'topics_304': (_topics_revalidate, False),
+    'code_games': (_code_games, False),
+    'progress_get': (_progress_get, False),
+    'progress_update': (_progress_update, False),
+    'generate_cached': (_generate_cached, False),
+    'generate_draft': (_generate_draft, False),
+    'generate': (_generate, False),
+    'generate_stream': (_generate_stream, True),
+    'adapt': (_adapt, False),
+    'adapt_stream': (_adapt_stream, True),
+    'job': (_job, False),
+    'review': (_review, False),
+    'search': (_search, False),
+    'analytics': (_analytics, False),
+    'stats': (_stats, False),
+}
+
+
+def _request(session, base_url, spec, stream):
+    method, path, body = spec[:3]
+    params = spec[3] if len(spec) > 3 else None
+    headers = spec[4] if len(spec) > 4 else None
+    started = time.perf_counter()
+    response = session.request(method, base_url + path, json=body, params=params, headers=headers,
+                               stream=stream, timeout=600)
+    ttfb = None
+    if stream:
+        for i, _ in enumerate(response.iter_content(chunk_size=None)):
+            if i == 0:
+                ttfb = time.perf_counter() - started
+    else:
+        response.content
+    response.close()
+    return response.status_code, ttfb
+
+
+def run_scenario(base_url, ctx, name, concurrency, duration, warmup):
+    factory, stream = SCENARIOS[name]
+    latencies, ttfbs, statuses = [], [], {}
+    lock = threading.Lock()
+    start_at = time.perf_counter() + warmup
+    stop_at = start_at + duration
+
+    def worker(index):
+        rnd = random.Random(f"{name}-{concurrency}-{index}")
+        session = requests.Session()
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                if factory in FLOWS:
+                    status, ttfb = factory(session, base_url, ctx, rnd)
+                else:
+                    status, ttfb = _request(session, base_url, factory(ctx, rnd), stream)
+            except requests.RequestException:
+                status, ttfb = 'error', None
+            elapsed = time.perf_counter() - started
+            if started < start_at:
+                continue  # warm-up
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status != 'error':
+                    latencies.append(elapsed)
+                    if ttfb is not None:
+                        ttfbs.append(ttfb)
+        session.close()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Requests still running at stop_at finish late; count the real span
+    elapsed = max(duration, time.perf_counter() - start_at)
+
+    errors = sum(n for status, n in statuses.items() if status == 'error' or status >= 500)
+    result = {
+        'scenario': name,
+        'concurrency': concurrency,
+        'requests': sum(statuses.values()),
+        'errors': errors,
+        'statuses': {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'latency_ms': _percentiles(latencies),
+    }
+    if ttfbs:
+        result['ttfb_ms'] = _percentiles(ttfbs)
+    return result
+
+
+def _percentiles(values):
+    if not values:
+        return None
+    ms = np.array(values) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {'p50': round(float(p50), 2), 'p95': round(float(p95), 2), 'p99': round(float(p99), 2),
+            'mean': round(float(ms.mean()), 2), 'max': round(float(ms.max()), 2)}
+
+
+def prepare_database(rows, plans, reuse):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"bench-{rows}-{plans}.sqlite3")
+    if os.path.exists(path) and reuse:
+        return path, 0.0
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    started = time.perf_counter()
+    seed(SQLiteRepository(path), rows, plans)
+    return path, round(time.perf_counter() - started, 2)
+
+
+def start_server(db_path, llm_url, port):
+    env = dict(os.environ,
+               FLASK_DEBUG='0',
+               LOG_LEVEL=os.getenv('LOG_LEVEL', 'warning'),
+               JOBS_DB_PATH=os.path.join(DATA_DIR, f"jobs-{port}.sqlite3"),
+               ANALYTICS_CACHE_PATH=os.path.join(DATA_DIR, f"analytics-{port}.json"),
+               PLAN_CACHE_PATH='',
+               SUPABASE_JWT_SECRET=JWT_SECRET)
+    for suffix in ('', '-wal', '-shm'):
+        path = env['JOBS_DB_PATH'] + suffix
+        if os.path.exists(path):
+            os.remove(path)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'bench.server', '--db', db_path, '--llm-url', llm_url, '--port', str(port)],
+        cwd=BACKEND_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("benchmark server exited during startup")
+        try:
+            requests.get(base_url + '/__bench/rss', timeout=1)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("benchmark server did not start")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load and latency benchmark for the backend routes.")
+    parser.add_argument('--rows', type=int, default=10000, help="quiz questions and code games to seed")
+    parser.add_argument('--plans', type=int, default=None, help="study plans to seed (default rows / 10)")
+    parser.add_argument('--concurrency', default='1,8,32', help="comma-separated client thread counts")
+    parser.add_argument('--duration', type=float, default=5.0, help="seconds per scenario and level")
+    parser.add_argument('--warmup', type=float, default=1.0)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--llm-latency', type=float, default=0.5)
+    parser.add_argument('--llm-jitter', type=float, default=0.2)
+    parser.add_argument('--llm-token-interval', type=float, default=0.01)
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--llm-model-latency', action='append', default=[], metavar='MODEL=SECONDS',
+                        help="fake latency for one model, to exercise hedging (repeatable)")
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--reuse-db', action='store_true', help="keep an already seeded database of this size")
+    parser.add_argument('--label', default='', help="name for the results file")
+    parser.add_argument('--output', default=None, help="results path (default bench/results/<time>.json)")
+    parser.add_argument('--baseline', default=None, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+    levels = [int(c) for c in args.concurrency.split(',')]
+    plans = args.plans if args.plans is not None else max(100, args.rows // 10)
+
+    db_path, seed_seconds = prepare_database(args.rows, plans, args.reuse_db)
+    print(f"Database: {args.rows} rows per content table, {plans} plans ({db_path}, seeded in {seed_seconds}s)")
+    model_latency = {model: float(seconds)
+                     for model, _, seconds in (m.rpartition('=') for m in args.llm_model_latency)}
+    behaviour = fake_openrouter.Behaviour(args.llm_latency, args.llm_jitter, args.llm_token_interval,
+                                          error_rate=args.llm_error_rate, model_latency=model_latency)
+    llm_server, llm_url = fake_openrouter.start(behaviour)
+    process, base_url = start_server(db_path, llm_url, args.port)
+    ctx = Context(plans, args.rows)
+
+    results = []
+    try:
+        startup_rss = requests.get(base_url + '/__bench/rss', timeout=10).json()
+        print(f"{'scenario':<16} {'conc':>4} {'reqs':>6} {'err':>4} {'rps':>8} "
+              f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rss MiB':>8}")
+        for name in scenarios:
+            for level in levels:
+                result = run_scenario(base_url, ctx, name, level, args.duration, args.warmup)
+                rss = requests.get(base_url + '/__bench/rss', timeout=10).json()
+                result['rss_kb'], result['peak_rss_kb'] = rss['rss_kb'], rss['peak_rss_kb']
+                results.append(result)
+                latency = result['latency_ms'] or {}
+                print(f"{name:<16} {level:>4} {result['requests']:>6} {result['errors']:>4} "
+                      f"{result['throughput_rps']:>8} {latency.get('p50', '-'):>9} {latency.get('p95', '-'):>9} "
+                      f"{latency.get('p99', '-'):>9} {(rss['rss_kb'] or 0) / 1024:>8.1f}", flush=True)
+        final_rss = requests.get(base_url + '/__bench/rss', timeout=10).json()
+    finally:
+        process.terminate()
+        try:
+            process.wait(30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        llm_server.shutdown()
+
+    report = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'label': args.label,
+        'commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'config': {
+            'rows': args.rows, 'plans': plans, 'concurrency': levels, 'duration': args.duration,
+            'warmup': args.warmup, 'scenarios': scenarios, 'llm': behaviour.to_dict(),
+        },
+        'seed_seconds': seed_seconds,
+        'startup_rss_kb': startup_rss['rss_kb'],
+        'peak_rss_kb': final_rss['peak_rss_kb'],
+        'llm_requests': behaviour.requests,
+        'llm_cancelled': behaviour.cancelled,
+        'results': results,
+    }
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{args.rows}{'-' + args.label if args.label else ''}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Peak server RSS {(report['peak_rss_kb'] or 0) / 1024:.1f} MiB. Results saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            print_comparison(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import logging
+import os
+import sys
+
+# Runs app.py against the benchmark stand-ins: the SQLite data backend
+# (DB/sqlite_repository.py) on the seeded file in place of Supabase, and the
+# given URL in place of OpenRouter. Started by bench/run.py in its own process, so the peak RSS it
+# reports is the server's alone:
+#
+#   python -m bench.server --db bench.sqlite3 --llm-url http://127.0.0.1:8099/v1/chat/completions
+
+
+def rss_kb():
+    """(current, peak) resident set size of this process in KiB."""
+    current = peak = None
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    current = int(line.split()[1])
+                elif line.startswith('VmHWM:'):
+                    peak = int(line.split()[1])
+    except OSError:
+        pass
+    if peak is None:
+        try:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if sys.platform == 'darwin':
+                peak //= 1024  # bytes on macOS
+        except ImportError:
+            pass
+    return current, peak
+
+
+def build_app(db_path, llm_url):
+    os.environ['DATA_BACKEND'] = 'sqlite'
+    os.environ['SQLITE_PATH'] = db_path
+
+    import app as backend
+    from flask import jsonify
+
+    backend.llm_gateway.url = llm_url
+    backend.llm_gateway.api_key = 'bench'
+    backend.start_background()
+
+    @backend.app.route('/__bench/rss', methods=['GET'])
+    def bench_rss():
+        current, peak = rss_kb()
+        return jsonify({'rss_kb': current, 'peak_rss_kb': peak, 'pid': os.getpid()})
+
+    return backend.app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the backend on the benchmark stand-ins.")
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--llm-url', required=True)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    from werkzeug.serving import make_server
+    app = build_app(args.db, args.llm_url)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # no access log per request
+    server = make_server(args.host, args.port, app, threaded=True)
+    print(f"Benchmark server on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
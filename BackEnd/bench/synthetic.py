@@ -0,0 +1,120 @@
+import json
+import random
+from datetime import date, timedelta
+from ai.planner import generate_study_plan
+from DB.progress_codec import storage_fields
+
+# Synthetic content and plans for the benchmark database (bench/run.py).
+#
+# seed(repository, rows) fills quiz_questions and code_games with `rows`
+# rows each, spread over LANGUAGES x TOPICS_PER_LANGUAGE topics, and
+# study_plan with rows // 10 plans (at least 100) with random progress and
+# feedback. Rows are written straight through the SQLite connection in
+# batches: seeding a million rows through the seeding pipeline would take
+# longer than the benchmark itself.
+
+LANGUAGES = ['Python', 'JavaScript', 'SQL', 'Java', 'Go']
+TOPICS_PER_LANGUAGE = 40
+DIFFICULTIES = ['basic', 'medium', 'advanced']
+GAME_TYPES = ['output', 'fill_blank', 'fix_bug']
+FEEDBACK = ['easy', 'hard', 'too hard', 'skipped']
+PLAN_TEMPLATES = 24
+BATCH = 10000
+
+WORDS = ("list dict set tuple loop function class module import index slice join query "
+         "table row column closure generator decorator iterator thread async await "
+         "string number error exception file path test mock").split()
+
+
+def topic_names(language):
+    return [f"{language} topic {i + 1}" for i in range(TOPICS_PER_LANGUAGE)]
+
+
+def _sentence(rnd, n):
+    return ' '.join(rnd.choice(WORDS) for _ in range(n))
+
+
+def _insert(conn, table, columns, rows):
+    sql = f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({",".join("?" * len(columns))})'
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            conn.executemany(sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+
+
+def _topics():
+    topic_id = 0
+    for language in LANGUAGES:
+        for order, topic in enumerate(topic_names(language), start=1):
+            topic_id += 1
+            yield topic_id, language, topic, order
+
+
+def _questions(rnd, rows, topic_count):
+    for i in range(rows):
+        options = [rnd.choice(WORDS) for _ in range(4)]
+        yield (i + 1, rnd.randint(1, topic_count), f"Q{i}: what does {_sentence(rnd, 6)} return?",
+               json.dumps(options), options[0], _sentence(rnd, 12))
+
+
+def _games(rnd, rows):
+    for i in range(rows):
+        language = rnd.choice(LANGUAGES)
+        yield (i + 1, language, rnd.choice(topic_names(language)), rnd.choice(DIFFICULTIES),
+               rnd.choice(GAME_TYPES), _sentence(rnd, 8), f"x = {rnd.randint(0, 99)}\nprint(x)",
+               str(rnd.randint(0, 99)), _sentence(rnd, 10))
+
+
+def plan_owner(plan_id):
+    """The user_id of a seeded plan; 5000 users share the plans round-robin."""
+    return f"user-{(plan_id - 1) % 5000}"
+
+
+def _plans(rnd, count):
+    # A few generated plans reused with different dates, progress and feedback
+    today = date.today()
+    templates = []
+    for i in range(PLAN_TEMPLATES):
+        language = LANGUAGES[i % len(LANGUAGES)]
+        days = rnd.choice([7, 14, 21, 30, 45, 60])
+        plan, structure = generate_study_plan(f"learn {language}", days, today.isoformat(),
+                                              topic_names(language), language)
+        templates.append((language, days, plan, structure))
+    for i in range(count):
+        language, days, plan, structure = rnd.choice(templates)
+        start = today - timedelta(days=rnd.randint(0, 365))
+        done_days = rnd.randint(0, days)
+        progress = {}
+        feedback = {}
+        for day in structure['days'][:done_days]:
+            for task in day['tasks']:
+                if rnd.random() < 0.85:
+                    progress[task['id']] = True
+                elif rnd.random() < 0.5:
+                    feedback[task['id']] = rnd.choice(FEEDBACK)
+        fields = storage_fields(progress)
+        yield (i + 1, plan_owner(i + 1), f"learn {language}", days, start.isoformat(),
+               f"{start.isoformat()}T12:00:00", plan, json.dumps(structure), json.dumps(fields['progress']),
+               fields.get('progress_bits'), json.dumps(feedback))
+
+
+def seed(repository, rows, plans=None, seed_value=1):
+    """Fill an empty SQLiteRepository database. Returns the row counts."""
+    rnd = random.Random(seed_value)
+    plans = plans if plans is not None else max(100, rows // 10)
+    conn = repository.connection()
+    conn.execute("BEGIN")
+    topics = list(_topics())
+    _insert(conn, 'topics', ('id', 'language', 'topic', 'topic_order'), topics)
+    _insert(conn, 'quiz_questions', ('id', 'topic_id', 'question', 'options', 'answer', 'explanation'),
+            _questions(rnd, rows, len(topics)))
+    _insert(conn, 'code_games', ('id', 'language', 'topic', 'difficulty', 'type', 'prompt', 'code_snippet',
+                                 'answer', 'explanation'), _games(rnd, rows))
+    _insert(conn, 'study_plan', ('id', 'user_id', 'goal', 'days', 'start_date', 'created_at', 'plan',
+                                 'structure', 'progress', 'progress_bits', 'feedback'), _plans(rnd, plans))
+    conn.execute("COMMIT")
+    return {'topics': len(topics), 'quiz_questions': rows, 'code_games': rows, 'study_plan': plans}
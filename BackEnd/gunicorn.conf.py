@@ -0,0 +1,70 @@
+import multiprocessing
+import os
+
+# Production server settings: gunicorn -c gunicorn.conf.py app:app
+# (or python serve.py, which also covers Windows).
+#
+# LLM calls spend most of their time waiting on OpenRouter, so each worker
+# process runs a pool of threads ("gthread"): a handful of slow /generate-plan
+# requests occupy threads, not whole processes, and /api/topics keeps being
+# served by the remaining threads. Set SERVER_WORKER_CLASS=gevent (with gevent
+# installed) for many more concurrent streams per process.
+#
+# Note: the content catalog, plan cache and progress buffer live in each
+# worker process. A progress delta buffered in one worker is invisible to the
+# others until it is flushed, so with more than one worker progress is
+# written through (PROGRESS_FLUSH_SECONDS=0, see DB/progress_buffer.py)
+# unless PROGRESS_FLUSH_SECONDS is set explicitly. The frontend already
+# batches rapid clicks into one request.
+#
+# Known limitation: this means no server-side write-behind in a multi-worker
+# deployment, one row write per /update-progress request. Run one worker
+# (SERVER_WORKERS=1, more SERVER_THREADS) to keep it. An explicit
+# PROGRESS_FLUSH_SECONDS with several workers is safe for writes
+# (conditional on progress_version), but a read served by another worker
+# can miss pending deltas for up to the window.
+
+cores = multiprocessing.cpu_count()
+
+bind = os.getenv("SERVER_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("SERVER_WORKERS", str(min(cores * 2 + 1, 9))))
+if workers > 1:
+    # Read by the workers when they import the app (preload_app is off)
+    os.environ.setdefault("PROGRESS_FLUSH_SECONDS", "0")
+worker_class = os.getenv("SERVER_WORKER_CLASS", "gthread")
+threads = int(os.getenv("SERVER_THREADS", "16"))
+worker_connections = int(os.getenv("SERVER_WORKER_CONNECTIONS", "1000"))  # gevent only
+
+# Streaming plans can run for minutes; the LLM gateway enforces its own
+# timeouts, so this only catches stuck workers.
+timeout = int(os.getenv("SERVER_TIMEOUT", "300"))
+graceful_timeout = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("SERVER_KEEPALIVE", "5"))
+
+# Recycle workers now and then so slow leaks cannot build up
+max_requests = int(os.getenv("SERVER_MAX_REQUESTS", "5000"))
+max_requests_jitter = max_requests // 10
+
+# Each worker loads the app itself: the catalog, caches and buffers are per
+# process, and the background threads (post_worker_init below) must start
+# after the fork.
+preload_app = False
+
+accesslog = os.getenv("SERVER_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("SERVER_LOG_LEVEL", "info")
+
+
+def post_worker_init(worker):
+    # Content warm-up and job queue workers run in each worker process
+    from app import start_background
+    start_background()
+
+
+def worker_exit(server, worker):
+    # Write buffered progress and hand unfinished jobs back to the queue
+    # before the worker goes away (SIGTERM, recycle)
+    from DB.progress_buffer import progress_buffer
+    from DB.job_queue import job_queue
+    progress_buffer.close()
+    job_queue.close()
@@ -0,0 +1,173 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional: without it responses are gzip-only
+    brotli = None
+
+# Conditional GET and compression for the content endpoints (/api/topics,
+# /api/quiz-questions, /api/code-games).
+#
+# A response is serialized once per (route, arguments, content version) and
+# kept in an LRU bounded by RESPONSE_CACHE_MAX_ENTRIES and
+# RESPONSE_CACHE_MAX_BYTES, together with its ETag and the gzip/brotli bodies
+# compressed so far, so an unchanged payload is neither re-encoded nor
+# re-compressed. ETags are weak ("W/"), derived from the content version and
+# a hash of the body; a request whose If-None-Match matches gets a 304 with
+# no body. The cache is dropped when the content version changes, and an
+# entry is rebuilt after RESPONSE_CACHE_TTL_SECONDS (the same body keeps its
+# ETag).
+#
+# Bodies under COMPRESS_MIN_BYTES are sent as they are.
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 6
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=600, min_compress_size=1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.min_compress_size = min_compress_size
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.compressions = 0
+        self.evictions = 0
+
+    def json(self, key, version, build, cache_control):
+        """Respond with build()'s payload as JSON, cached under (key, version).
+        build is only called on a miss; if it returns None nothing is cached
+        and json() returns None, for the caller to answer (e.g. with a 404)."""
+        entry = self._get(key, version)
+        if entry is None:
+            payload = build()
+            if payload is None:
+                return None
+            body = current_app.json.response(payload).get_data()
+            entry = {'body': body, 'etag': f"{version}-{hashlib.sha1(body).hexdigest()[:20]}", 'encoded': {}}
+            self._put(key, version, entry)
+        if request.if_none_match.contains_weak(entry['etag']):
+            with self._lock:
+                self.not_modified += 1
+            response = Response(status=304)
+        else:
+            response = self._send(entry, key)
+        response.set_etag(entry['etag'], weak=True)
+        response.headers['Cache-Control'] = cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def uncached_json(self, payload, cache_control):
+        """Compressed but neither cached nor validated: for payloads that
+        differ on every request (e.g. unseeded random samples)."""
+        entry = {'body': current_app.json.response(payload).get_data(), 'encoded': {}}
+        response = self._send(entry)
+        response.headers['Cache-Control'] = cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'compressions': self.compressions,
+                'evictions': self.evictions,
+                'brotli': brotli is not None,
+            }
+
+    def _get(self, key, version):
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            return None
+
+    def _put(self, key, version, entry):
+        size = len(entry['body'])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if version != self._version:
+                return  # content changed while building
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= _entry_size(old[1])
+            self._entries[key] = (time.monotonic() + self.ttl, entry)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= _entry_size(evicted)
+                self.evictions += 1
+
+    def _send(self, entry, key=None):
+        body = entry['body']
+        encoding = None
+        if len(body) >= self.min_compress_size:
+            encoding = request.accept_encodings.best_match(['br', 'gzip'] if brotli is not None else ['gzip'])
+        if encoding:
+            encoded = entry['encoded'].get(encoding)
+            if encoded is None:
+                encoded = _compress(body, encoding)
+                with self._lock:
+                    self.compressions += 1
+                    # Two threads may have compressed the same body at once;
+                    # the first result is kept.
+                    stored = entry['encoded'].setdefault(encoding, encoded)
+                    cached = self._entries.get(key)
+                    if stored is encoded and cached is not None and cached[1] is entry:
+                        self._bytes += len(encoded)
+                    encoded = stored
+            if len(encoded) < len(body):
+                response = Response(encoded, mimetype='application/json')
+                response.headers['Content-Encoding'] = encoding
+                return response
+        return Response(body, mimetype='application/json')
+
+
+def _compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _entry_size(entry):
+    return len(entry['body']) + sum(len(b) for b in entry['encoded'].values())
+
+
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "600")),
+    min_compress_size=int(os.getenv("COMPRESS_MIN_BYTES", "1024")),
+)
@@ -0,0 +1,63 @@
+import json
+import os
+import random
+import sys
+import time
+
+# Structured, level-gated logging for the backend.
+#
+#   log.info("plan.fallback", reason="timeout", days=30)
+#   log.debug("catalog.lookup", key=key, sample=0.01)   # 1 in 100 calls
+#
+# Lines go to stdout as "ts level event key=value ..." or, with
+# LOG_FORMAT=json, one JSON object per line. LOG_LEVEL (debug, info, warning,
+# error; default info) drops everything below it before any formatting, and
+# sample= keeps only that share of a noisy event.
+
+LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+LOG_LEVEL = LEVELS.get(os.getenv("LOG_LEVEL", "info").lower(), 20)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+MAX_VALUE_CHARS = 500  # long values (plans, payloads) are cut, never dumped
+
+
+def _value(value):
+    text = value if isinstance(value, str) else repr(value) if isinstance(value, Exception) else value
+    if isinstance(text, str) and len(text) > MAX_VALUE_CHARS:
+        return text[:MAX_VALUE_CHARS] + '...'
+    return text
+
+
+def _emit(level, event, sample=1.0, **fields):
+    if LEVELS[level] < LOG_LEVEL:
+        return
+    if sample < 1.0 and random.random() >= sample:
+        return
+    fields = {k: _value(v) for k, v in fields.items()}
+    if LOG_FORMAT == 'json':
+        line = json.dumps({'ts': round(time.time(), 3), 'level': level, 'event': event, **fields}, default=str)
+    else:
+        parts = [time.strftime('%Y-%m-%dT%H:%M:%S'), level.upper(), event]
+        parts += [f"{k}={json.dumps(v, default=str) if isinstance(v, str) and ' ' in v else v}"
+                  for k, v in fields.items()]
+        line = ' '.join(parts)
+    print(line, file=sys.stdout, flush=True)
+
+
+class _Logger:
+    def debug(self, event, **fields):
+        _emit('debug', event, **fields)
+
+    def info(self, event, **fields):
+        _emit('info', event, **fields)
+
+    def warning(self, event, **fields):
+        _emit('warning', event, **fields)
+
+    def error(self, event, **fields):
+        _emit('error', event, **fields)
+
+    def enabled(self, level):
+        return LEVELS[level] >= LOG_LEVEL
+
+
+log = _Logger()
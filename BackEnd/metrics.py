@@ -0,0 +1,212 @@
+import bisect
+import os
+import threading
+import time
+
+# In-process metrics, exposed by GET /metrics in the Prometheus text format.
+#
+#   http_request_duration_seconds      per route / method / status (middleware)
+#   db_request_duration_seconds        per backend / table / operation
+#   llm_request_duration_seconds       OpenRouter calls per model, plus
+#   llm_time_to_first_token_seconds    for streams and llm_tokens_total usage
+#   llm_hedges_total                   extra models started per request and
+#   llm_attempts_total                 how each model's attempts ended
+#
+# Cache hit rates and queue sizes are read from the components' stats() at
+# scrape time (see /metrics in app.py). Every series carries the process id:
+# with several gunicorn workers each scrape answers for the worker that
+# served it, so scrape workers individually or sum by the other labels.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PID = str(os.getpid())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.label_names = name, help_text, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.label_names = name, help_text, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, [('le', '+Inf')])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(name, help_text, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self, gauges=()):
+        """Prometheus text. gauges are extra (name, help, {labels tuple: value})
+        read at scrape time."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for name, help_text, values in gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in values.items():
+                lines.append(f"{name}{_labels([k for k, _ in labels], [v for _, v in labels])} {value}")
+        # Every series gets the process label
+        return '\n'.join(_with_pid(line) for line in lines) + '\n'
+
+
+def _with_pid(line):
+    if line.startswith('#'):
+        return line
+    name, _, value = line.rpartition(' ')
+    if name.endswith('}'):
+        return f'{name[:-1]},pid="{PID}"}} {value}'
+    return f'{name}{{pid="{PID}"}} {value}'
+
+
+registry = Registry()
+
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("route", "method", "status"))
+db_duration = registry.histogram(
+    "db_request_duration_seconds", "Database request latency (Supabase or SQLite, see DB/repository.py)",
+    ("backend", "table", "operation", "outcome"))
+llm_duration = registry.histogram(
+    "llm_request_duration_seconds", "OpenRouter request latency (headers received for streams)",
+    ("model", "mode", "outcome"))
+llm_ttft = registry.histogram(
+    "llm_time_to_first_token_seconds", "Time from request to the first streamed token", ("model",))
+llm_tokens = registry.counter("llm_tokens_total", "Tokens reported by OpenRouter", ("kind",))
+llm_retries = registry.counter("llm_retries_total", "Retried OpenRouter attempts", ("reason",))
+llm_hedges = registry.counter(
+    "llm_hedges_total", "Extra models started for a request (slow first token or failed model)", ("reason",))
+llm_attempts = registry.counter(
+    "llm_attempts_total", "Outcome of each model attempt (won, cancelled, error)", ("model", "outcome"))
+
+
+def install_flask(app):
+    """Time every request by its route rule (not the raw path, so ids in
+    URLs do not explode the label set)."""
+    from flask import request, g
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            http_duration.observe(time.perf_counter() - started, route, request.method, str(response.status_code))
+        return response
+
+
+# --- Supabase ------------------------------------------------------------------
+
+QUERY_OPERATIONS = ('select', 'insert', 'upsert', 'update', 'delete')
+
+
+class _TimedQuery:
+    """Wraps a postgrest query builder and times execute()."""
+
+    def __init__(self, builder, table, operation='select'):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+        operation = name if name in QUERY_OPERATIONS else self._operation
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, 'execute'):
+                return _TimedQuery(result, self._table, operation)
+            return result
+        return call
+
+    def execute(self):
+        started = time.perf_counter()
+        outcome = 'ok'
+        try:
+            return self._builder.execute()
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            db_duration.observe(time.perf_counter() - started, 'supabase', self._table, self._operation, outcome)
+
+
+class InstrumentedClient:
+    """Supabase client whose table() queries are timed; everything else is
+    passed through."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, name):
+        return _TimedQuery(self._client.table(name), name)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
@@ -0,0 +1,107 @@
+import base64
+import hashlib
+import json
+from logs import log
+
+# Keyset pagination, field projection and NDJSON streaming for large result
+# sets (/api/quiz-questions).
+#
+# Rows are ordered by id and a page is "the next `limit` rows after id X", so
+# a page costs the same wherever it starts and rows inserted meanwhile do not
+# shift later pages. The cursor handed to clients is opaque: base64 of the
+# last id plus a fingerprint of the query's filters, so a cursor cannot be
+# replayed against a different query. Streams read the same pages one batch
+# at a time, so memory per request does not grow with the result size.
+
+STREAM_BATCH = 500
+
+
+def _fingerprint(query):
+    return hashlib.sha1(json.dumps(query, default=str).encode()).hexdigest()[:12]
+
+
+def encode_cursor(after_id, query):
+    raw = json.dumps({'after': after_id, 'q': _fingerprint(query)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, query):
+    """The id a cursor points after, or None for no cursor. Raises
+    ValueError for a malformed cursor or one issued for another query."""
+    if not cursor:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        after_id = data['after']
+        fingerprint = data['q']
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('invalid cursor')
+    if fingerprint != _fingerprint(query):
+        raise ValueError('cursor does not belong to this query')
+    return after_id
+
+
+def parse_limit(value, default, maximum=None, name='limit'):
+    """A positive row count from a query parameter, capped at maximum.
+    Raises ValueError (naming the parameter) for anything else."""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+    if limit < 1:
+        raise ValueError(f'{name} must be at least 1')
+    return min(limit, maximum) if maximum else limit
+
+
+def parse_fields(value, allowed):
+    """The requested fields= columns (in the order given), or None for all.
+    Raises ValueError naming any unknown column."""
+    if not value:
+        return None
+    fields = list(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)} (allowed: {', '.join(allowed)})")
+    return fields or None
+
+
+def select_columns(fields, allowed):
+    """Column list for the query: the projection plus id, which the cursor needs."""
+    columns = fields or list(allowed)
+    return ', '.join(columns if 'id' in columns else ['id'] + columns)
+
+
+def project(row, fields):
+    if fields is None:
+        return row
+    return {f: row.get(f) for f in fields}
+
+
+def iter_rows(fetch_page, after_id=None, limit=None, batch=STREAM_BATCH):
+    """Yield rows from fetch_page(after_id, n) one batch at a time, until an
+    empty page or until limit rows have been yielded. A short page does not
+    end the walk: PostgREST caps pages at its max-rows setting."""
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = batch if remaining is None else min(batch, remaining)
+        rows = fetch_page(after_id, size)
+        if not rows:
+            return
+        for row in rows:
+            yield row
+        after_id = rows[-1]['id']
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def ndjson_lines(rows, fields=None):
+    # The status line is already sent when a later page fails, so the error
+    # goes out as a last {"error": ...} line; a stream without one is complete.
+    try:
+        for row in rows:
+            yield json.dumps(project(row, fields), separators=(',', ':'), default=str) + '\n'
+    except Exception as e:
+        log.error("ndjson.failed", error=e)
+        yield json.dumps({'error': str(e) or type(e).__name__}, separators=(',', ':')) + '\n'
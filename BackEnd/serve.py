@@ -0,0 +1,30 @@
+import os
+import sys
+
+# Production entry point.
+#
+#   python serve.py
+#
+# Runs gunicorn with gunicorn.conf.py on Linux/macOS. gunicorn does not run on
+# Windows, so there the app is served by waitress with a thread pool instead.
+# `python app.py` stays the development server.
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(here)
+    if sys.platform == "win32":
+        from waitress import serve
+        from app import app, start_background
+        start_background()
+        threads = int(os.getenv("SERVER_THREADS", "32"))
+        port = int(os.getenv("PORT", "5000"))
+        print(f"Serving on 0.0.0.0:{port} with waitress ({threads} threads)")
+        serve(app, host="0.0.0.0", port=port, threads=threads,
+              channel_timeout=int(os.getenv("SERVER_TIMEOUT", "300")))
+        return
+    os.execvp("gunicorn", ["gunicorn", "-c", os.path.join(here, "gunicorn.conf.py"), "app:app"])
+
+
+if __name__ == "__main__":
+    main()
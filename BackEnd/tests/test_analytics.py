@@ -0,0 +1,78 @@
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from DB import analytics
+from DB.analytics import build_columns, compute_report, get_report, load_plans
+
+
+def plan(plan_id, days, progress=None, start='2026-01-05', feedback=None):
+    return {'id': plan_id, 'days': len(days), 'start_date': start, 'created_at': None, 'progress': progress or {},
+            'progress_bits': None, 'feedback': feedback or {},
+            'structure': {'days': [{'day': i, 'title': title, 'tasks': [{'id': f"d{i}t{t}"} for t in range(1, n + 1)]}
+                                   for i, (title, n) in enumerate(days, start=1)]}}
+
+
+class CappedRepository:
+    """Serves at most `cap` rows per page, like PostgREST's max-rows."""
+
+    def __init__(self, rows, cap, delay=0):
+        self.rows, self.cap, self.delay = rows, cap, delay
+        self.calls = 0
+
+    def plans_page(self, columns, after_id, limit):
+        self.calls += 1
+        time.sleep(self.delay)
+        rows = [row for row in self.rows if after_id is None or row['id'] > after_id]
+        return rows[:min(limit, self.cap)]
+
+
+def test_short_pages_do_not_end_the_read():
+    rows = [plan(i, [('Basics', 2)]) for i in range(1, 8)]
+    assert [row['id'] for row in load_plans(CappedRepository(rows, cap=3), page_size=5)] == list(range(1, 8))
+
+
+def test_columns_count_done_tasks_per_day():
+    rows = [plan(1, [('Basics', 3), ('Loops', 2)], {'d1t1': True, 'd1t3': True, 'd2t1': True, 'd2t2': True}),
+            plan(2, [('basics', 2)], {'0-1': True}, start=None, feedback={'d1t1': 'Hard'}),
+            plan(3, [])]
+    columns = build_columns(rows)
+    assert columns['plan_days'].tolist() == [2, 1, 0]
+    assert columns['day_plan'].tolist() == [0, 0, 1]
+    assert columns['day_total'].tolist() == [3, 2, 2]
+    assert columns['day_done'].tolist() == [2, 2, 1]
+    assert columns['day_topic'].tolist() == [0, 1, 0] and columns['topics'] == ['basics', 'loops']
+    assert columns['label_rows'].tolist() == [2] and columns['label_kind'].tolist() == [1]
+    report = compute_report(columns, today=date(2026, 3, 1))
+    assert report['plans'] == 3
+
+
+@pytest.fixture
+def fresh_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics, '_report', None)
+    monkeypatch.setattr(analytics, '_refreshing', False)
+    return str(tmp_path / 'report.json')
+
+
+def wait_for_refresh():
+    for thread in threading.enumerate():
+        if thread.name == 'analytics-refresh':
+            thread.join(5)
+
+
+def test_requests_never_wait_for_the_rebuild(fresh_state):
+    repository = CappedRepository([plan(1, [('Basics', 2)], {'d1t1': True})], cap=10, delay=0.2)
+    started = time.time()
+    assert get_report(repository, path=fresh_state) is None
+    assert get_report(repository, path=fresh_state) is None
+    assert time.time() - started < 0.2
+    wait_for_refresh()
+    assert repository.calls == 2  # one rebuild: a page and the empty page after it
+    report = get_report(repository, path=fresh_state)
+    assert report['plans'] == 1
+    # A fresh report is not rebuilt, even on request, until MIN_REFRESH_INTERVAL has passed
+    assert get_report(repository, refresh=True, path=fresh_state) is report
+    wait_for_refresh()
+    assert repository.calls == 2
@@ -0,0 +1,52 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+
+from auth import AuthError, verify_hs256
+
+SECRET = 'test-secret'
+
+
+def b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def make_token(claims, secret=SECRET, alg='HS256'):
+    signed = b64(json.dumps({'alg': alg, 'typ': 'JWT'}).encode()) + '.' + b64(json.dumps(claims).encode())
+    signature = hmac.new(secret.encode(), signed.encode(), hashlib.sha256).digest()
+    return signed + '.' + b64(signature)
+
+
+def claims(**overrides):
+    return dict({'sub': 'user-1', 'aud': 'authenticated', 'exp': time.time() + 3600}, **overrides)
+
+
+def test_valid_token():
+    assert verify_hs256(make_token(claims()), SECRET)['sub'] == 'user-1'
+
+
+@pytest.mark.parametrize('token', [
+    make_token(claims(), secret='other-secret'),
+    make_token(claims(exp=time.time() - 3600)),
+    make_token(claims(aud='anon')),
+    make_token(claims(sub='')),
+    make_token(claims(), alg='none'),
+    make_token([]),
+    make_token(1),
+    b64(b'[]') + '.' + make_token(claims()).split('.', 1)[1],
+    'not-a-token',
+])
+def test_rejected_tokens(token):
+    with pytest.raises(AuthError):
+        verify_hs256(token, SECRET)
+
+
+def test_tampered_payload_is_rejected():
+    header, _, signature = make_token(claims()).split('.')
+    forged = header + '.' + b64(json.dumps(claims(sub='user-2')).encode()) + '.' + signature
+    with pytest.raises(AuthError):
+        verify_hs256(forged, SECRET)
@@ -0,0 +1,36 @@
+from DB import catalog as catalog_module
+from DB.catalog import ContentCatalog
+
+
+class FakeRepository:
+    def __init__(self, games):
+        self.games = games
+        self.game_queries = []
+
+    def content_version(self):
+        return 1
+
+    def all_topics(self):
+        return [{'id': 1, 'language': 'Python', 'topic': 'Loops', 'topic_order': 1}]
+
+    def quiz_questions(self, topic_ids=None):
+        return [{'id': 10, 'topic_id': 1, 'question': 'What does range(3) yield?'}]
+
+    def code_games(self, ids=None):
+        self.game_queries.append(ids)
+        return [g for g in self.games if ids is None or g['id'] in ids]
+
+
+def test_warming_many_games_keeps_topics_and_questions(monkeypatch):
+    repository = FakeRepository([{'id': i} for i in range(1, 101)])
+    monkeypatch.setattr(catalog_module, 'repository', repository)
+    catalog = ContentCatalog(max_entries=2, max_games=10)
+    catalog.warm()
+    stats = catalog.stats()
+    assert (stats['size'], stats['games']) == (2, 10)
+    assert catalog.topics('Python') == [{'topic': 'Loops', 'topic_order': 1}]
+    assert catalog.quiz_questions('Python', 'Loops')[0]['id'] == 10
+    assert catalog.stats()['misses'] == 0
+    # The most recent games were kept; the others are fetched in one query
+    assert catalog.code_games_by_id([100, 3, 4]) == [{'id': 100}, {'id': 3}, {'id': 4}]
+    assert repository.game_queries[-1] == [3, 4]
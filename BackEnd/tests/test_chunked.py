@@ -0,0 +1,61 @@
+import re
+import threading
+
+import pytest
+
+from ai.chunked import generate_chunked_plan, plan_windows
+
+WINDOW_RE = re.compile(r'Write days (\d+) to (\d+) only')
+
+
+def day_blocks(first, last):
+    return '\n\n'.join(f"📆 Day {day}: 2026-01-01\n**Topic {day}**\n\nRead the notes.\nSolve the exercises."
+                       for day in range(first, last + 1))
+
+
+class FakeLLM:
+    """Answers window prompts with every day of the window, except that the
+    first `short` answers for the window starting at `short_first` drop its
+    last day."""
+
+    def __init__(self, short_first=None, short=0):
+        self.short_first = short_first
+        self.short = short
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt):
+        match = WINDOW_RE.search(prompt)
+        if match is None:
+            return ''  # outline: every window falls back to the goal
+        first, last = int(match.group(1)), int(match.group(2))
+        with self._lock:
+            self.calls[first] = self.calls.get(first, 0) + 1
+            calls = self.calls[first]
+        if first == self.short_first and calls <= self.short:
+            last -= 1
+        return day_blocks(first, last)
+
+
+def test_plan_windows_cover_every_day():
+    assert plan_windows(45, 14) == [(1, 14), (15, 28), (29, 42), (43, 45)]
+
+
+def test_windows_are_stitched_into_one_continuous_plan():
+    plan, structure = generate_chunked_plan('learn Python', 45, '2026-01-01', FakeLLM())
+    assert [day['day'] for day in structure['days']] == list(range(1, 46))
+    assert structure['days'][-1]['date'] == '2026-02-14'
+    assert structure['days'][14]['tasks'][0]['id'] == 'd15t1'
+    assert plan.count('📆 Day') == 45
+
+
+def test_a_short_window_is_asked_for_again():
+    llm = FakeLLM(short_first=15, short=1)
+    _, structure = generate_chunked_plan('learn Python', 45, '2026-01-01', llm)
+    assert len(structure['days']) == 45
+    assert llm.calls[15] == 2 and llm.calls[1] == 1
+
+
+def test_a_window_that_stays_short_fails_the_plan():
+    with pytest.raises(ValueError, match='13 of 14 days for days 15-28'):
+        generate_chunked_plan('learn Python', 45, '2026-01-01', FakeLLM(short_first=15, short=2))
@@ -0,0 +1,50 @@
+import random
+
+import numpy as np
+
+from DB.dedup import drop_near_duplicates, minhash_signatures, near_duplicate_clusters, normalize, shingles
+
+ROWS = [
+    {'question': 'Which functools function is used to cache the results of expensive function calls so repeated '
+                 'calls with the same arguments are fast?', 'answer': 'lru_cache'},
+    {'question': 'Which functools function caches the results of expensive function calls so repeated calls with '
+                 'the same arguments are fast?', 'answer': 'lru_cache'},
+    {'question': 'Which itertools function returns elements as long as the predicate is true?',
+     'answer': 'takewhile'},
+    {'question': 'Which itertools function returns elements as long as the predicate is false?',
+     'answer': 'dropwhile'},
+    {'question': 'What does SELECT DISTINCT do in SQL?', 'answer': 'removes duplicate rows'},
+    {'question': 'Which collections class can be used to create a stack with fast append and pop?',
+     'answer': 'deque'},
+]
+
+
+def test_normalize_drops_punctuation_and_filler_words():
+    assert normalize('Which function is used to CACHE results?') == ['cache', 'results']
+    assert shingles(['cache', 'results', 'fast']) == {'cache results', 'results fast'}
+    assert shingles(['deque']) == {'deque'}
+
+
+def test_signature_agreement_estimates_jaccard():
+    rnd = random.Random(3)
+    words = [f"w{i}" for i in range(400)]
+    base = rnd.sample(words, 200)
+    close = base[:180] + rnd.sample(words, 20)
+    first, second, other = minhash_signatures([base, close, rnd.sample(words, 200)], num_perm=256)
+    exact = len(shingles(base) & shingles(close)) / len(shingles(base) | shingles(close))
+    assert abs((first == second).mean() - exact) < 0.12
+    assert (first == other).mean() < 0.1
+
+
+def test_paraphrases_cluster_but_different_answers_do_not():
+    assert near_duplicate_clusters(ROWS, key=None) == [[0, 1], [2, 3]]
+    assert near_duplicate_clusters(ROWS) == [[0, 1]]
+    kept, clusters = drop_near_duplicates(ROWS)
+    assert kept == ROWS[:1] + ROWS[2:] and clusters == [[0, 1]]
+
+
+def test_identical_questions_always_cluster():
+    rows = ROWS + [dict(ROWS[4]), dict(ROWS[4])]
+    assert [4, 6, 7] in near_duplicate_clusters(rows)
+    assert near_duplicate_clusters(ROWS[:1]) == []
+    assert np.array_equal(minhash_signatures([['a', 'b']]), minhash_signatures([['a', 'b']]))
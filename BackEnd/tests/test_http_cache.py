@@ -0,0 +1,73 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask, request
+
+import http_cache
+from http_cache import ResponseCache
+
+ROWS = [{'id': i, 'question': f"What does snippet {i} print?"} for i in range(200)]
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config['cache'] = cache = ResponseCache(min_compress_size=100)
+    app.config['builds'] = builds = []
+    app.config['version'] = 1
+
+    @app.route('/rows')
+    def rows():
+        def build():
+            builds.append(1)
+            return ROWS[:int(request.args.get('n', len(ROWS)))] or None
+        response = cache.json(('rows', request.args.get('n')), app.config['version'], build, 'public, max-age=60')
+        return response if response is not None else ({'error': 'none'}, 404)
+
+    return app.test_client()
+
+
+def test_matching_etag_gets_304_without_rebuilding(client):
+    first = client.get('/rows', headers={'Accept-Encoding': 'identity'})
+    assert first.status_code == 200 and json.loads(first.data) == ROWS
+    etag = first.headers['ETag']
+    assert etag.startswith('W/"1-')
+    assert first.headers['Cache-Control'] == 'public, max-age=60'
+    again = client.get('/rows', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+    assert again.headers['ETag'] == etag
+    assert client.application.config['builds'] == [1]
+    assert client.application.config['cache'].stats()['not_modified'] == 1
+
+
+def test_a_new_content_version_changes_the_etag(client):
+    etag = client.get('/rows').headers['ETag']
+    client.application.config['version'] = 2
+    response = client.get('/rows', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'].startswith('W/"2-')
+    assert client.application.config['builds'] == [1, 1]
+
+
+def test_bodies_are_compressed_once_per_encoding(client):
+    response = client.get('/rows', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data)) == ROWS
+    client.get('/rows', headers={'Accept-Encoding': 'gzip'})
+    assert client.application.config['cache'].stats()['compressions'] == 1
+
+
+def test_brotli_is_preferred_when_installed(client):
+    response = client.get('/rows', headers={'Accept-Encoding': 'br, gzip'})
+    if http_cache.brotli is None:
+        assert response.headers['Content-Encoding'] == 'gzip'
+    else:
+        assert response.headers['Content-Encoding'] == 'br'
+        assert json.loads(http_cache.brotli.decompress(response.data)) == ROWS
+
+
+def test_small_bodies_and_missing_payloads(client):
+    small = client.get('/rows?n=1', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers and json.loads(small.data) == ROWS[:1]
+    assert client.get('/rows?n=0').status_code == 404
@@ -0,0 +1,21 @@
+from DB.job_queue import JobQueue
+
+
+def test_jobs_are_only_visible_to_their_owner(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), workers=0)
+    queue.register('echo', lambda job: (200, job['payload']))
+    job_id = queue.submit('echo', {'goal': 'x'}, 'alice')
+    assert queue.get(job_id, 'bob') is None
+    job = queue.get(job_id, 'alice')
+    assert job['status'] == 'queued' and job['position'] == 1 and 'user_id' not in job
+    assert not queue.cancel(job_id, 'bob')
+    assert queue.cancel(job_id, 'alice')
+    assert queue.get(job_id)['status'] == 'cancelled'
+
+
+def test_nothing_is_opened_until_first_use(tmp_path):
+    path = tmp_path / 'jobs.sqlite3'
+    queue = JobQueue(str(path))
+    queue.register('echo', lambda job: (200, job['payload']))
+    assert not path.exists()
+    assert queue.stats()['queued'] == 0 and path.exists()
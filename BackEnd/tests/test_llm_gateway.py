@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+
+import pytest
+
+from ai.llm_gateway import LLMError, LLMGateway
+
+
+class FakeResponse:
+    def __init__(self, status_code, text='', headers=None, stall=0):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text
+        self.stall = stall
+        self.closed = False
+
+    def iter_lines(self, decode_unicode=False):
+        # A role-only chunk and an empty delta come first, like OpenRouter's
+        opening = [{'choices': [{'delta': {'role': 'assistant', 'content': None}}]},
+                   {'choices': [{'delta': {'content': ''}}]}]
+        for chunk in opening:
+            yield f"data: {json.dumps(chunk)}"
+        time.sleep(self.stall)
+        chunk = {'choices': [{'delta': {'content': self.text}}]}
+        for line in (f"data: {json.dumps(chunk)}", "data: [DONE]"):
+            if self.closed:
+                return
+            yield line
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """Answers per model: 'busy' models always return 503 with a long
+    Retry-After, 'flaky' ones return 503 a number of times before they
+    answer, 'slow' ones answer after a delay, 'stalling' ones send empty
+    chunks and then wait before the first token, the rest answer right
+    away."""
+
+    def __init__(self, busy=(), slow=None, stalling=None, flaky=None):
+        self.busy = set(busy)
+        self.flaky = dict(flaky or {})
+        self.slow = slow or {}
+        self.stalling = stalling or {}
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def post(self, url, json=None, headers=None, timeout=None, stream=False):
+        model = json['model']
+        with self.lock:
+            self.calls[model] = self.calls.get(model, 0) + 1
+            flaky = self.flaky.get(model, 0)
+            if flaky:
+                self.flaky[model] = flaky - 1
+        if flaky:
+            return FakeResponse(503)
+        if model in self.busy:
+            return FakeResponse(503, headers={'Retry-After': '5'})
+        time.sleep(self.slow.get(model, 0))
+        return FakeResponse(200, text=f"answer from {model}", stall=self.stalling.get(model, 0))
+
+
+def gateway(session, models=('a', 'b'), **kwargs):
+    options = dict(hedge_after=0.05, latency_budget=2.0, backoff_base=5.0, backoff_max=5.0,
+                   max_concurrency=2, queue_timeout=0.5)
+    options.update(kwargs)
+    gw = LLMGateway('key', url='http://fake', models=models, **options)
+    gw.session = session
+    return gw
+
+
+def test_complete_uses_first_model():
+    gw = gateway(FakeSession())
+    assert gw.complete('hello') == 'answer from a'
+    assert gw.hedges == 0
+
+
+def test_slow_model_is_hedged():
+    session = FakeSession(slow={'a': 0.5})
+    gw = gateway(session)
+    assert gw.complete('hello') == 'answer from b'
+    assert gw.hedges == 1
+    assert gw.router.stats()['a']['cancelled'] == 1
+
+
+def test_cancelled_attempt_stops_retrying_and_frees_its_slot(monkeypatch):
+    # 'a' keeps answering 503 and would back off for seconds between
+    # retries; once 'b' wins, 'a' must stop and give its slot back at once.
+    # No jitter, or a near-zero backoff lets 'a' retry before 'b' wins.
+    monkeypatch.setattr('ai.llm_gateway.random.uniform', lambda low, high: high)
+    session = FakeSession(busy={'a'})
+    gw = gateway(session, max_retries=5)
+    started = time.monotonic()
+    assert gw.complete('hello') == 'answer from b'
+    assert time.monotonic() - started < 1.0
+    assert gw._slots.acquire(timeout=0.1)
+    assert gw._slots.acquire(timeout=0.1)
+    time.sleep(0.1)
+    assert session.calls['a'] == 1
+
+
+def test_stream_releases_slot_on_close():
+    gw = gateway(FakeSession(), max_concurrency=1)
+    stream = gw.stream('hello')
+    stream.close()
+    assert gw._slots.acquire(timeout=0.1)
+
+
+def test_pinned_model_is_not_routed():
+    session = FakeSession()
+    gw = gateway(session)
+    assert gw.complete('hello', model='b') == 'answer from b'
+    assert 'a' not in session.calls
+
+
+def test_empty_chunks_are_not_a_first_token():
+    gw = gateway(FakeSession(stalling={'a': 0.5}))
+    stream = gw.stream('hello')
+    assert stream._attempt.model == 'b'
+    stream.close()
+    assert gw.stats()['hedges'] == 1
+
+
+def test_identical_concurrent_prompts_make_one_upstream_call():
+    session = FakeSession(slow={'a': 0.2})
+    gw = gateway(session, models=('a',))
+    answers = []
+    threads = [threading.Thread(target=lambda: answers.append(gw.complete('same prompt'))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert answers == ['answer from a', 'answer from a']
+    assert session.calls == {'a': 1}
+    assert gw.stats()['coalesced'] == 1 and gw.stats()['in_flight'] == 0
+
+
+def test_a_503_is_retried_and_then_succeeds():
+    session = FakeSession(flaky={'a': 1})
+    gw = gateway(session, models=('a',), backoff_base=0.01, backoff_max=0.01)
+    assert gw.complete('hello') == 'answer from a'
+    assert session.calls == {'a': 2}
+    assert (gw.stats()['calls'], gw.stats()['retries'], gw.stats()['failures']) == (2, 1, 0)
+
+
+def test_calls_beyond_the_concurrency_limit_wait_and_then_fail():
+    gw = gateway(FakeSession(slow={'a': 0.4}), models=('a',), max_concurrency=1, queue_timeout=0.1)
+    running = threading.Thread(target=gw.complete, args=('first',))
+    running.start()
+    time.sleep(0.05)
+    with pytest.raises(LLMError) as error:
+        gw.complete('second')
+    assert error.value.status_code == 503
+    running.join()
+    assert gw.complete('second') == 'answer from a'
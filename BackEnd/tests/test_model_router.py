@@ -0,0 +1,61 @@
+from ai.model_router import ModelRouter
+
+
+def test_untried_models_keep_configured_order():
+    router = ModelRouter(['a', 'b', 'c'], prior_latency=4.0)
+    assert router.order() == ['a', 'b', 'c']
+
+
+def test_faster_model_moves_ahead():
+    router = ModelRouter(['a', 'b'], prior_latency=4.0)
+    router.record_first_token('a', 6.0)
+    router.record_success('a')
+    router.record_first_token('b', 1.0)
+    router.record_success('b')
+    assert router.order() == ['b', 'a']
+
+
+def test_failing_model_drops_behind():
+    router = ModelRouter(['a', 'b'], prior_latency=4.0)
+    for _ in range(5):
+        router.record_first_token('a', 1.0)
+        router.record_error('a')
+        router.record_first_token('b', 2.0)
+        router.record_success('b')
+    assert router.order() == ['b', 'a']
+
+
+def test_latency_is_an_ewma():
+    router = ModelRouter(['a'], prior_latency=4.0)
+    router.record_first_token('a', 2.0)
+    router.record_first_token('a', 4.0)
+    assert router.stats()['a']['latency'] == 2.4
+
+
+def test_early_cancel_does_not_lower_latency():
+    # B loses the race after 0.3s without a token while A answers at 4s:
+    # B's real latency is unknown but > 0.3s, so it must not overtake A
+    router = ModelRouter(['a', 'b'], prior_latency=4.0)
+    router.record_first_token('a', 4.0)
+    router.record_success('a')
+    router.record_cancelled('b', 0.3, had_first_token=False)
+    assert router.order() == ['a', 'b']
+    assert router.stats()['b']['latency'] is None
+
+
+def test_late_cancel_raises_latency():
+    router = ModelRouter(['a', 'b'], prior_latency=4.0)
+    router.record_first_token('b', 2.0)
+    router.record_cancelled('b', 12.0, had_first_token=False)
+    assert router.stats()['b']['latency'] == 4.0
+    router.record_cancelled('b', 1.0, had_first_token=False)
+    assert router.stats()['b']['latency'] == 4.0
+
+
+def test_cancel_after_first_token_keeps_latency():
+    router = ModelRouter(['a'], prior_latency=4.0)
+    router.record_first_token('a', 1.0)
+    router.record_cancelled('a', 9.0, had_first_token=True)
+    stats = router.stats()['a']
+    assert stats['latency'] == 1.0
+    assert stats['cancelled'] == 1
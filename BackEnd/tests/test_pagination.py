@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from bench.synthetic import seed
+from DB.sqlite_repository import SQLiteRepository
+from pagination import (decode_cursor, encode_cursor, iter_rows, ndjson_lines, parse_fields, parse_limit,
+                        select_columns)
+
+FIELDS = ['id', 'question', 'options', 'answer', 'explanation']
+
+
+def test_ndjson_ends_with_an_error_line_when_a_page_fails():
+    def fetch_page(after_id, n):
+        if after_id is not None:
+            raise RuntimeError('database went away')
+        return [{'id': i, 'question': f"Q{i}"} for i in range(1, n + 1)]
+
+    lines = [json.loads(line) for line in ndjson_lines(iter_rows(fetch_page, batch=2), ['question'])]
+    assert lines == [{'question': 'Q1'}, {'question': 'Q2'}, {'error': 'database went away'}]
+
+
+def test_short_pages_do_not_end_the_walk():
+    # The server caps pages at 3 rows whatever was asked for
+    def fetch_page(after_id, n):
+        start = (after_id or 0) + 1
+        return [{'id': i} for i in range(start, min(start + min(n, 3), 11))]
+
+    assert [row['id'] for row in iter_rows(fetch_page, batch=5)] == list(range(1, 11))
+    assert [row['id'] for row in iter_rows(fetch_page, after_id=2, limit=4, batch=5)] == [3, 4, 5, 6]
+
+
+def test_parse_limit_names_the_parameter():
+    assert parse_limit(None, 10, 50, name='count') == 10
+    assert parse_limit('80', 10, 50, name='count') == 50
+    for value, message in (('0', 'count must be at least 1'), ('-3', 'count must be at least 1'),
+                           ('ten', 'count must be an integer')):
+        with pytest.raises(ValueError, match=message):
+            parse_limit(value, 10, 50, name='count')
+
+
+def test_cursor_round_trips_for_its_own_query_only():
+    query = ('quiz_questions', 'Python', None)
+    cursor = encode_cursor(1234, query)
+    assert decode_cursor(cursor, query) == 1234
+    assert decode_cursor(None, query) is None and decode_cursor('', query) is None
+    with pytest.raises(ValueError, match='does not belong'):
+        decode_cursor(cursor, ('quiz_questions', 'SQL', None))
+    for bad in ('not a cursor', encode_cursor(1, query)[:-3], 'e30'):
+        with pytest.raises(ValueError):
+            decode_cursor(bad, query)
+
+
+def test_fields_are_checked_and_id_is_always_selected():
+    assert parse_fields(None, FIELDS) is None
+    assert parse_fields('answer, question,answer', FIELDS) == ['answer', 'question']
+    with pytest.raises(ValueError, match='unknown fields: secret'):
+        parse_fields('question,secret', FIELDS)
+    assert select_columns(['question'], FIELDS) == 'id, question'
+    assert select_columns(None, FIELDS) == ', '.join(FIELDS)
+
+
+def test_keyset_pages_cover_the_table_once(tmp_path):
+    repository = SQLiteRepository(str(tmp_path / 'content.sqlite3'))
+    seed(repository, 1200, plans=0)
+
+    def fetch_page(after_id, n):
+        return repository.quiz_questions_page(None, 'id, question', after_id, n)
+
+    ids = [row['id'] for row in iter_rows(fetch_page, batch=500)]
+    assert ids == list(range(1, 1201))
+    assert [row['id'] for row in iter_rows(fetch_page, after_id=1000, limit=150, batch=100)] == list(range(1001, 1151))
+    topic_ids = [1, 2]
+    page = repository.quiz_questions_page(topic_ids, 'id, topic_id', None, 5000)
+    assert page and {row['topic_id'] for row in page} <= set(topic_ids)
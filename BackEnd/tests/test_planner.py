@@ -0,0 +1,88 @@
+from ai.planner import (PlanParser, detect_language, generate_study_plan, join_day_blocks, parse_days, parse_plan,
+                        renumber_days)
+
+PLAN = """Here is your plan:
+
+📆 Day 1: sun july 20 2025
+**Basics & Syntax**
+
+- Install Python and run a script.
+* Read about variables.
+1. Write a hello world program.
+
+------------------------------------------------------------------------------------------
+
+📆 Day 2: mon july 21 2025
+**Data Types**
+
+Practice with lists and dicts.
+"""
+
+
+def test_parse_plan_reads_days_titles_and_tasks():
+    days = parse_plan(PLAN)['days']
+    assert [day['day'] for day in days] == [1, 2]
+    assert days[0]['date'] == '2025-07-20'
+    assert days[0]['title'] == 'Basics & Syntax'
+    assert days[0]['tasks'] == [
+        {'id': 'd1t1', 'text': 'Install Python and run a script.'},
+        {'id': 'd1t2', 'text': 'Read about variables.'},
+        {'id': 'd1t3', 'text': 'Write a hello world program.'},
+    ]
+    assert days[1]['tasks'] == [{'id': 'd2t1', 'text': 'Practice with lists and dicts.'}]
+
+
+def test_chunks_of_any_size_parse_like_the_whole_text():
+    for size in (1, 7, 64):
+        parser = PlanParser()
+        days = []
+        for i in range(0, len(PLAN), size):
+            days.extend(parser.feed(PLAN[i:i + size]))
+        days.extend(parser.close())
+        assert days == parse_plan(PLAN)['days']
+
+
+def test_a_day_is_emitted_as_soon_as_the_next_one_starts():
+    parser = PlanParser()
+    assert parser.feed(PLAN.split('------')[0]) == []
+    completed = parser.feed('---------\n\n📆 Day 2: mon july 21 2025\n')
+    assert [day['day'] for day in completed] == [1]
+
+
+def test_unreadable_dates_are_kept_and_text_is_optional():
+    parser = PlanParser(include_text=True)
+    assert parser.feed('📆 Day 4: someday\n**Wrap up**\nReview.\n') == []
+    day, = parser.close()
+    assert day['date'] == 'someday'
+    assert day['text'] == '📆 Day 4: someday\n**Wrap up**\nReview.'
+
+
+def test_renumber_days_makes_windows_continuous_and_redates_them():
+    window = parse_days(PLAN.replace('Day 1:', 'Day 8:').replace('Day 2:', 'Day 3:'))
+    blocks, days = renumber_days(window, 15, '2026-03-01')
+    assert [day['day'] for day in days] == [15, 16]
+    assert [day['date'] for day in days] == ['2026-03-15', '2026-03-16']
+    assert days[0]['tasks'][2] == {'id': 'd15t3', 'text': 'Write a hello world program.'}
+    assert blocks[0].startswith('📆 Day 15: sun march 15 2026\n**Basics & Syntax**')
+    assert blocks[1].splitlines()[0] == '📆 Day 16: mon march 16 2026'
+    assert parse_plan(join_day_blocks(blocks))['days'] == days
+
+
+def test_offline_plan_spreads_the_curriculum_with_review_days():
+    topics = [f"Topic {i}" for i in range(1, 5)]
+    text, structure = generate_study_plan('learn Python', 14, '2026-03-02', topics, 'Python')
+    days = structure['days']
+    assert len(days) == 14 and days[-1]['date'] == '2026-03-15'
+    assert [day['title'] for day in days if 'Review' in day['title']] == ['Weekly Review', 'Final Review and Assessment']
+    assert days[6]['title'] == 'Weekly Review' and days[13]['title'] == 'Final Review and Assessment'
+    studied = [day['title'] for day in days if 'Review' not in day['title']]
+    assert studied == sorted(studied) and set(studied) == set(topics)
+    assert 'Take the Python quiz on Topic 4 in Practice.' in [task['text'] for task in days[12]['tasks']]
+    assert parse_plan(text) == structure
+
+
+def test_offline_plan_without_a_curriculum_uses_generic_phases():
+    _, structure = generate_study_plan('learn pottery', 3, '2026-03-02')
+    assert structure['days'][0]['title'].startswith('Fundamentals of learn pottery')
+    assert detect_language('learn pottery', ['Python', 'SQL']) is None
+    assert detect_language('master postgres queries', ['Python', 'SQL']) == 'SQL'
@@ -0,0 +1,129 @@
+import pytest
+
+from DB.progress_buffer import ProgressBuffer, merge_feedback, normalize_deltas
+from DB.progress_codec import stored_progress
+from DB.sqlite_repository import SQLiteRepository
+
+PLAN = '\n\n'.join(
+    f"{'-' * 40}\n\n📆 Day {day}: 2026-01-0{day}\n**Topic {day}**\n\nRead the notes.\nSolve the exercises.\n"
+    for day in (1, 2, 3))
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return SQLiteRepository(str(tmp_path / 'plans.sqlite3'))
+
+
+@pytest.fixture
+def plan_id(repository):
+    return str(repository.insert_plan({'user_id': 'u1', 'title': 'Plan', 'plan': PLAN, 'progress': {}})['id'])
+
+
+def saved_progress(repository, plan_id):
+    return stored_progress(repository.get_plan(plan_id, 'progress, progress_bits'))
+
+
+def test_normalize_deltas_accepts_both_shapes():
+    assert normalize_deltas({'0-1': 1}) == ({'0-1': True}, {})
+    assert normalize_deltas([{'task': '0-1', 'done': False, 'feedback': 'hard'}]) == ({'0-1': False}, {'0-1': 'hard'})
+    with pytest.raises(ValueError):
+        normalize_deltas([{'done': True}])
+
+
+def test_merge_feedback_keeps_free_text():
+    assert merge_feedback('too fast', {'0-1': 'hard'}) == {'note': 'too fast', '0-1': 'hard'}
+    assert merge_feedback({'0-1': 'hard'}, {'0-1': ''}) == {}
+
+
+def test_deltas_are_merged_into_one_write(repository, plan_id):
+    buffer = ProgressBuffer(repository, window=60)
+    buffer.add(plan_id, {'0-0': True})
+    view = buffer.add(plan_id, {'0-1': True, '1-0': True})
+    assert view['progress'] == {'0-0': True, '0-1': True, '1-0': True}
+    assert saved_progress(repository, plan_id) == {}
+    assert buffer.flush(plan_id)
+    assert saved_progress(repository, plan_id) == {'0-0': True, '0-1': True, '1-0': True}
+    assert buffer.stats()['flushes'] == 1
+
+
+def test_two_buffers_do_not_overwrite_each_other(repository, plan_id):
+    # Two worker processes, each with its own buffer, flushing the same plan
+    first, second = ProgressBuffer(repository, window=60), ProgressBuffer(repository, window=60)
+    first.add(plan_id, {'0-0': True})
+    second.add(plan_id, {'1-1': True})
+    assert first.flush(plan_id) and second.flush(plan_id)
+    assert saved_progress(repository, plan_id) == {'0-0': True, '1-1': True}
+
+
+def test_flush_retries_when_the_row_changed_since_it_was_cached(repository, plan_id):
+    buffer = ProgressBuffer(repository, window=60)
+    buffer.add(plan_id, {'0-0': True})
+    repository.update_plan(plan_id, {'progress': {'2-0': True}})  # another worker or the browser
+    assert buffer.flush(plan_id)
+    assert saved_progress(repository, plan_id) == {'0-0': True, '2-0': True}
+    assert buffer.stats()['conflicts'] == 1
+
+
+def test_clicks_are_served_from_the_plan_cache(repository, plan_id):
+    buffer = ProgressBuffer(repository, window=60)
+    for key in ('0-0', '0-1', '1-0', '1-1'):
+        buffer.add(plan_id, {key: True})
+    buffer.view(plan_id)
+    assert buffer.flush(plan_id)
+    buffer.add(plan_id, {'2-0': True})
+    assert buffer.stats()['plan_loads'] == 1
+
+
+def test_unknown_task_keys_are_rejected(repository, plan_id):
+    buffer = ProgressBuffer(repository, window=60)
+    for key in ('3-0', '0-2', 'd4t1', 'd1t3', 'x'):
+        with pytest.raises(ValueError):
+            buffer.add(plan_id, {key: True})
+    assert buffer.add(plan_id, {'d1t2': True}, {'note': 'too fast'})['progress'] == {'d1t2': True}
+
+
+def test_keys_of_an_adapted_plan_are_accepted(repository, plan_id):
+    buffer = ProgressBuffer(repository, window=60)
+    buffer.add(plan_id, {'0-0': True})
+    longer = PLAN + f"\n{'-' * 40}\n\n📆 Day 4: 2026-01-04\n**Topic 4**\n\nRead the notes.\n"
+    repository.update_plan(plan_id, {'plan': longer})
+    assert buffer.add(plan_id, {'3-0': True})['progress'] == {'0-0': True, '3-0': True}
+
+
+def test_unknown_plan(repository):
+    assert ProgressBuffer(repository, window=60).add('404', {'0-0': True}) is None
+
+
+def test_write_through_saves_before_returning(repository, plan_id):
+    buffer = ProgressBuffer(repository, window=0)
+    other_worker = ProgressBuffer(repository, window=0)
+    buffer.add(plan_id, {'0-0': True})
+    assert saved_progress(repository, plan_id) == {'0-0': True}
+    view = other_worker.add(plan_id, {'1-0': True})
+    assert view['progress'] == {'0-0': True, '1-0': True}
+    assert buffer.view(plan_id)['progress'] == {'0-0': True, '1-0': True}
+    assert buffer.stats()['pending_plans'] == 0
+
+
+def test_only_the_owner_may_write(repository, plan_id):
+    buffer = ProgressBuffer(repository, window=0)
+    with pytest.raises(PermissionError):
+        buffer.add(plan_id, {'0-0': True}, user_id='u2')
+    with pytest.raises(PermissionError):
+        buffer.replace(plan_id, {'0-0': True}, user_id='u2')
+    assert buffer.add(plan_id, {'0-0': True}, user_id='u1')['progress'] == {'0-0': True}
+    assert saved_progress(repository, plan_id) == {'0-0': True}
+
+
+def test_an_accepted_adaptation_replaces_the_cached_plan(repository, plan_id):
+    buffer = ProgressBuffer(repository, window=60)
+    buffer.add(plan_id, {'2-1': True})
+    with pytest.raises(PermissionError):
+        buffer.save_plan(plan_id, PLAN, None, user_id='u2')
+    shorter = PLAN.rsplit('-' * 40, 1)[0]
+    assert buffer.save_plan(plan_id, shorter, None, user_id='u1')['plan'] == shorter
+    # The pending tick was written first and day 3 is gone from the cached plan
+    assert saved_progress(repository, plan_id) == {'2-1': True}
+    with pytest.raises(ValueError):
+        buffer.add(plan_id, {'2-0': True})
+    assert buffer.view(plan_id)['plan'] == shorter
@@ -0,0 +1,48 @@
+import base64
+
+import pytest
+
+from DB.progress_codec import (decode_day_masks, decode_progress, encode_progress, progress_positions,
+                               storage_fields, stored_progress)
+
+
+@pytest.mark.parametrize('progress', [
+    {},
+    {'0-0': True, '0-3': True, '2-1': True},
+    {'d1t1': True, 'd3t2': True, 'd365t4': True},
+    {'d2t200': True},
+])
+def test_checked_tasks_round_trip(progress):
+    assert decode_progress(encode_progress(progress)) == progress
+
+
+def test_unchecked_tasks_are_dropped_and_days_are_bitmasks():
+    encoded = encode_progress({'d1t1': True, 'd1t3': True, 'd1t2': False, 'd3t1': True})
+    assert decode_progress(encoded) == {'d1t1': True, 'd1t3': True, 'd3t1': True}
+    assert decode_day_masks(encoded) == [0b101, 0, 0b1]
+
+
+def test_keys_the_bitset_cannot_hold_stay_json():
+    for progress in ({'0-1': True, 'd1t1': True}, {'note': True}, {'d0t1': True}, {'99999-0': True}):
+        assert encode_progress(progress) is None
+        assert storage_fields(progress) == {'progress': progress, 'progress_bits': None}
+
+
+def test_a_year_of_progress_is_small():
+    progress = {f"d{day}t{task}": True for day in range(1, 366) for task in range(1, 5)}
+    assert len(encode_progress(progress)) < 1100
+
+
+def test_stored_progress_reads_either_column():
+    assert stored_progress(storage_fields({'d2t1': True})) == {'d2t1': True}
+    assert stored_progress({'progress': {'note': True}, 'progress_bits': None}) == {'note': True}
+    assert stored_progress({'progress': [], 'progress_bits': None}) == {}
+
+
+def test_unknown_encodings_are_rejected():
+    with pytest.raises(ValueError):
+        decode_progress(base64.b64encode(b'\x09\x01\x01').decode())
+
+
+def test_positions_are_zero_based_for_both_schemes():
+    assert sorted(progress_positions({'2-1': True, 'd1t3': True, 'd4t1': False})) == [(0, 2), (2, 1)]
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+from DB.repository import SupabaseRepository
+
+
+class FakeQuery:
+    """Just enough of the PostgREST query builder, including the server's
+    max-rows cap on every response."""
+
+    def __init__(self, rows, max_rows):
+        self.rows, self.max_rows = rows, max_rows
+        self.filters, self.order_by, self.row_limit = [], None, None
+
+    def select(self, columns):
+        self.columns = [c.strip() for c in columns.split(',')]
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row.get(column) > value)
+        return self
+
+    def is_(self, column, value):
+        self.filters.append(lambda row: row.get(column) is None)
+        return self
+
+    def order(self, column):
+        self.order_by = column
+        return self
+
+    def limit(self, n):
+        self.row_limit = n
+        return self
+
+    def execute(self):
+        rows = [row for row in self.rows if all(f(row) for f in self.filters)]
+        if self.order_by:
+            rows.sort(key=lambda row: row[self.order_by])
+        rows = rows[:min(self.row_limit or self.max_rows, self.max_rows)]
+        if self.columns != ['*']:
+            rows = [{c: row.get(c) for c in self.columns} for row in rows]
+        return SimpleNamespace(data=rows)
+
+
+class FakeClient:
+    def __init__(self, tables, max_rows=7):
+        self.tables, self.max_rows = tables, max_rows
+
+    def table(self, name):
+        return FakeQuery(self.tables[name], self.max_rows)
+
+
+def make_repository(max_rows=7):
+    topics = [{'id': i, 'language': 'python' if i % 2 else 'java', 'topic': f't{i}', 'topic_order': 30 - i}
+              for i in range(1, 21)]
+    questions = [{'id': i, 'topic_id': i % 20 + 1, 'question': f'q{i}', 'options': [], 'answer': 'a',
+                  'explanation': '', 'content_hash': None if i % 3 else f'h{i}'} for i in range(1, 101)]
+    games = [{'id': i, 'language': 'python', 'topic': 't1', 'difficulty': 'easy', 'content_hash': None}
+             for i in range(1, 51)]
+    client = FakeClient({'topics': topics, 'quiz_questions': questions, 'code_games': games}, max_rows)
+    return SupabaseRepository(client)
+
+
+def test_whole_table_reads_are_not_cut_off_at_max_rows():
+    repository = make_repository()
+    assert len(repository.quiz_questions()) == 100
+    assert len(repository.code_games()) == 50
+
+
+def test_code_game_index_covers_every_game():
+    # GameSampler draws from this index; a capped read would hide games
+    index = make_repository().code_game_index()
+    assert sorted(row['id'] for row in index) == list(range(1, 51))
+    assert set(index[0]) == {'id', 'language', 'topic', 'difficulty'}
+
+
+def test_filtered_reads_page_too():
+    repository = make_repository()
+    assert len(repository.quiz_questions([1])) == 5
+    assert len(repository.quiz_questions([1, 2, 3])) == 15
+    assert len(repository.topic_ids(['python'])) == 10
+
+
+def test_hash_backfill_sees_every_unhashed_row():
+    rows = make_repository().rows_without_hash('quiz_questions')
+    assert [row['id'] for row in rows] == [i for i in range(1, 101) if i % 3]
+
+
+def test_topics_keep_curriculum_order():
+    repository = make_repository()
+    orders = [row['topic_order'] for row in repository.all_topics()]
+    assert orders == sorted(orders) and len(orders) == 20
+    assert [row['topic'] for row in repository.topics_for_language('java')][:2] == ['t20', 't18']
@@ -0,0 +1,48 @@
+import pytest
+
+from DB.review_scheduler import INITIAL_EASE, MIN_EASE, _TopicQueue, normalize_answers, sm2
+
+DAY = 740000
+
+
+def test_sm2_intervals_grow_1_6_then_by_ease():
+    state = sm2(None, 5, DAY)
+    assert (state['interval_days'], state['due_day'], state['repetitions']) == (1, DAY + 1, 1)
+    assert state['ease'] == INITIAL_EASE + 0.1
+    state = sm2(state, 5, DAY + 1)
+    assert (state['interval_days'], state['repetitions']) == (6, 2)
+    state = sm2(state, 4, DAY + 7)
+    assert state['interval_days'] == round(6 * 2.7) and state['ease'] == 2.7
+
+
+def test_sm2_a_lapse_starts_over_and_lowers_ease():
+    state = {'repetitions': 4, 'interval_days': 30, 'ease': 2.5, 'lapses': 0}
+    lapsed = sm2(state, 1, DAY)
+    assert (lapsed['interval_days'], lapsed['due_day'], lapsed['repetitions'], lapsed['lapses']) == (1, DAY + 1, 0, 1)
+    assert lapsed['ease'] == 1.96
+    for _ in range(10):
+        lapsed = sm2(lapsed, 0, DAY)
+    assert lapsed['ease'] == MIN_EASE
+
+
+def test_normalize_answers():
+    assert normalize_answers([{'question_id': 1, 'quality': 3}, {'question_id': 2, 'correct': False}]) == [(1, 3), (2, 1)]
+    for answers in ([], [{'quality': 3}], [{'question_id': 1, 'quality': 6}], [{'question_id': 1, 'quality': True}],
+                    [{'question_id': 1}]):
+        with pytest.raises(ValueError):
+            normalize_answers(answers)
+
+
+def review(question_id, due_day, reviewed_at):
+    return {'question_id': question_id, 'due_day': due_day, 'interval_days': 1, 'ease': 2.5, 'repetitions': 1,
+            'lapses': 0, 'reviewed_at': reviewed_at}
+
+
+def test_queue_serves_overdue_reviews_before_new_questions():
+    queue = _TopicQueue(7, [{'id': i} for i in range(1, 6)], generation=0, day=DAY)
+    queue.load([review(4, DAY - 3, 1), review(2, DAY - 1, 2), review(5, DAY + 2, 3)])
+    assert queue.take(3, DAY) == ([4, 2, 1], DAY)
+    # Served questions stay due until answered; answering one moves it back
+    queue.apply([review(4, DAY + 5, 4)])
+    assert queue.take(10, DAY) == ([2, 1, 3], DAY + 2)
+    assert queue.synced_at == 4
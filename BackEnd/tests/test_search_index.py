@@ -0,0 +1,94 @@
+import pytest
+
+from DB.search_index import SearchIndex, _within_one_edit
+
+
+class CappedRepository:
+    """Content and plans served the way PostgREST does: id-ordered pages
+    silently cut off at max_rows."""
+
+    def __init__(self, topics, questions, plans, max_rows=3):
+        self.topics, self.questions, self.plans, self.max_rows = topics, questions, plans, max_rows
+
+    def _page(self, rows, after_id, limit):
+        rows = [row for row in rows if after_id is None or row['id'] > after_id]
+        return rows[:min(limit, self.max_rows)]
+
+    def all_topics(self):
+        return list(self.topics)
+
+    def quiz_questions_page(self, topic_ids, columns, after_id=None, limit=500):
+        return self._page(self.questions, after_id, limit)
+
+    def plans_page(self, columns, after_id=None, limit=1000):
+        return self._page(self.plans, after_id, limit)
+
+    def get_plan(self, plan_id, columns):
+        return next((row for row in self.plans if str(row['id']) == str(plan_id)), None)
+
+
+TOPICS = [
+    {'id': 1, 'language': 'python', 'topic': 'Generators and iterators', 'topic_order': 1},
+    {'id': 2, 'language': 'python', 'topic': 'Decorators', 'topic_order': 2},
+    {'id': 3, 'language': 'java', 'topic': 'Streams', 'topic_order': 1},
+]
+QUESTIONS = [
+    {'id': i, 'topic_id': 1 + i % 3, 'question': f'Question {i} about ' + ('yield' if i == 9 else 'lists'),
+     'explanation': 'A generator pauses at yield.' if i == 9 else 'Lists are mutable.'}
+    for i in range(1, 11)
+]
+PLANS = [
+    {'id': i, 'user_id': 'u1' if i % 2 else 'u2', 'title': f'Plan {i}', 'goal': 'Learn async python' if i == 7 else 'Learn sql',
+     'tags': ['backend']} for i in range(1, 9)
+]
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex(CappedRepository(TOPICS, QUESTIONS, PLANS))
+    assert index.refresh()
+    return index
+
+
+def ids(results, kind):
+    return [r['id'] for r in results if r['kind'] == kind]
+
+
+def test_refresh_reads_past_the_page_cap(index):
+    assert index.stats()['documents'] == len(TOPICS) + len(QUESTIONS) + len(PLANS)
+    assert ids(index.search('yield', kinds=('question',)), 'question') == [9]
+    assert ids(index.search('async', kinds=('plan',), user_id='u1'), 'plan') == [7]
+
+
+def test_one_edit_covers_insert_delete_substitute_and_swap():
+    for typo in ('decorator', 'decoratorss', 'decorqtors', 'decroators', 'decorators'):
+        assert _within_one_edit(typo, 'decorators')
+    for far in ('decortr', 'dceroators', 'generators'):
+        assert not _within_one_edit(far, 'decorators')
+
+
+def test_bm25_prefers_title_matches_rare_terms_and_short_documents():
+    index = SearchIndex(CappedRepository([], [], []))
+    shard = ('question', 'python')
+    index.upsert([
+        (('question', 1), 'closures', 'functions remember variables', {'kind': 'question', 'id': 1}, shard),
+        (('question', 2), 'functions', 'closures capture variables from the enclosing scope',
+         {'kind': 'question', 'id': 2}, shard),
+        (('question', 3), 'functions', 'closures ' + 'padding words ' * 30, {'kind': 'question', 'id': 3}, shard),
+        (('question', 4), 'functions', 'variables and functions', {'kind': 'question', 'id': 4}, shard),
+    ])
+    assert ids(index.search('closures '), 'question') == [1, 2, 3]
+    # Both words matched beats one rare word matched strongly
+    assert ids(index.search('closures variables '), 'question')[:2] == [1, 2]
+
+
+def test_prefix_and_typo_matching(index):
+    assert ids(index.search('gener'), 'topic') == [1]
+    assert ids(index.search('gener '), 'topic') == []  # a finished word is not a prefix
+    assert ids(index.search('decoratrs'), 'topic') == [2]
+    assert ids(index.search('streams', language='python'), 'topic') == []
+
+
+def test_plans_are_only_searched_for_their_owner(index):
+    assert ids(index.search('async', kinds=('plan',), user_id='u2'), 'plan') == []
+    assert ids(index.search('async', kinds=('plan',)), 'plan') == []
@@ -0,0 +1,27 @@
+import json
+import os
+
+import pytest
+
+from DB.seeding import SEED_DATA_DIR, load_rows, seed_code_games
+from DB.sqlite_repository import SQLiteRepository
+
+
+def test_seed_files_are_json_lists_of_rows(tmp_path):
+    for name in os.listdir(SEED_DATA_DIR):
+        assert isinstance(load_rows(os.path.join(SEED_DATA_DIR, name)), list)
+    script = tmp_path / 'games.py'
+    script.write_text("games_data = []\n")
+    with pytest.raises(ValueError):
+        load_rows(str(script))
+    not_rows = tmp_path / 'games.json'
+    not_rows.write_text(json.dumps({'games': []}))
+    with pytest.raises(ValueError):
+        load_rows(str(not_rows))
+
+
+def test_reseeding_the_same_file_writes_nothing(tmp_path):
+    repository = SQLiteRepository(str(tmp_path / 'content.sqlite3'))
+    games = load_rows(os.path.join(SEED_DATA_DIR, 'code_games.json'))
+    assert seed_code_games(repository, games) == len(games)
+    assert seed_code_games(repository, games) == 0
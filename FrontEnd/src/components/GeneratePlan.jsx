@@ -1,5 +1,5 @@
 import React, { useState } from "react";
-import { supabase } from '../utils/supabaseClient';
+import { supabase, authHeaders } from '../utils/supabaseClient';
 import axios from "axios";
 import { format } from "date-fns";
 import { toast } from "sonner";
@@ -43,6 +43,7 @@ const GeneratePlan = ({ user, onPlanCreated }) => {
             days: duration,
             start_date: format(startDate, "yyyy-MM-dd"),
             plan: aiPlan,
+            structure: response.data.structure || null,
             created_at: new Date().toISOString(),
             progress: {},
             user_id: user.id,
@@ -56,6 +57,10 @@ const GeneratePlan = ({ user, onPlanCreated }) => {
       }
       toast.success("Plan generated and saved!");
       setPlanId(data[0].id);
+      // Let the backend search index pick the new plan up right away
+      authHeaders()
+        .then(headers => fetch(`/api/search/plans/${data[0].id}`, { method: 'POST', headers }))
+        .catch(() => {});
       if (onPlanCreated) onPlanCreated();
     } catch (err) {
       console.error(err);
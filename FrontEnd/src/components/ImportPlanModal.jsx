@@ -3,6 +3,7 @@ import { createClient } from "@supabase/supabase-js";
 import { useDropzone } from "react-dropzone";
 import ReactMarkdown from "react-markdown";
 import { toast } from "react-hot-toast";
+import { authHeaders } from "../utils/supabaseClient";
 
 const supabase = createClient(
   import.meta.env.VITE_SUPABASE_URL,
@@ -58,7 +59,7 @@ const ImportPlanModal = ({ onClose }) => {
       return;
     }
 
-    const { error } = await supabase.from("study_plan").insert({
+    const { data, error } = await supabase.from("study_plan").insert({
       user_id: user.id,
       title,
       goal,
@@ -66,13 +67,16 @@ const ImportPlanModal = ({ onClose }) => {
       plan: planText,
       start_date: new Date(),
       progress: [],
-    });
+    }).select();
 
     if (error) {
       console.error("Error saving plan:", error);
       toast.error("Failed to save plan.");
     } else {
       toast.success("Plan imported and saved!");
+      authHeaders()
+        .then(headers => fetch(`/api/search/plans/${data[0].id}`, { method: 'POST', headers }))
+        .catch(() => {});
       onClose();
     }
   };
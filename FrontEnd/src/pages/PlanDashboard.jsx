@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import PlanCard from '../components/PlanCard';
-import { supabase } from '../utils/supabaseClient';
+import { supabase, authHeaders } from '../utils/supabaseClient';
 import { useNavigate } from 'react-router-dom';
 import SearchBar from '../components/SearchBar';
 import { toast } from 'react-hot-toast';
@@ -42,6 +42,9 @@ function PlanDashboard() {
       toast.error('Error deleting plan: ' + error.message);
     } else {
       setPlans(plans.filter((p) => p.id !== planId));
+      authHeaders()
+        .then(headers => fetch(`/api/search/plans/${planId}`, { method: 'POST', headers }))
+        .catch(() => {});
       toast.success('Plan deleted successfully!');
     }
   };
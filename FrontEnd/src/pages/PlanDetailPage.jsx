@@ -2,7 +2,8 @@
 import { useNavigate, useParams } from 'react-router-dom';
 import { useEffect, useState, useRef } from 'react';
 import PlanViewer from '../components/PlanViewer';
-import { supabase } from '../utils/supabaseClient';
+import { supabase, authHeaders } from '../utils/supabaseClient';
+import { rowProgress } from '../utils/progressBits';
 import axios from 'axios';
 import ReactMarkdown from 'react-markdown';
 import { toast } from 'react-hot-toast';
@@ -16,6 +17,7 @@ export default function PlanDetailPage() {
   const [fetchError, setFetchError] = useState(null);
   const [adapting, setAdapting] = useState(false);
   const [adaptedPlan, setAdaptedPlan] = useState(null);
+  const [adaptedStructure, setAdaptedStructure] = useState(null);
   const [showAdaptModal, setShowAdaptModal] = useState(false);
   const [justAdapted, setJustAdapted] = useState(false);
   const [saving, setSaving] = useState(false);
@@ -40,7 +42,7 @@ export default function PlanDetailPage() {
         } else if (!data) {
           setPlan(null);
         } else {
-          setPlan(data);
+          setPlan({ ...data, progress: rowProgress(data) });
         }
       } catch (err) {
         setFetchError(err.message);
@@ -53,45 +55,82 @@ export default function PlanDetailPage() {
 
 
 
-  // Handler to update progress in Supabase (Optimistic UI, state is lifted up)
-  const handleProgressUpdate = async (taskKey) => {
+  // Task toggles are collected for a short moment and sent to the backend as
+  // one batch of deltas; the backend coalesces them again before writing.
+  const pendingDeltas = useRef({});
+  const sentDeltas = useRef(new Map()); // request number -> deltas not answered yet
+  const requestCount = useRef(0);
+  const lastApplied = useRef(0);
+  const flushTimer = useRef(null);
+  const lastSavedPlan = useRef(null);
+
+  const flushProgress = async (planId) => {
+    flushTimer.current = null;
+    const deltas = pendingDeltas.current;
+    pendingDeltas.current = {};
+    if (Object.keys(deltas).length === 0) return;
+    const requestId = ++requestCount.current;
+    sentDeltas.current.set(requestId, deltas);
+    try {
+      const response = await fetch('http://localhost:5000/update-progress', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
+        body: JSON.stringify({
+          plan_id: planId,
+          deltas: Object.entries(deltas).map(([task, done]) => ({ task, done })),
+        }),
+      });
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      const data = await response.json();
+      sentDeltas.current.delete(requestId);
+      if (sentDeltas.current.size === 0) lastSavedPlan.current = null;
+      // An answer overtaken by a newer one is older than what we show
+      if (requestId < lastApplied.current) return;
+      lastApplied.current = requestId;
+      // The server view includes our deltas; clicks still on their way (an
+      // overlapping request, or queued here) go on top so they do not flicker
+      const unanswered = Object.assign({}, ...sentDeltas.current.values());
+      setPlan(currentPlan => ({
+        ...currentPlan,
+        progress: { ...data.progress, ...unanswered, ...pendingDeltas.current },
+      }));
+    } catch (error) {
+      sentDeltas.current.delete(requestId);
+      console.error('Failed to save progress:', error);
+      toast.error('Failed to save progress. Your changes have been reverted.');
+      if (lastSavedPlan.current) {
+        setPlan(lastSavedPlan.current);
+        lastSavedPlan.current = null;
+      }
+    } finally {
+      if (!flushTimer.current) setSaving(false);
+    }
+  };
+
+  useEffect(() => () => clearTimeout(flushTimer.current), []);
+
+  // Handler to update progress (Optimistic UI, state is lifted up)
+  const handleProgressUpdate = (taskKey) => {
     if (!plan) return;
 
     // 1. Calculate the new progress state based on the key of the clicked task
     const currentProgress = plan.progress || {};
-    const wasCompleted = currentProgress[taskKey]; // Check if task was already completed
     const newProgress = {
       ...currentProgress,
       [taskKey]: !currentProgress[taskKey], // Toggle the value
     };
 
     // 2. Optimistically update the local state. This is the single source of truth.
-    const previousPlan = plan;
+    if (!lastSavedPlan.current) lastSavedPlan.current = plan;
     setPlan(currentPlan => ({ ...currentPlan, progress: newProgress }));
     setSaving(true);
 
-    // Check if task was just completed (not uncompleted)
-    const isJustCompleted = !wasCompleted && newProgress[taskKey];
-    
-    // Add logging here!
-    console.log('Updating plan with id:', plan.id, 'Type:', typeof plan.id);
-    // 3. Send the update to the backend
-    const { error, data } = await supabase
-      .from('study_plan')
-      .update({ progress: newProgress })
-      .eq('id', plan.id)
-      .select();
-
-    // 4. If there's an error, revert to the previous state
-    console.log('Supabase update result:', { error, data, newProgress });
-
-    if (error) {
-      console.error('Failed to save progress:', error);
-      toast.error('Failed to save progress. Your changes have been reverted.');
-      setPlan(previousPlan);
-    }
-
-    setSaving(false);
+    // 3. Queue the delta; repeated clicks on the same task collapse into one
+    pendingDeltas.current[taskKey] = newProgress[taskKey];
+    clearTimeout(flushTimer.current);
+    flushTimer.current = setTimeout(() => flushProgress(plan.id), 400);
   };
 
   // Handler to request adapted plan
@@ -115,7 +154,8 @@ export default function PlanDetailPage() {
           feedback: plan.feedback || '',
           goal: plan.goal,
           days: plan.days,
-          start_date: plan.start_date
+          start_date: plan.start_date,
+          mode: 'incremental'
         })
       });
 
@@ -127,6 +167,7 @@ export default function PlanDetailPage() {
       console.log('Adapted plan response:', data);
       
       setAdaptedPlan(data.adapted_plan);
+      setAdaptedStructure(data.structure || null);
       toast.success('Plan adapted successfully!');
     } catch (error) {
       console.error('Error adapting plan:', error);
@@ -139,13 +180,26 @@ export default function PlanDetailPage() {
   // Handler to accept adapted plan
   const handleAcceptAdapted = async () => {
     if (!adaptedPlan) return;
-    await supabase
-      .from('study_plan')
-      .update({ plan: adaptedPlan })
-      .eq('id', plan.id);
-    setPlan((prev) => ({ ...prev, plan: adaptedPlan }));
+    // Saved through the backend, so its cached copy of the plan (used to
+    // check task keys and compute stats) follows the new plan
+    try {
+      const response = await fetch('http://localhost:5000/accept-adapted-plan', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
+        body: JSON.stringify({ plan_id: plan.id, plan: adaptedPlan, structure: adaptedStructure }),
+      });
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      const data = await response.json();
+      setPlan((prev) => ({ ...prev, plan: data.plan, structure: data.structure }));
+    } catch (error) {
+      toast.error('Failed to save the adapted plan: ' + error.message);
+      return;
+    }
     setShowAdaptModal(false);
     setAdaptedPlan(null);
+    setAdaptedStructure(null);
     setJustAdapted(true);
     console.log('Calling toast!');
     toast.success('Your plan has been adapted and saved!');
@@ -155,6 +209,7 @@ export default function PlanDetailPage() {
   const handleRejectAdapted = () => {
     setShowAdaptModal(false);
     setAdaptedPlan(null);
+    setAdaptedStructure(null);
   };
 
   // Modal close on outside click or Escape
@@ -2,6 +2,7 @@ import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { toast } from 'react-hot-toast';
 import Confetti from 'react-confetti';
+import { supabase, authHeaders } from '../utils/supabaseClient';
 
 // 1. Assign unique id to each question at definition time
 function addIdsToQuestions(questions, topic) {
@@ -118,15 +119,36 @@ function QuizGame({ language, topic, count, timerEnabled }) {
   const [timeLeft, setTimeLeft] = useState(count * 30);
   const [celebrated, setCelebrated] = useState(false);
   const [finalScore, setFinalScore] = useState(null);
+  const [userId, setUserId] = useState(null);
+  const [nextDue, setNextDue] = useState(null);
+  const [practice, setPractice] = useState(false);
   const timerRef = useRef();
 
   useEffect(() => {
     setLoading(true);
-    fetch(`/api/quiz-questions?language=${encodeURIComponent(language)}&topic=${encodeURIComponent(topic)}`)
-      .then(res => res.json())
-      .then(data => {
-        // Shuffle and slice to the desired count
-        const selectedQuestions = shuffleArray(data).slice(0, Math.min(count, data.length));
+    const params = `language=${encodeURIComponent(language)}&topic=${encodeURIComponent(topic)}`;
+    supabase.auth.getUser()
+      .then(({ data }) => {
+        const user = data.user;
+        setUserId(user ? user.id : null);
+        // Signed-in users get the questions due for review (spaced
+        // repetition); everyone else, or anyone practicing ahead of their
+        // reviews, a random pick from the whole topic.
+        setNextDue(null);
+        if (user && !practice) {
+          return authHeaders()
+            .then(headers => fetch(`/api/review/next?${params}&count=${count}`, { headers }))
+            .then(res => res.json())
+            .then(data => {
+              setNextDue(data.next_due || null);
+              return data.questions || [];
+            });
+        }
+        return fetch(`/api/quiz-questions?${params}`)
+          .then(res => res.json())
+          .then(data => shuffleArray(data).slice(0, Math.min(count, data.length)));
+      })
+      .then(selectedQuestions => {
         setQuestions(selectedQuestions);
         setLoading(false);
         setIdx(0);
@@ -138,7 +160,7 @@ function QuizGame({ language, topic, count, timerEnabled }) {
         setTimeLeft(count * 30);
         setCelebrated(false);
       });
-  }, [language, topic, count]);
+  }, [language, topic, count, practice]);
 
   useEffect(() => {
     if (showResult && finalScore !== null && !celebrated) {
@@ -151,6 +173,19 @@ function QuizGame({ language, topic, count, timerEnabled }) {
   }, [showResult, finalScore, celebrated, questions.length]);
 
   if (loading) return <div>Loading questions...</div>;
+  if (!questions.length && nextDue) {
+    // Everything in this topic is reviewed until nextDue
+    return (
+      <div style={{ textAlign: 'center', color: '#2563eb', fontWeight: 700, fontSize: 18 }}>
+        <div style={{ marginBottom: 14 }}>
+          You're all caught up! Next review on {new Date(`${nextDue}T00:00:00`).toLocaleDateString()}.
+        </div>
+        <button onClick={() => setPractice(true)} style={{ background: 'linear-gradient(90deg, #6366f1 0%, #60a5fa 100%)', color: '#fff', fontWeight: 700, fontSize: 17, border: 'none', borderRadius: 999, padding: '12px 36px', boxShadow: '0 4px 24px #60a5fa33', cursor: 'pointer' }}>
+          Practice anyway
+        </button>
+      </div>
+    );
+  }
   if (!questions.length) return <div>No questions found for this topic.</div>;
 
   const current = questions[idx];
@@ -175,6 +210,20 @@ function QuizGame({ language, topic, count, timerEnabled }) {
       setFinalScore(newScore);
       setShowResult(true);
       setScore(newScore); // update score for result
+      if (userId) {
+        // Record the whole session in one batch for the review scheduler
+        const answers = [...userAnswers, { ...current, selected }].map(ua => ({
+          question_id: ua.id,
+          correct: ua.selected === ua.answer,
+        }));
+        authHeaders()
+          .then(headers => fetch('/api/review/answers', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', ...headers },
+            body: JSON.stringify({ language, topic, answers }),
+          }))
+          .catch(() => toast.error('Could not save your review progress.'));
+      }
     }
   };
   const handleRestart = () => {
@@ -0,0 +1,39 @@
+// utils/progressBits.js
+// Decoder for study_plan.progress_bits, the per-day bitset the backend
+// writes instead of the progress object (see BackEnd/DB/progress_codec.py).
+
+const SCHEME_LEGACY = 1; // "12-3" keys
+const SCHEME_TASK_ID = 2; // "d13t4" keys
+
+export function decodeProgressBits(encoded) {
+  const progress = {};
+  if (!encoded) return progress;
+  const bytes = Uint8Array.from(atob(encoded), (c) => c.charCodeAt(0));
+  const scheme = bytes[0];
+  if (scheme !== SCHEME_LEGACY && scheme !== SCHEME_TASK_ID) return progress;
+  let pos = 1;
+  let day = 0;
+  while (pos < bytes.length) {
+    let length = 0;
+    let shift = 0;
+    let byte;
+    do {
+      byte = bytes[pos++];
+      length |= (byte & 0x7f) << shift;
+      shift += 7;
+    } while (byte & 0x80);
+    for (let i = 0; i < length * 8; i++) {
+      if (bytes[pos + (i >> 3)] & (1 << (i & 7))) {
+        progress[scheme === SCHEME_LEGACY ? `${day}-${i}` : `d${day + 1}t${i + 1}`] = true;
+      }
+    }
+    pos += length;
+    day++;
+  }
+  return progress;
+}
+
+// Progress of a study_plan row, whichever way it was stored
+export function rowProgress(row) {
+  return { ...(row.progress || {}), ...decodeProgressBits(row.progress_bits) };
+}